@@ -1,17 +1,33 @@
 from django.contrib import admin
 from .models import DishCategory, Dish, Post, Comment, PostCategory, Tag, PostImage, Reservation, OrderDishesList, \
-    Order, UserData
+    Order, UserData, OutgoingEmail, ReservationSlot
+from django.utils import timezone
 from django.utils.safestring import mark_safe
 
+from .renditions import get_rendition_url
+from .search import search_ids
+
+
+class FullTextSearchMixin:
+    """
+    Admin mixin searching the changelist with the full-text search index instead of LIKE '%term%' scans.
+    """
+    search_limit = 1000
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        ids = search_ids(queryset.model._meta.db_table, search_term, self.search_limit, public=False)
+        return queryset.filter(pk__in=ids), False
+
 
-admin.site.register(Reservation)
 admin.site.register(DishCategory)
 admin.site.register(PostCategory)
 admin.site.register(PostImage)
 
 
 @admin.register(Dish)
-class DishAdmin(admin.ModelAdmin):
+class DishAdmin(FullTextSearchMixin, admin.ModelAdmin):
     """
     Admin configuration for Dish model.
     """
@@ -23,7 +39,7 @@ class DishAdmin(admin.ModelAdmin):
 
     def photo_src_tag(self, obj):
         if obj.photo:
-            return mark_safe(f"<img src='{obj.photo.url}' width=50>")
+            return mark_safe(f"<img src='{get_rendition_url(obj.photo, 'thumb')}' width=50>")
 
     photo_src_tag.short_description = 'Dish photo'
 
@@ -41,7 +57,7 @@ class PostImageInline(admin.TabularInline):
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(FullTextSearchMixin, admin.ModelAdmin):
     """
     Admin configuration for Post model.
     """
@@ -74,7 +90,8 @@ class OrderDishesListAdmin(admin.ModelAdmin):
     """
     Admin configuration for OrderDishesList model.
     """
-    list_display = ['dish', 'price', 'quantity']
+    list_display = ['order', 'dish', 'price', 'quantity']
+    list_select_related = ('order', 'dish')
     search_fields = ['dish__name']
 
 
@@ -87,10 +104,63 @@ class UserDataAdmin(admin.ModelAdmin):
     search_fields = ['first_name', 'last_name', 'email_address']
 
 
+class OrderDishesListInline(admin.TabularInline):
+    model = OrderDishesList
+    fields = ('dish', 'price', 'quantity')
+    readonly_fields = ('dish', 'price', 'quantity')
+    extra = 0
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('dish')
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     """
     Admin configuration for Order model.
     """
-    list_display = ['order_date', 'order_time', 'order_status']
-    search_fields = ['order_status']
+    list_display = ['order_id', 'order_date', 'order_time', 'order_status']
+    list_filter = ('order_status', 'order_date')
+    inlines = [OrderDishesListInline]
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for OutgoingEmail model.
+    """
+    list_display = ['subject', 'to', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ('status',)
+    search_fields = ['subject']
+    actions = ['retry_now']
+
+    @admin.action(description='Retry selected emails now')
+    def retry_now(self, request, queryset):
+        queryset.exclude(status__in=(OutgoingEmail.STATUS_SENT, OutgoingEmail.STATUS_SENDING)).update(
+            status=OutgoingEmail.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now())
+
+
+@admin.register(ReservationSlot)
+class ReservationSlotAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for ReservationSlot model.
+    """
+    list_display = ['date', 'time', 'capacity', 'booked']
+    list_editable = ['capacity']
+    list_filter = ('date',)
+
+
+@admin.register(Reservation)
+class ReservationAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for Reservation model.
+    """
+    list_display = ['name', 'last_name', 'date', 'time', 'phone', 'is_precessed']
+    list_filter = ('is_precessed', 'date')
+    search_fields = ['name', 'last_name', 'phone']
+    actions = ['mark_processed']
+
+    @admin.action(description='Mark selected reservations as processed')
+    def mark_processed(self, request, queryset):
+        updated = queryset.filter(is_precessed=False).update(is_precessed=True, updated_at=timezone.now())
+        self.message_user(request, f'Marked {updated} reservations as processed.')
@@ -0,0 +1,179 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """
+    The number and total duration of the SQL queries run while handling a request.
+
+    Attributes:
+        queries (int): The number of queries.
+        db_time (float): The total time spent in the database, in milliseconds.
+    """
+    def __init__(self) -> None:
+        self.queries = 0
+        self.db_time = 0.0
+
+    def record(self, duration: float) -> None:
+        """
+        Records one query.
+
+        Args:
+            duration (float): The duration of the query, in milliseconds.
+        """
+        self.queries += 1
+        self.db_time += duration
+
+
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar('current_stats', default=None)
+
+
+def record_query(execute: Callable, sql: str, params, many: bool, context: dict):
+    """
+    Database execute wrapper adding every query to the statistics of the current request.
+
+    It is installed on every connection when the connection is created. The statistics live in a context
+    variable, so queries run by async views in worker threads are counted for the right request.
+    """
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record((time.perf_counter() - start) * 1000)
+
+
+def install_query_recorder(connection) -> None:
+    """
+    Installs the query recorder on a database connection.
+
+    Args:
+        connection (BaseDatabaseWrapper): The database connection.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class QueryBudget:
+    """
+    The maximum number of queries and total SQL time a view may use per request.
+
+    Attributes:
+        queries (int): The maximum number of queries, or None for no limit.
+        time_ms (float): The maximum total SQL time in milliseconds, or None for no limit.
+    """
+    def __init__(self, queries: Optional[int] = None, time_ms: Optional[float] = None) -> None:
+        self.queries = queries
+        self.time_ms = time_ms
+
+    def check(self, stats: QueryStats) -> list:
+        """
+        Compares the statistics of a request with the budget.
+
+        Args:
+            stats (QueryStats): The statistics of the request.
+
+        Returns:
+            list: A description of every exceeded limit, empty if the request stayed within the budget.
+        """
+        errors = []
+        if self.queries is not None and stats.queries > self.queries:
+            errors.append(f'{stats.queries} queries, budget {self.queries}')
+        if self.time_ms is not None and stats.db_time > self.time_ms:
+            errors.append(f'{stats.db_time:.1f} ms of SQL, budget {self.time_ms} ms')
+        return errors
+
+
+def query_budget(queries: Optional[int] = None, time_ms: Optional[float] = None) -> Callable:
+    """
+    Declares the query budget of a view function or class.
+
+    Args:
+        queries (int, optional): The maximum number of queries.
+        time_ms (float, optional): The maximum total SQL time in milliseconds.
+
+    Returns:
+        Callable: The decorator setting the query_budget attribute of the view.
+    """
+    def decorator(view):
+        view.query_budget = QueryBudget(queries, time_ms)
+        return view
+    return decorator
+
+
+def get_query_budget(view_func: Callable) -> QueryBudget:
+    """
+    Returns the budget declared on a view, or the default budget of the QUERY_BUDGET setting.
+
+    Args:
+        view_func (Callable): The view function, possibly made by as_view().
+
+    Returns:
+        QueryBudget: The budget of the view.
+    """
+    budget = getattr(view_func, 'query_budget', None) or getattr(
+        getattr(view_func, 'view_class', None), 'query_budget', None)
+    return budget or QueryBudget(**settings.QUERY_BUDGET)
+
+
+class QueryBudgetMiddleware:
+    """
+    Middleware recording the queries of every request and logging the requests that exceed their view's budget.
+
+    The statistics are left on the request as request.query_stats and the budget as request.query_budget.
+    The middleware supports both WSGI and ASGI natively, so the statistics are set up in the context of the
+    request itself.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.is_async:
+            return self.__acall__(request)
+        token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self.finish(request)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self.finish(request)
+        return response
+
+    def process_view(self, request: HttpRequest, view_func: Callable, view_args, view_kwargs) -> None:
+        request.query_budget = get_query_budget(view_func)
+
+    @staticmethod
+    def start(request: HttpRequest):
+        request.query_stats = QueryStats()
+        return current_stats.set(request.query_stats)
+
+    @staticmethod
+    def finish(request: HttpRequest) -> None:
+        budget = getattr(request, 'query_budget', None)
+        errors = budget.check(request.query_stats) if budget is not None else []
+        if errors:
+            logger.warning('Query budget exceeded by %s: %s', request.path, '; '.join(errors))
@@ -0,0 +1,118 @@
+import uuid
+from typing import List
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import BaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+from .models import Post
+
+RECENT_POSTS_CACHE_KEY = 'coffee:recent_posts'
+RECENT_POSTS_VERSION_CACHE_KEY = 'coffee:recent_posts_version'
+RECENT_POSTS_LIMIT = 5
+RECENT_POSTS_TIMEOUT = 60 * 5
+
+MENU_VERSION_CACHE_KEY = 'coffee:menu_version'
+MENU_FRAGMENT_TIMEOUT = 60 * 5
+
+VERSION_CACHE_ALIAS = 'shared'
+INITIAL_VERSION = 'initial'
+
+
+def get_shared_cache(alias: str) -> BaseCache:
+    """
+    Returns a cache that every worker process sees, for data that must not differ between workers.
+
+    Args:
+        alias (str): The alias of the cache in the CACHES setting.
+
+    Returns:
+        BaseCache: The cache.
+
+    Raises:
+        ImproperlyConfigured: If the cache only lives in the memory of one process, or stores nothing.
+    """
+    shared_cache = caches[alias]
+    if isinstance(shared_cache, (LocMemCache, DummyCache)):
+        raise ImproperlyConfigured(f'The {alias!r} cache must be shared by all worker processes, '
+                                   f'not {type(shared_cache).__name__}.')
+    return shared_cache
+
+
+def get_recent_posts() -> List[Post]:
+    """
+    Returns the most recent posts from the cache, loading them on a miss.
+
+    The cache holds the largest number of recent posts any page shows, and templates take a slice of it. The
+    posts are kept in the cache of each worker together with the version they were loaded for, and the version
+    in the shared cache tells every worker when to reload them.
+
+    Returns:
+        list: The most recent posts, newest first.
+    """
+    version = get_version(RECENT_POSTS_VERSION_CACHE_KEY)
+    cached = cache.get(RECENT_POSTS_CACHE_KEY)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    posts = list(Post.objects.for_listing().defer('content').order_by('-date_posted')[:RECENT_POSTS_LIMIT])
+    cache.set(RECENT_POSTS_CACHE_KEY, (version, posts), RECENT_POSTS_TIMEOUT)
+    return posts
+
+
+def invalidate_recent_posts() -> None:
+    """
+    Bumps the recent posts version so every worker reloads them on its next request.
+    """
+    bump_version(RECENT_POSTS_VERSION_CACHE_KEY)
+
+
+def get_version(key: str) -> str:
+    """
+    Returns the current version of some cached data.
+
+    The versions live in the shared cache and never expire, so a version bumped by one worker is seen by all of
+    them, while the data they guard can stay in the memory of each worker under the version it was loaded for.
+    Data that was never bumped has the initial version, which is not stored, so reading a version never writes.
+
+    Args:
+        key (str): The cache key of the version.
+
+    Returns:
+        str: The current version.
+    """
+    return get_shared_cache(VERSION_CACHE_ALIAS).get(key, INITIAL_VERSION)
+
+
+def bump_version(key: str) -> None:
+    """
+    Replaces the version of some cached data once the current transaction is committed.
+
+    Bumping after the commit keeps a concurrent request from caching the old data under the new version.
+
+    Args:
+        key (str): The cache key of the version.
+    """
+    transaction.on_commit(lambda: get_shared_cache(VERSION_CACHE_ALIAS).set(key, uuid.uuid4().hex, None))
+
+
+def get_menu_version() -> str:
+    """
+    Returns the current version of the cached menu and shop fragments.
+
+    The version is part of the fragment cache keys, so bumping it makes every cached grid miss at once.
+
+    Returns:
+        str: The current menu version.
+    """
+    return get_version(MENU_VERSION_CACHE_KEY)
+
+
+def invalidate_menu() -> None:
+    """
+    Bumps the menu version so the menu and shop fragments are rendered again by every worker.
+    """
+    bump_version(MENU_VERSION_CACHE_KEY)
@@ -0,0 +1,245 @@
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .cart_storage import BaseCartStorage
+from .models import Dish
+
+
+class CartLine:
+    """
+    A single priced line of the shopping cart.
+
+    Attributes:
+        product (Dish): The dish in the cart.
+        quantity (int): The quantity of the dish.
+        total_for_product (Decimal): The price of the dish multiplied by the quantity.
+    """
+    def __init__(self, product: Dish, quantity: int) -> None:
+        self.product = product
+        self.quantity = quantity
+        self.total_for_product = product.price * quantity
+
+    def to_dict(self) -> dict:
+        """
+        Returns the line as a JSON-serializable dict.
+
+        Returns:
+            dict: The dish id, name, price, quantity and total of the line.
+        """
+        return {
+            'product_id': self.product.id,
+            'name': self.product.name,
+            'price': str(self.product.price),
+            'quantity': self.quantity,
+            'total_for_product': str(self.total_for_product),
+        }
+
+
+class PricedCart:
+    """
+    The cart resolved against the database with a single query.
+
+    Stale, hidden or malformed dish ids and non-positive quantities are skipped instead of raising.
+
+    Attributes:
+        lines (list): The priced cart lines in the order they were added.
+        total_amount (Decimal): The grand total of the cart.
+        items_count (int): The total number of items in the cart.
+    """
+    def __init__(self, cart: Dict[str, int]) -> None:
+        quantities = {}
+        for product_id, quantity in cart.items():
+            try:
+                product_id, quantity = int(product_id), int(quantity)
+            except (TypeError, ValueError):
+                continue
+            if quantity > 0:
+                quantities[product_id] = quantity
+
+        products = Dish.objects.filter(is_visible=True).in_bulk(quantities.keys()) if quantities else {}
+
+        self.lines: List[CartLine] = [CartLine(products[product_id], quantity)
+                                      for product_id, quantity in quantities.items() if product_id in products]
+        self.total_amount = sum((line.total_for_product for line in self.lines), Decimal('0.00'))
+        self.items_count = sum(line.quantity for line in self.lines)
+
+    def __iter__(self) -> Iterator[CartLine]:
+        """
+        Iterates over the priced cart lines.
+
+        Yields:
+            CartLine: A priced line of the cart.
+        """
+        return iter(self.lines)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of distinct dishes in the cart.
+
+        Returns:
+            int: The number of cart lines.
+        """
+        return len(self.lines)
+
+    def get_line(self, product_id) -> Optional[CartLine]:
+        """
+        Returns the line of a dish, if it is in the cart.
+
+        Args:
+            product_id: The ID of the dish.
+
+        Returns:
+            CartLine: The line of the dish, or None.
+        """
+        for line in self.lines:
+            if str(line.product.id) == str(product_id):
+                return line
+        return None
+
+    def to_dict(self) -> dict:
+        """
+        Returns the cart totals and lines as a JSON-serializable dict.
+
+        Returns:
+            dict: The items count, total amount and lines of the cart.
+        """
+        return {
+            'items_count': self.items_count,
+            'total_amount': str(self.total_amount),
+            'lines': [line.to_dict() for line in self.lines],
+        }
+
+
+def get_cart_storage(request) -> BaseCartStorage:
+    """
+    Returns the cart storage of the request, creating it from the CART_STORAGE setting on first use.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        BaseCartStorage: The cart storage of the request.
+    """
+    if not hasattr(request, 'cart_storage'):
+        request.cart_storage = import_string(settings.CART_STORAGE)(request)
+    return request.cart_storage
+
+
+def get_cart(request) -> Dict[str, int]:
+    """
+    Returns a copy of the cart of the request.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        dict: The cart mapping dish ids to quantities.
+    """
+    return dict(get_cart_storage(request).cart)
+
+
+def save_cart(request, cart: Dict[str, int]) -> None:
+    """
+    Validates and stores the cart of the request.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        cart (dict): The cart mapping dish ids to quantities.
+    """
+    get_cart_storage(request).save(cart)
+    if hasattr(request, '_priced_cart'):
+        del request._priced_cart
+
+
+def clear_cart(request) -> None:
+    """
+    Empties the cart of the request.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+    """
+    save_cart(request, {})
+
+
+def get_cart_items_count(request) -> int:
+    """
+    Returns the number of items in the cart without touching the dish table.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        int: The total quantity of items in the cart.
+    """
+    return sum(get_cart_storage(request).cart.values())
+
+
+def get_priced_cart(request) -> PricedCart:
+    """
+    Returns the priced cart for the request, computing it at most once per request.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        PricedCart: The priced cart.
+    """
+    if not hasattr(request, '_priced_cart'):
+        request._priced_cart = PricedCart(get_cart_storage(request).cart)
+    return request._priced_cart
+
+
+def add_to_cart(request, product_id: str, quantity: int = 1) -> None:
+    """
+    Adds a quantity of a dish to the cart of the request.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        product_id (str): The ID of the dish.
+        quantity (int): The quantity to add.
+    """
+    cart = get_cart(request)
+    cart[product_id] = cart.get(product_id, 0) + quantity
+    save_cart(request, cart)
+
+
+def update_cart(request, product_id: str, quantity: int) -> bool:
+    """
+    Sets the quantity of a dish that is already in the cart of the request.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        product_id (str): The ID of the dish.
+        quantity (int): The new, positive quantity.
+
+    Returns:
+        bool: True if the cart was changed, False otherwise.
+    """
+    cart = get_cart(request)
+    if product_id not in cart or quantity < 1:
+        return False
+    cart[product_id] = quantity
+    save_cart(request, cart)
+    return True
+
+
+def remove_from_cart(request, product_id: str) -> bool:
+    """
+    Removes a dish from the cart of the request.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        product_id (str): The ID of the dish.
+
+    Returns:
+        bool: True if the dish was in the cart, False otherwise.
+    """
+    cart = get_cart(request)
+    if product_id not in cart:
+        return False
+    del cart[product_id]
+    save_cart(request, cart)
+    return True
@@ -0,0 +1,242 @@
+import uuid
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.http import HttpResponse
+
+from .cache import get_shared_cache
+
+CART_SIGNING_SALT = 'coffee.cart'
+
+
+def clean_product_id(product_id) -> Optional[str]:
+    """
+    Validates a dish id posted to the cart views and brings it to the form the cart keys use.
+
+    Args:
+        product_id: The raw dish id.
+
+    Returns:
+        str: The dish id without leading zeros, or None if it is not a positive integer.
+    """
+    if not isinstance(product_id, str) or not product_id.isdecimal() or int(product_id) < 1:
+        return None
+    return str(int(product_id))
+
+
+def clean_cart(data) -> Dict[str, int]:
+    """
+    Validates raw cart data coming from a cookie, the cache or the session.
+
+    Only positive integer dish ids and positive integer quantities are kept. Quantities are capped at
+    CART_MAX_QUANTITY and the cart is capped at CART_MAX_LINES lines.
+
+    Args:
+        data: The raw cart data, normally a dict mapping dish ids to quantities.
+
+    Returns:
+        dict: The cleaned cart mapping dish ids as strings to quantities.
+    """
+    cleaned = {}
+    if not isinstance(data, dict):
+        return cleaned
+
+    for product_id, quantity in data.items():
+        if len(cleaned) >= settings.CART_MAX_LINES:
+            break
+        if not isinstance(product_id, str) or not product_id.isdigit() or int(product_id) < 1:
+            continue
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 1:
+            continue
+        cleaned[str(int(product_id))] = min(quantity, settings.CART_MAX_QUANTITY)
+    return cleaned
+
+
+class BaseCartStorage:
+    """
+    Base class for storing the shopping cart of a request.
+
+    Subclasses implement load() and store(), and may set cookies in process_response().
+
+    Attributes:
+        request (HttpRequest): The HTTP request the cart belongs to.
+        modified (bool): Indicates if the cart was saved during the request.
+    """
+    def __init__(self, request) -> None:
+        self.request = request
+        self.modified = False
+        self._cart = None
+
+    @property
+    def cart(self) -> Dict[str, int]:
+        """
+        Returns the cleaned cart, loading it on first access.
+
+        Returns:
+            dict: The cart mapping dish ids to quantities.
+        """
+        if self._cart is None:
+            self._cart = clean_cart(self.load())
+        return self._cart
+
+    def save(self, cart: Dict[str, int]) -> None:
+        """
+        Validates and stores the cart.
+
+        Args:
+            cart (dict): The cart mapping dish ids to quantities.
+        """
+        self._cart = clean_cart(cart)
+        self.modified = True
+        self.store(self._cart)
+
+    def clear(self) -> None:
+        """
+        Empties the cart.
+        """
+        self.save({})
+
+    def load(self):
+        """
+        Loads the raw cart data.
+
+        Returns:
+            The raw cart data.
+        """
+        raise NotImplementedError('Subclasses of BaseCartStorage must provide a load() method')
+
+    def store(self, cart: Dict[str, int]) -> None:
+        """
+        Persists the cleaned cart.
+
+        Args:
+            cart (dict): The cleaned cart.
+        """
+        raise NotImplementedError('Subclasses of BaseCartStorage must provide a store() method')
+
+    def process_response(self, response: HttpResponse) -> HttpResponse:
+        """
+        Updates the response after the view ran, e.g. to set cookies.
+
+        Args:
+            response (HttpResponse): The HTTP response.
+
+        Returns:
+            HttpResponse: The HTTP response.
+        """
+        return response
+
+    def set_cookie(self, response: HttpResponse, value: str) -> None:
+        """
+        Sets the cart cookie with the configured lifetime and security flags.
+
+        Args:
+            response (HttpResponse): The HTTP response.
+            value (str): The cookie value.
+        """
+        response.set_cookie(settings.CART_COOKIE_NAME, value, max_age=settings.CART_COOKIE_AGE,
+                            secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite='Lax')
+
+
+class SessionCartStorage(BaseCartStorage):
+    """
+    Cart storage keeping the cart in the session, as the shop originally did.
+    """
+    def load(self):
+        session = getattr(self.request, 'session', None)
+        return session.get('cart', {}) if session is not None else {}
+
+    def store(self, cart: Dict[str, int]) -> None:
+        if cart:
+            self.request.session['cart'] = cart
+        else:
+            self.request.session.pop('cart', None)
+
+
+class SignedCookieCartStorage(BaseCartStorage):
+    """
+    Cart storage keeping the whole cart in a compact, signed cookie, so cart changes never touch the database.
+    """
+    @staticmethod
+    def encode(cart: Dict[str, int]) -> str:
+        """
+        Signs and compresses the cart into a cookie value.
+
+        Args:
+            cart (dict): The cleaned cart.
+
+        Returns:
+            str: The cookie value.
+        """
+        return signing.dumps(cart, salt=CART_SIGNING_SALT, compress=True)
+
+    def load(self):
+        value = self.request.COOKIES.get(settings.CART_COOKIE_NAME)
+        if not value:
+            return {}
+        try:
+            return signing.loads(value, salt=CART_SIGNING_SALT, max_age=settings.CART_COOKIE_AGE)
+        except signing.BadSignature:
+            return {}
+
+    def store(self, cart: Dict[str, int]) -> None:
+        pass
+
+    def process_response(self, response: HttpResponse) -> HttpResponse:
+        if self.modified:
+            if self.cart:
+                self.set_cookie(response, self.encode(self.cart))
+            else:
+                response.delete_cookie(settings.CART_COOKIE_NAME, samesite='Lax')
+        return response
+
+
+class CacheCartStorage(BaseCartStorage):
+    """
+    Cart storage keeping the cart in a shared cache under a random id stored in a cookie.
+
+    The cache is the CART_CACHE_ALIAS cache, which must be shared by all workers, so the cart survives restarts and
+    does not depend on the worker answering the request. Use Redis: the database cache also works, but then every
+    cart change is still a few database statements.
+    """
+    def __init__(self, request) -> None:
+        super().__init__(request)
+        self.cache = get_shared_cache(settings.CART_CACHE_ALIAS)
+        self.cart_id: Optional[str] = request.COOKIES.get(settings.CART_COOKIE_NAME)
+        if self.cart_id is not None:
+            try:
+                self.cart_id = uuid.UUID(self.cart_id).hex
+            except ValueError:
+                self.cart_id = None
+
+    def get_cache_key(self) -> str:
+        """
+        Returns the cache key of the cart.
+
+        Returns:
+            str: The cache key.
+        """
+        return f'coffee:cart:{self.cart_id}'
+
+    def load(self):
+        if self.cart_id is None:
+            return {}
+        return self.cache.get(self.get_cache_key(), {})
+
+    def store(self, cart: Dict[str, int]) -> None:
+        if not cart:
+            if self.cart_id is not None:
+                self.cache.delete(self.get_cache_key())
+            return
+        if self.cart_id is None:
+            self.cart_id = uuid.uuid4().hex
+        self.cache.set(self.get_cache_key(), cart, settings.CART_COOKIE_AGE)
+
+    def process_response(self, response: HttpResponse) -> HttpResponse:
+        if self.modified:
+            if self.cart:
+                self.set_cookie(response, self.cart_id)
+            else:
+                response.delete_cookie(settings.CART_COOKIE_NAME, samesite='Lax')
+        return response
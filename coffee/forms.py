@@ -1,5 +1,6 @@
 from django import forms
-from .models import Reservation, UserData
+from django.conf import settings
+from .models import Reservation, ReservationSlot, UserData
 
 
 class ReservationForm(forms.ModelForm):
@@ -54,6 +55,24 @@ class ReservationForm(forms.ModelForm):
         model = Reservation
         fields = ('name', 'last_name', 'date', 'time', 'phone', 'message')
 
+    def clean_time(self):
+        """
+        Checks that the reservation time falls within the opening hours.
+
+        Returns:
+            time: The cleaned reservation time.
+
+        Raises:
+            forms.ValidationError: If the cafe is closed at the chosen time.
+        """
+        value = self.cleaned_data['time']
+        day_slots = ReservationSlot.get_day_slots()
+        if ReservationSlot.get_slot_time(value) not in day_slots:
+            raise forms.ValidationError('Please choose a time between %(opening)s and %(closing)s.',
+                                        params={'opening': settings.RESERVATION_OPENING_TIME,
+                                                'closing': settings.RESERVATION_CLOSING_TIME})
+        return value
+
 
 class BillingDetailsForm(forms.ModelForm):
     """
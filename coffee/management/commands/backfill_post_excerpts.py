@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from coffee.models import Post
+
+
+class Command(BaseCommand):
+    """
+    Management command that computes the stored plain-text excerpt of existing posts.
+    """
+    help = 'Computes the stored plain-text excerpt of existing blog posts.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of posts to update per query.')
+
+    def handle(self, *args, **options) -> None:
+        batch_size = options['batch_size']
+        batch = []
+        updated = 0
+
+        for post in Post.objects.only('id', 'content', 'excerpt').iterator(chunk_size=batch_size):
+            excerpt = Post.make_excerpt(post.content)
+            if excerpt != post.excerpt:
+                post.excerpt = excerpt
+                batch.append(post)
+            if len(batch) >= batch_size:
+                updated += Post.objects.bulk_update(batch, ['excerpt'])
+                batch = []
+        if batch:
+            updated += Post.objects.bulk_update(batch, ['excerpt'])
+
+        self.stdout.write(self.style.SUCCESS(f'Updated the excerpt of {updated} posts.'))
@@ -0,0 +1,377 @@
+import datetime
+import math
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Iterator, List
+
+from django.conf import settings
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.text import slugify
+
+from coffee.cache import invalidate_menu, invalidate_recent_posts
+from coffee.models import Comment, Dish, DishCategory, Order, OrderDishesList, Post, PostCategory, PostImage, \
+    Reservation, ReservationSlot, Tag, UserData
+
+# The number of rows of every table at scale 1. The menu and the blog taxonomy grow with the square root of the
+# scale, everything written by visitors grows linearly. At scale 1000 the orders have about a million lines.
+BASE_COUNTS = {
+    'users': 20,
+    'dish_categories': 6,
+    'dishes': 48,
+    'post_categories': 5,
+    'tags': 24,
+    'posts': 40,
+    'comments': 240,
+    'reservations': 300,
+    'orders': 250,
+}
+CATALOG_TABLES = ('dish_categories', 'dishes', 'post_categories', 'tags')
+
+MAX_ORDER_LINES = 7
+MAX_POST_IMAGES = 3
+MAX_COMMENT_DEPTH = 3
+REPLY_RATE = 0.4
+HISTORY_DAYS = 365
+
+FIRST_NAMES = ('Olena', 'Andrii', 'Maria', 'Taras', 'Iryna', 'Dmytro', 'Sofia', 'Oleh', 'Anna', 'Yurii', 'Kateryna',
+               'Mykola', 'Daria', 'Serhii', 'Viktoria', 'Bohdan')
+LAST_NAMES = ('Shevchenko', 'Kovalenko', 'Bondarenko', 'Tkachenko', 'Kravchenko', 'Melnyk', 'Oliinyk', 'Lysenko',
+              'Moroz', 'Savchenko', 'Rudenko', 'Marchenko')
+STREETS = ('Khreshchatyk', 'Sahaidachnoho', 'Velyka Vasylkivska', 'Yaroslaviv Val', 'Pushkinska', 'Lva Tolstoho')
+DISH_ADJECTIVES = ('Iced', 'Hot', 'Spiced', 'Vanilla', 'Caramel', 'Honey', 'Smoked', 'Double', 'Creamy', 'Hazelnut',
+                   'Coconut', 'Cherry', 'Salted', 'Cinnamon')
+DISH_NOUNS = ('Latte', 'Espresso', 'Cappuccino', 'Flat White', 'Mocha', 'Cold Brew', 'Croissant', 'Cheesecake',
+              'Brownie', 'Muffin', 'Pancakes', 'Sandwich', 'Tea', 'Lemonade')
+CATEGORY_NAMES = ('Coffee', 'Tea', 'Desserts', 'Breakfast', 'Drinks', 'Bakery', 'Salads', 'Soups')
+TOPICS = ('brewing', 'roasting', 'beans', 'milk', 'recipes', 'events', 'baristas', 'origins', 'equipment', 'seasons')
+WORDS = ('coffee', 'cup', 'aroma', 'roast', 'bean', 'morning', 'grinder', 'milk', 'foam', 'sweet', 'bitter',
+         'origin', 'farm', 'harvest', 'water', 'temperature', 'extraction', 'crema', 'kettle', 'filter', 'friends',
+         'table', 'window', 'rain', 'city', 'menu', 'season', 'taste', 'balance', 'acidity', 'chocolate', 'fruit')
+
+
+@contextmanager
+def explicit_timestamps(model) -> Iterator[None]:
+    """
+    Lets the auto_now and auto_now_add fields of a model keep the values set on the instances.
+
+    Args:
+        model (Model): The model class.
+    """
+    fields = [field for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    """
+    Management command that fills the database with realistic synthetic data for benchmarks and index work.
+
+    Rows are inserted with bulk_create in batches, so no signals run: no emails are queued, no events are published
+    and no metrics are counted. The cached menu and recent posts are invalidated at the end instead.
+
+    All dates are relative to --now, the current time by default. The same seed, scale, --now and starting database
+    always give the same data.
+    """
+    help = 'Generates synthetic menu, blog, reservation and order data at the given scale.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--scale', type=float, default=1,
+                            help='Scale factor, from 1 (about a thousand order lines) to 1000 (about a million).')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Seed of the random generator.')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of rows inserted per query.')
+        parser.add_argument('--now', default=None,
+                            help='The moment the data is generated at, as an ISO date or date and time. '
+                                 'Defaults to the current time.')
+
+    def handle(self, *args, **options) -> None:
+        if options['scale'] <= 0:
+            raise CommandError('The scale must be positive.')
+        if options['batch_size'] <= 0:
+            raise CommandError('The batch size must be positive.')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = self.parse_now(options['now'])
+        self.counts = {
+            table: max(1, round(count * (math.sqrt(options['scale']) if table in CATALOG_TABLES
+                                         else options['scale'])))
+            for table, count in BASE_COUNTS.items()
+        }
+
+        start = time.perf_counter()
+        with transaction.atomic():
+            users = self.generate_users()
+            dishes = self.generate_menu()
+            posts = self.generate_blog(users)
+            self.generate_comments(posts)
+            self.generate_reservations()
+            lines = self.generate_orders(users, dishes)
+        invalidate_menu()
+        invalidate_recent_posts()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(users)} users, {len(dishes)} dishes, {len(posts)} posts, "
+            f"{self.counts['reservations']} reservations and {self.counts['orders']} orders with {lines} lines "
+            f"in {time.perf_counter() - start:.1f} s."
+        ))
+
+    @staticmethod
+    def parse_now(value) -> datetime.datetime:
+        """
+        Parses the --now option.
+
+        Args:
+            value (str): The ISO date or date and time, or None for the current time.
+
+        Returns:
+            datetime: The moment, timezone aware and without microseconds.
+
+        Raises:
+            CommandError: If the value is not a valid date or date and time.
+        """
+        if value is None:
+            return timezone.now().replace(microsecond=0)
+        try:
+            now = parse_datetime(value)
+            if now is None:
+                date = parse_date(value)
+                now = datetime.datetime.combine(date, datetime.time()) if date else None
+        except ValueError:
+            now = None
+        if now is None:
+            raise CommandError(f'Invalid --now value: {value}. Use an ISO date or date and time.')
+        if timezone.is_naive(now):
+            now = timezone.make_aware(now)
+        return now.replace(microsecond=0)
+
+    def bulk_create(self, model, objects: list) -> list:
+        """
+        Inserts objects in batches.
+
+        Args:
+            model (Model): The model class.
+            objects (list): The unsaved objects.
+
+        Returns:
+            list: The saved objects, with their primary keys.
+        """
+        return model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def random_datetime(self, days: int = HISTORY_DAYS) -> datetime.datetime:
+        """
+        Returns a random moment of the last days.
+
+        Args:
+            days (int): The number of days to pick from.
+
+        Returns:
+            datetime: The moment, timezone aware.
+        """
+        return self.now - datetime.timedelta(seconds=self.rng.randrange(days * 24 * 60 * 60))
+
+    def random_text(self, words: int) -> str:
+        """
+        Returns a sentence of random words.
+
+        Args:
+            words (int): The number of words.
+
+        Returns:
+            str: The sentence.
+        """
+        return ' '.join(self.rng.choices(WORDS, k=words)).capitalize() + '.'
+
+    def random_phone(self) -> str:
+        """
+        Returns a random Ukrainian phone number.
+        """
+        return f'+380{self.rng.randrange(10 ** 9):09d}'
+
+    def generate_users(self) -> List[User]:
+        """
+        Generates customers and blog authors, all without a usable password.
+        """
+        offset = User.objects.count()
+        users = []
+        for number in range(offset, offset + self.counts['users']):
+            first_name, last_name = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+            users.append(User(username=f'guest{number}', first_name=first_name, last_name=last_name,
+                              email=f'guest{number}@example.com', password=f'{UNUSABLE_PASSWORD_PREFIX}generated',
+                              date_joined=self.random_datetime()))
+        return self.bulk_create(User, users)
+
+    def generate_menu(self) -> List[Dish]:
+        """
+        Generates the dish categories and the dishes.
+        """
+        offset = DishCategory.objects.count()
+        categories = self.bulk_create(DishCategory, [
+            DishCategory(name=f'{CATEGORY_NAMES[number % len(CATEGORY_NAMES)]} {number}', order=number % 1000,
+                         is_visible=self.rng.random() < 0.9)
+            for number in range(offset, offset + self.counts['dish_categories'])
+        ])
+
+        offset = Dish.objects.count()
+        dishes = []
+        for number in range(offset, offset + self.counts['dishes']):
+            name = f'{self.rng.choice(DISH_ADJECTIVES)} {self.rng.choice(DISH_NOUNS)} {number}'
+            dishes.append(Dish(name=name, slug=slugify(name), description=self.random_text(self.rng.randint(8, 30)),
+                               price=Decimal(self.rng.randrange(300, 25000)) / 100, is_visible=self.rng.random() < 0.9,
+                               order=number % 1000, category=self.rng.choice(categories)))
+        return self.bulk_create(Dish, dishes)
+
+    def generate_blog(self, users: List[User]) -> List[Post]:
+        """
+        Generates the post categories, the tags and the posts with their tags and images.
+        """
+        offset = PostCategory.objects.count()
+        categories = self.bulk_create(PostCategory, [
+            PostCategory(name=f'{TOPICS[number % len(TOPICS)].capitalize()} {number}')
+            for number in range(offset, offset + self.counts['post_categories'])
+        ])
+        offset = Tag.objects.count()
+        tags = self.bulk_create(Tag, [
+            Tag(tag_name=f'{TOPICS[number % len(TOPICS)]}-{number}')
+            for number in range(offset, offset + self.counts['tags'])
+        ])
+
+        offset = Post.objects.count()
+        posts = []
+        for number in range(offset, offset + self.counts['posts']):
+            content = ''.join(f'<p>{self.random_text(self.rng.randint(20, 80))}</p>'
+                              for _ in range(self.rng.randint(2, 8)))
+            posts.append(Post(title=f'{self.random_text(self.rng.randint(3, 8))[:-1]} {number}', content=content,
+                              excerpt=Post.make_excerpt(content), date_posted=self.random_datetime(),
+                              author=self.rng.choice(users), is_visible=self.rng.random() < 0.95,
+                              category=self.rng.choice(categories)))
+        with explicit_timestamps(Post):
+            posts = self.bulk_create(Post, posts)
+
+        self.bulk_create(Post.tags.through, [
+            Post.tags.through(post=post, tag=tag)
+            for post in posts for tag in self.rng.sample(tags, min(len(tags), self.rng.randint(0, 4)))
+        ])
+        self.bulk_create(PostImage, [
+            PostImage(post=post, post_image=f'post_images/generated_{post.pk}_{number}.jpg')
+            for post in posts for number in range(self.rng.randint(0, MAX_POST_IMAGES))
+        ])
+        return posts
+
+    def generate_comments(self, posts: List[Post]) -> None:
+        """
+        Generates comment threads, one level at a time so the replies can point at the saved parents.
+        """
+        remaining = self.counts['comments']
+        parents = [None]
+        for depth in range(MAX_COMMENT_DEPTH + 1):
+            if not remaining or not parents:
+                break
+            count = remaining if depth == MAX_COMMENT_DEPTH else round(remaining * (1 - REPLY_RATE))
+            comments = []
+            for _ in range(max(1, count)):
+                parent = self.rng.choice(parents)
+                post = parent.post if parent else self.rng.choice(posts)
+                earliest = parent.date_posted if parent else post.date_posted
+                seconds = max(1, int((self.now - earliest).total_seconds()))
+                first_name = self.rng.choice(FIRST_NAMES)
+                comments.append(Comment(post=post, parent=parent, content=self.random_text(self.rng.randint(5, 40)),
+                                        author=first_name, email=f'{first_name.lower()}@example.com',
+                                        date_posted=earliest + datetime.timedelta(seconds=self.rng.randrange(seconds))))
+            with explicit_timestamps(Comment):
+                parents = self.bulk_create(Comment, comments)
+            remaining -= len(comments)
+
+    def generate_reservations(self) -> None:
+        """
+        Generates reservations around today without overbooking any slot, then rebuilds the slot index.
+        """
+        day_slots = ReservationSlot.get_day_slots()
+        capacity = settings.RESERVATION_SLOT_CAPACITY
+        days = max(30, math.ceil(self.counts['reservations'] * 2 / (len(day_slots) * capacity)))
+        first_day = self.now.date() - datetime.timedelta(days=days - days // 6)
+        booked = {
+            (slot.date, slot.time): slot.booked
+            for slot in ReservationSlot.objects.filter(date__gte=first_day,
+                                                       date__lt=first_day + datetime.timedelta(days=days))
+        }
+
+        today = self.now.date()
+        reservations = []
+        while len(reservations) < self.counts['reservations']:
+            slot_key = (first_day + datetime.timedelta(days=self.rng.randrange(days)), self.rng.choice(day_slots))
+            if booked.get(slot_key, 0) >= capacity:
+                continue
+            booked[slot_key] = booked.get(slot_key, 0) + 1
+            created_at = timezone.make_aware(datetime.datetime.combine(slot_key[0], slot_key[1])) \
+                - datetime.timedelta(hours=self.rng.randint(1, 24 * 14))
+            reservations.append(Reservation(
+                name=self.rng.choice(FIRST_NAMES), last_name=self.rng.choice(LAST_NAMES), date=slot_key[0],
+                time=slot_key[1], phone=self.random_phone(),
+                message=self.random_text(self.rng.randint(3, 15)) if self.rng.random() < 0.3 else '',
+                is_precessed=slot_key[0] < today or self.rng.random() < 0.5,
+                created_at=min(created_at, self.now), updated_at=min(created_at, self.now),
+            ))
+        with explicit_timestamps(Reservation):
+            self.bulk_create(Reservation, reservations)
+        call_command('rebuild_reservation_slots', stdout=self.stdout)
+
+    def generate_orders(self, users: List[User], dishes: List[Dish]) -> int:
+        """
+        Generates orders with their customer data and lines, one batch of orders at a time to bound the memory.
+
+        Returns:
+            int: The number of order lines.
+        """
+        closed_statuses = (Order.STATUS_COMPLETED,) * 9 + (Order.STATUS_CANCELLED,)
+        lines = 0
+        for batch_start in range(0, self.counts['orders'], self.batch_size):
+            orders = []
+            for _ in range(min(self.batch_size, self.counts['orders'] - batch_start)):
+                ordered_at = self.random_datetime()
+                recent = self.now - ordered_at < datetime.timedelta(days=1)
+                orders.append(Order(
+                    order_id=uuid.UUID(int=self.rng.getrandbits(128), version=4),
+                    order_date=ordered_at.date(), order_time=ordered_at.time(),
+                    order_status=self.rng.choice(Order.OPEN_STATUSES if recent else closed_statuses),
+                ))
+            with explicit_timestamps(Order):
+                orders = self.bulk_create(Order, orders)
+
+            user_data = []
+            for order in orders:
+                user = self.rng.choice(users) if self.rng.random() < 0.4 else None
+                first_name = user.first_name if user else self.rng.choice(FIRST_NAMES)
+                last_name = user.last_name if user else self.rng.choice(LAST_NAMES)
+                user_data.append(UserData(
+                    user=user, order=order, first_name=first_name, last_name=last_name,
+                    street_name=self.rng.choice(STREETS), house_number=str(self.rng.randint(1, 150)),
+                    phone=self.random_phone(), email_address=f'{first_name.lower()}.{last_name.lower()}@example.com',
+                    is_completed=order.order_status == Order.STATUS_COMPLETED,
+                ))
+            user_data = self.bulk_create(UserData, user_data)
+
+            order_lines = []
+            for order, data in zip(orders, user_data):
+                for dish in self.rng.sample(dishes, min(len(dishes), self.rng.randint(1, MAX_ORDER_LINES))):
+                    order_lines.append(OrderDishesList(order=order, user_data=data, dish=dish, price=dish.price,
+                                                       quantity=self.rng.choices((1, 2, 3), (6, 3, 1))[0]))
+            self.bulk_create(OrderDishesList, order_lines)
+            lines += len(order_lines)
+        return lines
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from coffee.models import Dish, PostImage, Gallery
+from coffee.renditions import update_renditions
+
+
+class Command(BaseCommand):
+    """
+    Management command that generates and records the resized renditions of existing dish, post and gallery images.
+    """
+    help = 'Generates and records the resized WebP renditions of existing dish, post and gallery images.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--force', action='store_true',
+                            help='Regenerate renditions that already exist.')
+
+    def handle(self, *args, **options) -> None:
+        generated = 0
+        for model in (Dish, PostImage, Gallery):
+            queryset = model.objects.only('id', model.IMAGE_FIELD, 'renditions')
+            for instance in queryset.iterator():
+                generated += len(update_renditions(instance, model.IMAGE_FIELD, force=options['force']))
+
+        self.stdout.write(self.style.SUCCESS(f'Generated {generated} renditions.'))
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from coffee.models import Reservation, ReservationSlot
+
+
+class Command(BaseCommand):
+    """
+    Management command that rebuilds the reservation availability index from the existing reservations.
+    """
+    help = 'Recounts the booked places of every reservation time slot.'
+
+    @transaction.atomic
+    def handle(self, *args, **options) -> None:
+        booked = {}
+        for row in Reservation.objects.order_by().values('date', 'time').annotate(count=Count('id')):
+            slot_key = (row['date'], ReservationSlot.get_slot_time(row['time']))
+            booked[slot_key] = booked.get(slot_key, 0) + row['count']
+
+        slots = {(slot.date, slot.time): slot for slot in ReservationSlot.objects.all()}
+        for slot_key, slot in slots.items():
+            slot.booked = booked.pop(slot_key, 0)
+        ReservationSlot.objects.bulk_update(slots.values(), ['booked'])
+        ReservationSlot.objects.bulk_create([
+            ReservationSlot(date=date, time=slot_time, capacity=settings.RESERVATION_SLOT_CAPACITY, booked=count)
+            for (date, slot_time), count in booked.items()
+        ])
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(slots) + len(booked)} reservation slots.'))
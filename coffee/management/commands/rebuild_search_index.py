@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from coffee.search import install_search_index
+
+
+class Command(BaseCommand):
+    """
+    Management command that recreates the full-text search index of posts and dishes.
+
+    SQLite drops the FTS5 triggers when a migration rebuilds the post or dish table, so run it after such
+    migrations. On PostgreSQL it is safe to run at any time.
+    """
+    help = 'Recreates and refills the full-text search index of posts and dishes.'
+
+    def handle(self, *args, **options) -> None:
+        install_search_index(connection)
+
+        self.stdout.write(self.style.SUCCESS('Rebuilt the search index.'))
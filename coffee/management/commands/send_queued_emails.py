@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from coffee.outbox import send_queued_emails
+
+
+class Command(BaseCommand):
+    """
+    Management command that delivers the emails queued in the outbox.
+    """
+    help = 'Sends the queued emails from the outbox, retrying failed ones with backoff.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE,
+                            help='Number of emails to send over one connection.')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and poll the outbox instead of exiting when it is empty.')
+        parser.add_argument('--interval', type=float, default=10,
+                            help='Seconds to wait between polls of an empty outbox in loop mode.')
+
+    def handle(self, *args, **options) -> None:
+        batch_size = options['batch_size']
+        total_sent = total_failed = 0
+
+        while True:
+            sent, failed = send_queued_emails(batch_size)
+            total_sent += sent
+            total_failed += failed
+            if sent + failed:
+                self.stdout.write(f'Sent {sent} emails, {failed} failed.')
+            if sent + failed < batch_size:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Sent {total_sent} emails, {total_failed} failed.'))
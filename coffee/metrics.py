@@ -0,0 +1,56 @@
+from django.conf import settings
+from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest
+from prometheus_client.multiprocess import MultiProcessCollector
+
+# The metrics are written to PROMETHEUS_MULTIPROC_DIR when it is set before the first import of prometheus_client,
+# so every gunicorn worker of the dyno shares them and one scrape sees the whole dyno.
+
+REQUEST_LATENCY = Histogram(
+    'cafe_request_duration_seconds', 'Time to answer a request, by URL name.', ['url_name', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_QUERIES = Histogram(
+    'cafe_request_queries', 'SQL queries run to answer a request, by URL name.', ['url_name'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55),
+)
+CART_SIZE = Histogram(
+    'cafe_checkout_cart_items', 'Items in the cart of placed orders.',
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34),
+)
+CHECKOUT_DURATION = Histogram(
+    'cafe_checkout_duration_seconds', 'Time to place an order.',
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+ORDERS_CREATED = Counter('cafe_orders_created', 'Orders placed.')
+RESERVATIONS_CREATED = Counter('cafe_reservations_created', 'Table reservations made.')
+COMMENTS_CREATED = Counter('cafe_comments_created', 'Blog comments posted.')
+
+
+def observe_request(url_name, method: str, duration: float, queries) -> None:
+    """
+    Records the latency and the query count of a request.
+
+    Args:
+        url_name (str): The resolved URL name, or None for unresolved URLs.
+        method (str): The HTTP method.
+        duration (float): The time to answer the request, in seconds.
+        queries (int): The number of SQL queries, or None if they were not recorded.
+    """
+    url_name = url_name or 'unresolved'
+    REQUEST_LATENCY.labels(url_name, method).observe(duration)
+    if queries is not None:
+        REQUEST_QUERIES.labels(url_name).observe(queries)
+
+
+def render_metrics() -> bytes:
+    """
+    Renders the metrics of all processes of the dyno, or of this process without a shared directory.
+
+    Returns:
+        bytes: The metrics in the Prometheus text format.
+    """
+    if settings.METRICS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry, path=settings.METRICS_MULTIPROC_DIR)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
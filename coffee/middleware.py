@@ -0,0 +1,15 @@
+from django.http import HttpRequest, HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+
+
+class CartMiddleware(MiddlewareMixin):
+    """
+    Middleware that lets the cart storage of the request update the response, e.g. to set the cart cookie.
+
+    It is based on MiddlewareMixin so that it supports both WSGI and ASGI without adapting the request.
+    """
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        cart_storage = getattr(request, 'cart_storage', None)
+        if cart_storage is not None:
+            response = cart_storage.process_response(response)
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-17 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coffee', '0008_reservationslot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('is_precessed', False)), fields=['date', 'time', 'id'], name='coffee_reservation_pending_idx'),
+        ),
+    ]
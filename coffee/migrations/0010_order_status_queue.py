@@ -0,0 +1,40 @@
+# Generated by Django 5.0 on 2026-10-17 21:08
+
+from django.db import migrations, models
+from django.db.models.functions import Length, Lower, Substr
+
+
+STATUSES = ('pending', 'preparing', 'ready', 'completed', 'cancelled')
+
+
+def normalize_statuses(apps, schema_editor):
+    """
+    Lowercases the free-form statuses written so far, e.g. 'Pending', so they match the status choices.
+
+    Runs before the column is shortened, and cuts any other status to the new length so the change cannot fail.
+    """
+    Order = apps.get_model('coffee', 'Order')
+    Order.objects.annotate(status=Lower('order_status')).filter(status__in=STATUSES).exclude(
+        order_status__in=STATUSES).update(order_status=Lower('order_status'))
+    Order.objects.annotate(length=Length('order_status')).filter(length__gt=20).update(
+        order_status=Substr('order_status', 1, 20))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coffee', '0009_reservation_pending_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_statuses, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='order',
+            name='order_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('preparing', 'Preparing'), ('ready', 'Ready'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['order_status', 'order_date', 'order_time'], name='coffee_order_queue_idx'),
+        ),
+    ]
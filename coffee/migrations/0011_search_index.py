@@ -0,0 +1,93 @@
+# Generated by Django 5.0 on 2026-10-17 21:40
+
+from django.db import migrations
+
+# The full-text search index as coffee.search.install_search_index() created it at the time of this migration.
+POSTGRESQL_INSTALL = (
+    'ALTER TABLE coffee_post ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    "CREATE OR REPLACE FUNCTION coffee_post_search_vector() RETURNS trigger AS $$ BEGIN NEW.search_vector := "
+    "setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(NEW.content, '')), 'B'); RETURN NEW; END $$ LANGUAGE plpgsql",
+    'DROP TRIGGER IF EXISTS coffee_post_search_vector ON coffee_post',
+    'CREATE TRIGGER coffee_post_search_vector BEFORE INSERT OR UPDATE OF title, content ON coffee_post '
+    'FOR EACH ROW EXECUTE FUNCTION coffee_post_search_vector()',
+    'UPDATE coffee_post SET title = title',
+    'CREATE INDEX IF NOT EXISTS coffee_post_search_idx ON coffee_post USING GIN (search_vector)',
+    'ALTER TABLE coffee_dish ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    "CREATE OR REPLACE FUNCTION coffee_dish_search_vector() RETURNS trigger AS $$ BEGIN NEW.search_vector := "
+    "setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B'); RETURN NEW; END $$ LANGUAGE plpgsql",
+    'DROP TRIGGER IF EXISTS coffee_dish_search_vector ON coffee_dish',
+    'CREATE TRIGGER coffee_dish_search_vector BEFORE INSERT OR UPDATE OF name, description ON coffee_dish '
+    'FOR EACH ROW EXECUTE FUNCTION coffee_dish_search_vector()',
+    'UPDATE coffee_dish SET name = name',
+    'CREATE INDEX IF NOT EXISTS coffee_dish_search_idx ON coffee_dish USING GIN (search_vector)',
+)
+
+POSTGRESQL_UNINSTALL = (
+    'DROP TRIGGER IF EXISTS coffee_post_search_vector ON coffee_post',
+    'DROP FUNCTION IF EXISTS coffee_post_search_vector()',
+    'ALTER TABLE coffee_post DROP COLUMN IF EXISTS search_vector',
+    'DROP TRIGGER IF EXISTS coffee_dish_search_vector ON coffee_dish',
+    'DROP FUNCTION IF EXISTS coffee_dish_search_vector()',
+    'ALTER TABLE coffee_dish DROP COLUMN IF EXISTS search_vector',
+)
+
+SQLITE_INSTALL = (
+    'DROP TABLE IF EXISTS coffee_post_fts',
+    "CREATE VIRTUAL TABLE coffee_post_fts USING fts5(title, content, tokenize='porter unicode61')",
+    'CREATE TRIGGER IF NOT EXISTS coffee_post_fts_insert AFTER INSERT ON coffee_post BEGIN '
+    'INSERT INTO coffee_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END',
+    'CREATE TRIGGER IF NOT EXISTS coffee_post_fts_update AFTER UPDATE ON coffee_post BEGIN '
+    'DELETE FROM coffee_post_fts WHERE rowid = old.id; '
+    'INSERT INTO coffee_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END',
+    'CREATE TRIGGER IF NOT EXISTS coffee_post_fts_delete AFTER DELETE ON coffee_post BEGIN '
+    'DELETE FROM coffee_post_fts WHERE rowid = old.id; END',
+    'INSERT INTO coffee_post_fts(rowid, title, content) SELECT id, title, content FROM coffee_post',
+    'DROP TABLE IF EXISTS coffee_dish_fts',
+    "CREATE VIRTUAL TABLE coffee_dish_fts USING fts5(name, description, tokenize='porter unicode61')",
+    'CREATE TRIGGER IF NOT EXISTS coffee_dish_fts_insert AFTER INSERT ON coffee_dish BEGIN '
+    'INSERT INTO coffee_dish_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END',
+    'CREATE TRIGGER IF NOT EXISTS coffee_dish_fts_update AFTER UPDATE ON coffee_dish BEGIN '
+    'DELETE FROM coffee_dish_fts WHERE rowid = old.id; '
+    'INSERT INTO coffee_dish_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END',
+    'CREATE TRIGGER IF NOT EXISTS coffee_dish_fts_delete AFTER DELETE ON coffee_dish BEGIN '
+    'DELETE FROM coffee_dish_fts WHERE rowid = old.id; END',
+    'INSERT INTO coffee_dish_fts(rowid, name, description) SELECT id, name, description FROM coffee_dish',
+)
+
+SQLITE_UNINSTALL = (
+    'DROP TRIGGER IF EXISTS coffee_post_fts_insert',
+    'DROP TRIGGER IF EXISTS coffee_post_fts_update',
+    'DROP TRIGGER IF EXISTS coffee_post_fts_delete',
+    'DROP TABLE IF EXISTS coffee_post_fts',
+    'DROP TRIGGER IF EXISTS coffee_dish_fts_insert',
+    'DROP TRIGGER IF EXISTS coffee_dish_fts_update',
+    'DROP TRIGGER IF EXISTS coffee_dish_fts_delete',
+    'DROP TABLE IF EXISTS coffee_dish_fts',
+)
+
+
+def execute(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for sql in statements.get(schema_editor.connection.vendor, ()):
+            cursor.execute(sql)
+
+
+def install(apps, schema_editor):
+    execute(schema_editor, {'postgresql': POSTGRESQL_INSTALL, 'sqlite': SQLITE_INSTALL})
+
+
+def uninstall(apps, schema_editor):
+    execute(schema_editor, {'postgresql': POSTGRESQL_UNINSTALL, 'sqlite': SQLITE_UNINSTALL})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coffee', '0010_order_status_queue'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0 on 2026-10-17 21:36
+
+from django.db import migrations, models
+
+# Adding a column with a default rebuilds the table on SQLite, which drops the triggers keeping the full-text
+# search table of the dishes up to date.
+SQLITE_DISH_SEARCH_TRIGGERS = (
+    'CREATE TRIGGER IF NOT EXISTS coffee_dish_fts_insert AFTER INSERT ON coffee_dish BEGIN '
+    'INSERT INTO coffee_dish_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END',
+    'CREATE TRIGGER IF NOT EXISTS coffee_dish_fts_update AFTER UPDATE ON coffee_dish BEGIN '
+    'DELETE FROM coffee_dish_fts WHERE rowid = old.id; '
+    'INSERT INTO coffee_dish_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END',
+    'CREATE TRIGGER IF NOT EXISTS coffee_dish_fts_delete AFTER DELETE ON coffee_dish BEGIN '
+    'DELETE FROM coffee_dish_fts WHERE rowid = old.id; END',
+)
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            for sql in SQLITE_DISH_SEARCH_TRIGGERS:
+                cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coffee', '0011_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='dish',
+            name='renditions',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='gallery',
+            name='renditions',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='postimage',
+            name='renditions',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.0 on 2026-10-17 23:10
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+# Reindexes the post content without its HTML tags on SQLite. PostgreSQL already skips the tags.
+SQLITE_POST_SEARCH = (
+    'DROP TRIGGER IF EXISTS coffee_post_fts_insert',
+    'DROP TRIGGER IF EXISTS coffee_post_fts_update',
+    'DROP TRIGGER IF EXISTS coffee_post_fts_delete',
+    'DROP TABLE IF EXISTS coffee_post_fts',
+    "CREATE VIRTUAL TABLE coffee_post_fts USING fts5(title, content, tokenize='porter unicode61')",
+    'CREATE TRIGGER coffee_post_fts_insert AFTER INSERT ON coffee_post BEGIN '
+    'INSERT INTO coffee_post_fts(rowid, title, content) VALUES (new.id, new.title, strip_tags(new.content)); END',
+    'CREATE TRIGGER coffee_post_fts_update AFTER UPDATE ON coffee_post BEGIN '
+    'DELETE FROM coffee_post_fts WHERE rowid = old.id; '
+    'INSERT INTO coffee_post_fts(rowid, title, content) VALUES (new.id, new.title, strip_tags(new.content)); END',
+    'CREATE TRIGGER coffee_post_fts_delete AFTER DELETE ON coffee_post BEGIN '
+    'DELETE FROM coffee_post_fts WHERE rowid = old.id; END',
+    'INSERT INTO coffee_post_fts(rowid, title, content) SELECT id, title, strip_tags(content) FROM coffee_post',
+)
+
+SQLITE_POST_SEARCH_HTML = (
+    'DROP TRIGGER IF EXISTS coffee_post_fts_insert',
+    'DROP TRIGGER IF EXISTS coffee_post_fts_update',
+    'DROP TRIGGER IF EXISTS coffee_post_fts_delete',
+    'DROP TABLE IF EXISTS coffee_post_fts',
+    "CREATE VIRTUAL TABLE coffee_post_fts USING fts5(title, content, tokenize='porter unicode61')",
+    'CREATE TRIGGER coffee_post_fts_insert AFTER INSERT ON coffee_post BEGIN '
+    'INSERT INTO coffee_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END',
+    'CREATE TRIGGER coffee_post_fts_update AFTER UPDATE ON coffee_post BEGIN '
+    'DELETE FROM coffee_post_fts WHERE rowid = old.id; '
+    'INSERT INTO coffee_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END',
+    'CREATE TRIGGER coffee_post_fts_delete AFTER DELETE ON coffee_post BEGIN '
+    'DELETE FROM coffee_post_fts WHERE rowid = old.id; END',
+    'INSERT INTO coffee_post_fts(rowid, title, content) SELECT id, title, content FROM coffee_post',
+)
+
+
+def execute(schema_editor, statements):
+    if schema_editor.connection.vendor == 'sqlite':
+        # Normally registered on every connection by coffee.signals, repeated here so the migration stands alone.
+        schema_editor.connection.ensure_connection()
+        schema_editor.connection.connection.create_function(
+            'strip_tags', 1, lambda value: strip_tags(value) if value is not None else None, deterministic=True)
+        with schema_editor.connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def strip_post_tags(apps, schema_editor):
+    execute(schema_editor, SQLITE_POST_SEARCH)
+
+
+def keep_post_tags(apps, schema_editor):
+    execute(schema_editor, SQLITE_POST_SEARCH_HTML)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coffee', '0013_outgoingemail_sending'),
+    ]
+
+    operations = [
+        migrations.RunPython(strip_post_tags, keep_post_tags),
+    ]
@@ -1,12 +1,39 @@
+import datetime
 import uuid
+from typing import List, Optional, Tuple
 
 from ckeditor.fields import RichTextField
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from django.contrib.auth.models import User
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_time
 from django.utils.html import strip_tags
 
 
+class DishCategoryQuerySet(models.QuerySet):
+    """
+    QuerySet for dish categories.
+
+    Methods:
+        with_visible_dishes(): Loads visible categories with their visible dishes in two queries.
+    """
+    def with_visible_dishes(self) -> 'DishCategoryQuerySet':
+        """
+        Filters visible categories and prefetches their visible dishes sorted by order into ``visible_dishes``.
+
+        Returns:
+            DishCategoryQuerySet: The queryset ready for rendering the menu.
+        """
+        return self.filter(is_visible=True).prefetch_related(
+            models.Prefetch('dishes', queryset=Dish.objects.filter(is_visible=True).order_by('order'),
+                            to_attr='visible_dishes')
+        )
+
+
 class DishCategory(models.Model):
     """
     Model representing a category for dishes.
@@ -20,14 +47,19 @@ class DishCategory(models.Model):
     order = models.PositiveSmallIntegerField()
     is_visible = models.BooleanField(default=True)
 
+    objects = DishCategoryQuerySet.as_manager()
+
     def __iter__(self):
         """
-        Iterates over visible dishes in the category.
+        Iterates over visible dishes in the category, using the prefetched dishes when they are present.
 
         Yields:
             Dish: A visible dish in the category.
         """
-        dishes = self.dishes.filter(is_visible=True)
+        if hasattr(self, 'visible_dishes'):
+            dishes = self.visible_dishes
+        else:
+            dishes = self.dishes.filter(is_visible=True).order_by('order')
         for dish in dishes:
             yield dish
 
@@ -65,12 +97,16 @@ class Dish(models.Model):
         is_visible (bool): Indicates if the dish is visible.
         order (int): The order of the dish.
         category (DishCategory): The category to which the dish belongs.
+        renditions (list): The storage names of the generated renditions of the photo.
     """
+    IMAGE_FIELD = 'photo'
+
     name = models.CharField(max_length=255, unique=True, db_index=True)
     slug = models.SlugField(max_length=255, unique=True, db_index=True, verbose_name='url')
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2, db_index=True)
     photo = models.ImageField(upload_to='dishes/', blank=True)
+    renditions = models.JSONField(default=list, blank=True, editable=False)
     is_visible = models.BooleanField(default=True)
     order = models.PositiveSmallIntegerField()
 
@@ -94,8 +130,12 @@ class Gallery(models.Model):
         photo (ImageField): The photo of the gallery item.
         is_visible (bool): Indicates if the gallery item is visible.
         title (str): The title of the gallery item.
+        renditions (list): The storage names of the generated renditions of the photo.
     """
+    IMAGE_FIELD = 'photo'
+
     photo = models.ImageField(upload_to='gallery/')
+    renditions = models.JSONField(default=list, blank=True, editable=False)
     is_visible = models.BooleanField(default=True)
     title = models.CharField(max_length=255, blank=True)
 
@@ -167,6 +207,27 @@ class Tag(models.Model):
         return self.tag_name
 
 
+class PostQuerySet(models.QuerySet):
+    """
+    QuerySet for blog posts.
+
+    Methods:
+        for_listing(): Loads everything a post card renders in a fixed number of queries.
+    """
+    def for_listing(self) -> 'PostQuerySet':
+        """
+        Annotates the comment count, joins the author and prefetches the post images.
+
+        Returns:
+            PostQuerySet: The queryset ready for rendering post cards.
+        """
+        return self.select_related('author').annotate(
+            num_comments=models.Count('comments', distinct=True)
+        ).prefetch_related(
+            models.Prefetch('postimage_set', queryset=PostImage.objects.order_by('pk'))
+        )
+
+
 class Post(models.Model):
     """
     Model representing a blog post.
@@ -179,9 +240,13 @@ class Post(models.Model):
         is_visible (bool): Indicates if the post is visible.
         tags (QuerySet): The tags associated with the post.
         category (PostCategory): The category to which the post belongs.
+        excerpt (str): The plain-text start of the content, computed when the post is saved.
     """
+    EXCERPT_LENGTH = 150
+
     title = models.CharField(max_length=200, unique=True, db_index=True)
     content = RichTextField()
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False)
     date_posted = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     is_visible = models.BooleanField(default=True)
@@ -189,15 +254,40 @@ class Post(models.Model):
 
     category = models.ForeignKey(PostCategory, on_delete=models.PROTECT, related_name='posts', default=1, null=True)
 
+    objects = PostQuerySet.as_manager()
+
+    def save(self, *args, **kwargs) -> None:
+        """
+        Saves the post, refreshing the stored excerpt from the content.
+        """
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.excerpt = self.make_excerpt(self.content)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def make_excerpt(cls, content: str) -> str:
+        """
+        Builds the plain-text excerpt of the given HTML content.
+
+        Args:
+            content (str): The HTML content of the post.
+
+        Returns:
+            str: The content without tags, truncated to EXCERPT_LENGTH characters.
+        """
+        return strip_tags(content)[:cls.EXCERPT_LENGTH]
+
     def truncated_content(self) -> str:
         """
         Returns a truncated version of the post content.
 
         Returns:
-            str: The truncated content.
+            str: The stored plain-text excerpt.
         """
-        content_without_tags = strip_tags(self.content)
-        return content_without_tags[:150]
+        return self.excerpt
 
     def __str__(self) -> str:
         """
@@ -220,13 +310,28 @@ class Post(models.Model):
     @property
     def comments_count(self) -> int:
         """
-        Returns the count of comments for the post.
+        Returns the count of comments for the post, using the annotated value when it is present.
 
         Returns:
             int: The number of comments.
         """
+        if hasattr(self, 'num_comments'):
+            return self.num_comments
         return self.comments.count()
 
+    @property
+    def cover_image(self) -> 'PostImage | None':
+        """
+        Returns the first image of the post, using the prefetched images when they are present.
+
+        Returns:
+            PostImage | None: The cover image, or None if the post has no images.
+        """
+        if 'postimage_set' in getattr(self, '_prefetched_objects_cache', {}):
+            images = self.postimage_set.all()
+            return images[0] if images else None
+        return self.postimage_set.order_by('pk').first()
+
 
 class PostImage(models.Model):
     """
@@ -235,8 +340,12 @@ class PostImage(models.Model):
     Attributes:
         post_image (ImageField): The image file associated with the post.
         post (Post): The post to which the image belongs.
+        renditions (list): The storage names of the generated renditions of the image.
     """
+    IMAGE_FIELD = 'post_image'
+
     post_image = models.ImageField(upload_to='post_images')
+    renditions = models.JSONField(default=list, blank=True, editable=False)
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
 
     def __str__(self) -> str:
@@ -249,6 +358,37 @@ class PostImage(models.Model):
         return f"Image {self.pk}"
 
 
+class CommentQuerySet(models.QuerySet):
+    """
+    QuerySet for post comments.
+
+    Methods:
+        as_tree(): Builds the threaded comment tree from a single query.
+    """
+    def as_tree(self) -> List['Comment']:
+        """
+        Evaluates the queryset once and links every comment to its replies in memory.
+
+        Each comment gets a ``children`` list holding its direct replies in queryset order, so the
+        tree can be rendered at any depth without further queries.
+
+        Returns:
+            list: The top-level comments.
+        """
+        comments = list(self)
+        by_id = {comment.id: comment for comment in comments}
+        roots = []
+        for comment in comments:
+            comment.children = []
+        for comment in comments:
+            parent = by_id.get(comment.parent_id)
+            if parent is None:
+                roots.append(comment)
+            else:
+                parent.children.append(comment)
+        return roots
+
+
 class Comment(models.Model):
     """
     Model representing a comment on a post.
@@ -268,6 +408,8 @@ class Comment(models.Model):
     author = models.TextField()
     parent = models.ForeignKey('self', related_name='replies', on_delete=models.CASCADE, null=True)
 
+    objects = CommentQuerySet.as_manager()
+
     def __str__(self) -> str:
         """
         Returns the string representation of the comment.
@@ -278,6 +420,153 @@ class Comment(models.Model):
         return f'Comment by {self.author} on {self.post.title}'
 
 
+class ReservationSlotQuerySet(models.QuerySet):
+    """
+    Custom QuerySet for the reservation availability index.
+    """
+    def reserve(self, date: datetime.date, slot_time: datetime.time, count: int = 1) -> None:
+        """
+        Books places in a time slot with a single conditional update.
+
+        The update only succeeds while the slot has enough free places, so concurrent bookings of the last
+        place cannot both succeed.
+
+        Args:
+            date (date): The date of the slot.
+            slot_time (time): The start time of the slot.
+            count (int): The number of places to book.
+
+        Raises:
+            ValidationError: If the slot does not have enough free places.
+        """
+        slot, _ = self.get_or_create(date=date, time=slot_time,
+                                     defaults={'capacity': settings.RESERVATION_SLOT_CAPACITY})
+        if not self.filter(pk=slot.pk, booked__lte=models.F('capacity') - count).update(
+                booked=models.F('booked') + count):
+            raise ValidationError('This time slot is fully booked.', code='slot_full')
+
+    def release(self, date: datetime.date, slot_time: datetime.time, count: int = 1) -> None:
+        """
+        Frees places in a time slot.
+
+        Args:
+            date (date): The date of the slot.
+            slot_time (time): The start time of the slot.
+            count (int): The number of places to free.
+        """
+        self.filter(date=date, time=slot_time).update(
+            booked=Greatest(models.F('booked') - count, models.Value(0)))
+
+    def is_available(self, date: datetime.date, slot_time: datetime.time) -> bool:
+        """
+        Checks if a time slot has a free place.
+
+        Args:
+            date (date): The date of the slot.
+            slot_time (time): The start time of the slot.
+
+        Returns:
+            bool: True if the slot has a free place, False otherwise.
+        """
+        slot = self.filter(date=date, time=slot_time).first()
+        return slot is None or slot.booked < slot.capacity
+
+    def availability(self, date: datetime.date) -> List[dict]:
+        """
+        Returns the capacity and free places of every time slot of a day with one indexed query.
+
+        Args:
+            date (date): The date.
+
+        Returns:
+            list: The slots of the day, each with its time, capacity, booked and free places.
+        """
+        slots = {slot.time: slot for slot in self.filter(date=date)}
+        availability = []
+        for slot_time in ReservationSlot.get_day_slots():
+            slot = slots.get(slot_time) or ReservationSlot(date=date, time=slot_time,
+                                                          capacity=settings.RESERVATION_SLOT_CAPACITY)
+            availability.append({
+                'time': slot_time.strftime('%H:%M'),
+                'capacity': slot.capacity,
+                'booked': slot.booked,
+                'free': max(slot.capacity - slot.booked, 0),
+            })
+        return availability
+
+
+class ReservationSlot(models.Model):
+    """
+    Model representing the availability index of reservations, one row per date and time slot.
+
+    Rows are created on the first booking of a slot and updated whenever a reservation is saved or deleted.
+
+    Attributes:
+        date (Date): The date of the slot.
+        time (Time): The start time of the slot.
+        capacity (int): The number of reservations the slot accepts.
+        booked (int): The number of reservations in the slot.
+    """
+    date = models.DateField()
+    time = models.TimeField()
+    capacity = models.PositiveSmallIntegerField()
+    booked = models.PositiveSmallIntegerField(default=0)
+
+    objects = ReservationSlotQuerySet.as_manager()
+
+    @staticmethod
+    def get_slot_time(value: datetime.time) -> datetime.time:
+        """
+        Returns the start time of the slot a reservation time falls into.
+
+        Args:
+            value (time): The reservation time.
+
+        Returns:
+            time: The start time of the slot.
+        """
+        minutes = value.hour * 60 + value.minute
+        minutes -= minutes % settings.RESERVATION_SLOT_MINUTES
+        return datetime.time(minutes // 60, minutes % 60)
+
+    @staticmethod
+    def get_day_slots() -> List[datetime.time]:
+        """
+        Returns the start times of all slots between the opening and closing time.
+
+        Returns:
+            list: The start times of the slots.
+        """
+        opening = parse_time(settings.RESERVATION_OPENING_TIME)
+        closing = parse_time(settings.RESERVATION_CLOSING_TIME)
+        start = opening.hour * 60 + opening.minute
+        end = closing.hour * 60 + closing.minute
+        return [datetime.time(minutes // 60, minutes % 60)
+                for minutes in range(start, end, settings.RESERVATION_SLOT_MINUTES)]
+
+    def __str__(self) -> str:
+        """
+        Returns the string representation of the slot.
+
+        Returns:
+            str: The date, time and occupancy of the slot.
+        """
+        return f'{self.date} {self.time:%H:%M} - {self.booked}/{self.capacity}'
+
+    class Meta:
+        """
+        Metaclass for defining model metadata.
+
+        Attributes:
+            ordering (tuple): The default ordering for queries.
+            constraints (list): One row per date and time slot, which also indexes lookups by date.
+        """
+        ordering = ('date', 'time')
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'time'], name='coffee_reservation_slot_unique'),
+        ]
+
+
 class Reservation(models.Model):
     """
     Model representing a reservation.
@@ -293,14 +582,14 @@ class Reservation(models.Model):
         created_at (DateTime): The date and time when the reservation was created.
         updated_at (DateTime): The date and time when the reservation was last updated.
     """
-    name = models.CharField(max_length=100, unique=True, db_index=True)
-    last_name = models.CharField(max_length=100, unique=True, db_index=True)
+    name = models.CharField(max_length=100)
+    last_name = models.CharField(max_length=100)
     date = models.DateField()
     time = models.TimeField()
     phone_regex = RegexValidator(regex=r'^\+?\d{7,12}$',
                                  message='Phone number should be in format: +380xxxxxxxxx')
     phone = models.CharField(validators=[phone_regex, ], max_length=20)
-    message = models.TextField(max_length=500, blank=True, unique=True, db_index=True)
+    message = models.TextField(max_length=500, blank=True)
 
     is_precessed = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -315,14 +604,113 @@ class Reservation(models.Model):
         """
         return f'{self.name} - {self.phone}'
 
+    def get_slot_key(self) -> Tuple[datetime.date, datetime.time]:
+        """
+        Returns the date and slot start time the reservation books.
+
+        Returns:
+            tuple: The date and the start time of the slot.
+        """
+        return self.date, ReservationSlot.get_slot_time(self.time)
+
+    def get_booked_slot_key(self) -> Optional[Tuple[datetime.date, datetime.time]]:
+        """
+        Returns the date and slot start time currently booked by the saved reservation.
+
+        Returns:
+            tuple: The date and the start time of the slot, or None if the reservation is not saved yet.
+        """
+        if self.pk is None:
+            return None
+        booked = Reservation.objects.filter(pk=self.pk).values_list('date', 'time').first()
+        return (booked[0], ReservationSlot.get_slot_time(booked[1])) if booked else None
+
+    def clean(self) -> None:
+        """
+        Rejects a reservation for a fully booked slot.
+
+        Raises:
+            ValidationError: If the slot is fully booked.
+        """
+        if self.date is None or self.time is None:
+            return
+        slot_key = self.get_slot_key()
+        if slot_key != self.get_booked_slot_key() and not ReservationSlot.objects.is_available(*slot_key):
+            raise ValidationError('This time slot is fully booked.', code='slot_full')
+
+    def save(self, *args, **kwargs) -> None:
+        """
+        Saves the reservation and books its time slot in the availability index within one transaction.
+
+        Raises:
+            ValidationError: If the slot filled up after the reservation was validated.
+        """
+        with transaction.atomic():
+            slot_key = self.get_slot_key()
+            booked_slot_key = self.get_booked_slot_key()
+            if slot_key != booked_slot_key:
+                ReservationSlot.objects.reserve(*slot_key)
+                if booked_slot_key is not None:
+                    ReservationSlot.objects.release(*booked_slot_key)
+            super().save(*args, **kwargs)
+
     class Meta:
         """
         Metaclass for defining model metadata.
 
         Attributes:
             ordering (tuple): The default ordering for queries.
+            indexes (list): The partial index serving the manager list of unprocessed reservations.
         """
         ordering = ('-created_at',)
+        indexes = [
+            models.Index(fields=['date', 'time', 'id'], condition=models.Q(is_precessed=False),
+                         name='coffee_reservation_pending_idx'),
+        ]
+
+
+class OrderQuerySet(models.QuerySet):
+    """
+    QuerySet for orders with the fulfilment queue and the status state machine.
+
+    Methods:
+        queue(statuses=None): Returns the open orders oldest first with their customer data and lines.
+        transition(pk, status): Moves an order to a new status if the state machine allows it.
+    """
+    def queue(self, statuses=None):
+        """
+        Returns the open orders oldest first, reading their customer data and lines in two more queries.
+
+        The filter and the ordering are served by the (order_status, order_date, order_time) index.
+
+        Args:
+            statuses (list, optional): The statuses to show, the open ones by default.
+
+        Returns:
+            QuerySet: The queue of orders.
+        """
+        return self.filter(order_status__in=statuses or Order.OPEN_STATUSES).order_by(
+            'order_date', 'order_time', 'id').prefetch_related(
+            'userdata_set', models.Prefetch('orderdisheslist_set',
+                                            queryset=OrderDishesList.objects.select_related('dish')))
+
+    def transition(self, pk: int, status: str) -> None:
+        """
+        Moves an order to a new status with one conditional UPDATE.
+
+        The UPDATE only matches while the order is in one of the statuses allowed to move to the new one,
+        so two members of staff advancing the same order at once cannot skip or undo a step.
+
+        Args:
+            pk (int): The primary key of the order.
+            status (str): The new status.
+
+        Raises:
+            ValidationError: If the order does not exist or cannot move to the new status.
+        """
+        sources = [source for source, targets in Order.TRANSITIONS.items() if status in targets]
+        if not self.filter(pk=pk, order_status__in=sources).update(order_status=status):
+            raise ValidationError('This order cannot be moved to this status.', code='invalid_transition')
 
 
 class Order(models.Model):
@@ -335,10 +723,33 @@ class Order(models.Model):
         order_time (Time): The time when the order was placed.
         order_status (str): The status of the order.
     """
+    STATUS_PENDING = 'pending'
+    STATUS_PREPARING = 'preparing'
+    STATUS_READY = 'ready'
+    STATUS_COMPLETED = 'completed'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PREPARING, 'Preparing'),
+        (STATUS_READY, 'Ready'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_CANCELLED, 'Cancelled'),
+    )
+    OPEN_STATUSES = (STATUS_PENDING, STATUS_PREPARING, STATUS_READY)
+    TRANSITIONS = {
+        STATUS_PENDING: (STATUS_PREPARING, STATUS_CANCELLED),
+        STATUS_PREPARING: (STATUS_READY, STATUS_CANCELLED),
+        STATUS_READY: (STATUS_COMPLETED,),
+        STATUS_COMPLETED: (),
+        STATUS_CANCELLED: (),
+    }
+
     order_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     order_date = models.DateField(auto_now_add=True)
     order_time = models.TimeField(auto_now_add=True)
-    order_status = models.CharField(max_length=100)
+    order_status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+
+    objects = OrderQuerySet.as_manager()
 
     def __str__(self) -> str:
         """
@@ -349,6 +760,26 @@ class Order(models.Model):
         """
         return f"Order {self.order_id} - {self.order_date} {self.order_time}"
 
+    def get_next_statuses(self) -> tuple:
+        """
+        Returns the statuses the order can move to.
+
+        Returns:
+            tuple: The allowed next statuses.
+        """
+        return self.TRANSITIONS.get(self.order_status, ())
+
+    class Meta:
+        """
+        Metaclass for defining model metadata.
+
+        Attributes:
+            indexes (list): The index serving the fulfilment queue.
+        """
+        indexes = [
+            models.Index(fields=['order_status', 'order_date', 'order_time'], name='coffee_order_queue_idx'),
+        ]
+
 
 class UserData(models.Model):
     """
@@ -413,4 +844,65 @@ class OrderDishesList(models.Model):
         return f"{self.order} - {self.dish.name}"
 
 
+class OutgoingEmail(models.Model):
+    """
+    Model representing an email waiting in the outbox to be sent by the send_queued_emails worker.
+
+    Attributes:
+        subject (str): The subject of the email.
+        body (str): The plain-text body of the email.
+        from_email (str): The sender address.
+        to (list): The recipient addresses.
+        reply_to (list): The reply-to addresses.
+        status (str): The delivery status of the email.
+        attempts (int): The number of failed delivery attempts.
+        next_attempt_at (DateTime): The earliest time of the next delivery attempt, or the end of the lease of
+            the worker sending the email.
+        last_error (str): The error of the last failed delivery attempt.
+        created_at (DateTime): The date and time when the email was queued.
+        sent_at (DateTime): The date and time when the email was sent.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        """
+        Returns the string representation of the queued email.
 
+        Returns:
+            str: The subject, recipients and status of the email.
+        """
+        return f"{self.subject} - {', '.join(self.to)} ({self.status})"
+
+    class Meta:
+        """
+        Metaclass for defining model metadata.
+
+        Attributes:
+            ordering (tuple): The default ordering for queries.
+            indexes (list): The index used by the worker to find due emails.
+        """
+        ordering = ('next_attempt_at', 'id')
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='coffee_outbox_due_idx'),
+        ]
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.db import transaction
+
+from .cart import PricedCart
+from .models import Order, OrderDishesList, UserData
+from .outbox import enqueue_email
+
+
+@transaction.atomic
+def place_order(priced_cart: PricedCart, billing_details: dict, user=None) -> Order:
+    """
+    Creates an order with its customer data and dish lines as a single atomic unit.
+
+    Dish prices come from the priced cart, which reads them with one query, and all order lines are
+    written with one bulk insert, so a failure part way through leaves no partial order behind. The order
+    notifications are queued in the same transaction and sent later by the outbox worker.
+
+    Args:
+        priced_cart (PricedCart): The priced session cart.
+        billing_details (dict): The cleaned billing details of the customer.
+        user (User, optional): The authenticated user placing the order.
+
+    Returns:
+        Order: The created order.
+    """
+    order = Order.objects.create()
+    user_data = UserData.objects.create(order=order, user=user, **billing_details)
+    OrderDishesList.objects.bulk_create([
+        OrderDishesList(order=order, user_data=user_data, dish=line.product,
+                        price=line.product.price, quantity=line.quantity)
+        for line in priced_cart
+    ])
+    notify_order_placed(order, user_data, priced_cart)
+    return order
+
+
+def notify_order_placed(order: Order, user_data: UserData, priced_cart: PricedCart) -> None:
+    """
+    Queues the order confirmation for the customer and the order notification for the cafe.
+
+    Args:
+        order (Order): The placed order.
+        user_data (UserData): The customer data of the order.
+        priced_cart (PricedCart): The priced cart the order was placed from.
+    """
+    lines = '\n'.join(f'{line.product.name} x {line.quantity} - ${line.total_for_product}' for line in priced_cart)
+    summary = f'Order {order.order_id}\n\n{lines}\n\nTotal: ${priced_cart.total_amount}'
+    address = f'{user_data.street_name} {user_data.house_number}'
+
+    enqueue_email('Your order has been received',
+                  f'Dear {user_data.first_name},\n\nthank you for your order.\n\n{summary}',
+                  [user_data.email_address])
+    enqueue_email(f'New order {order.order_id}',
+                  f'{summary}\n\n{user_data.first_name} {user_data.last_name}, {address}, {user_data.phone}',
+                  [settings.CONTACT_EMAIL], reply_to=[user_data.email_address])
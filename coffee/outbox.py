@@ -0,0 +1,136 @@
+import logging
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(subject: str, message: str, recipient_list: List[str], from_email: Optional[str] = None,
+                  reply_to: Optional[List[str]] = None) -> OutgoingEmail:
+    """
+    Queues an email in the outbox instead of sending it during the request.
+
+    The message is built once so that header injection is rejected with BadHeaderError right away,
+    as send_mail would do.
+
+    Args:
+        subject (str): The subject of the email.
+        message (str): The plain-text body of the email.
+        recipient_list (list): The recipient addresses.
+        from_email (str, optional): The sender address. Defaults to DEFAULT_FROM_EMAIL.
+        reply_to (list, optional): The reply-to addresses.
+
+    Returns:
+        OutgoingEmail: The queued email.
+    """
+    email = OutgoingEmail(subject=subject, body=message, from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+                          to=list(recipient_list), reply_to=list(reply_to or []))
+    build_message(email).message()
+    email.save()
+    return email
+
+
+def build_message(email: OutgoingEmail, connection=None) -> EmailMessage:
+    """
+    Builds the Django email message of a queued email.
+
+    Args:
+        email (OutgoingEmail): The queued email.
+        connection (optional): The email backend used to send the message.
+
+    Returns:
+        EmailMessage: The email message.
+    """
+    return EmailMessage(email.subject, email.body, email.from_email, email.to, reply_to=email.reply_to,
+                        connection=connection)
+
+
+def get_retry_delay(attempts: int) -> timedelta:
+    """
+    Returns the exponential backoff before the next delivery attempt.
+
+    Args:
+        attempts (int): The number of failed delivery attempts so far.
+
+    Returns:
+        timedelta: The delay before the next attempt.
+    """
+    return timedelta(seconds=settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def claim_due_emails(batch_size: int) -> List[OutgoingEmail]:
+    """
+    Claims a batch of due emails for this worker.
+
+    The emails are locked with SKIP LOCKED where the database supports it only for as long as it takes to mark
+    them as sending, with a lease of OUTBOX_LEASE seconds in next_attempt_at. Emails whose lease ran out, e.g.
+    because their worker died while sending, are due again.
+
+    Args:
+        batch_size (int): The maximum number of emails to claim.
+
+    Returns:
+        list: The claimed emails.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(OutgoingEmail.objects.select_for_update(skip_locked=True)
+                      .filter(status__in=(OutgoingEmail.STATUS_PENDING, OutgoingEmail.STATUS_SENDING),
+                              next_attempt_at__lte=now)
+                      [:batch_size])
+        if emails:
+            OutgoingEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+                status=OutgoingEmail.STATUS_SENDING, next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE))
+    return emails
+
+
+def send_queued_emails(batch_size: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Sends a batch of due emails from the outbox over a single email backend connection.
+
+    The emails are claimed first, then sent outside of any transaction, and the outcome of every email is
+    recorded on its own, so an email that cannot be sent never undoes the others. Several workers can run at
+    once. A failed email is retried with exponential backoff until OUTBOX_MAX_ATTEMPTS is reached.
+
+    Args:
+        batch_size (int, optional): The maximum number of emails to send. Defaults to OUTBOX_BATCH_SIZE.
+
+    Returns:
+        tuple: The number of sent and failed emails.
+    """
+    emails = claim_due_emails(batch_size or settings.OUTBOX_BATCH_SIZE)
+    sent = failed = 0
+    if not emails:
+        return sent, failed
+
+    connection = get_connection(fail_silently=False)
+    try:
+        for email in emails:
+            claimed = OutgoingEmail.objects.filter(pk=email.pk, status=OutgoingEmail.STATUS_SENDING)
+            try:
+                connection.open()
+                build_message(email, connection).send()
+            except Exception as exc:
+                logger.warning('Cannot send queued email %s: %s', email.pk, exc)
+                connection.close()
+                attempts = email.attempts + 1
+                if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                    claimed.update(status=OutgoingEmail.STATUS_FAILED, attempts=attempts, last_error=str(exc))
+                else:
+                    claimed.update(status=OutgoingEmail.STATUS_PENDING, attempts=attempts, last_error=str(exc),
+                                   next_attempt_at=timezone.now() + get_retry_delay(attempts))
+                failed += 1
+            else:
+                claimed.update(status=OutgoingEmail.STATUS_SENT, sent_at=timezone.now())
+                sent += 1
+    finally:
+        connection.close()
+
+    return sent, failed
@@ -0,0 +1,149 @@
+import logging
+import os
+from io import BytesIO
+from typing import Iterable, List
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.db import models
+from django.db.models.fields.files import FieldFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+RENDITION_SIZES = {
+    'thumb': (160, 160),
+    'small': (480, 480),
+    'medium': (960, 960),
+}
+RENDITION_OPTIONS = {'format': 'WEBP', 'quality': 80, 'method': 4}
+
+
+def get_rendition_name(name: str, size: str) -> str:
+    """
+    Builds the storage name of a rendition, next to the original image.
+
+    Args:
+        name (str): The storage name of the original image.
+        size (str): The rendition size, one of RENDITION_SIZES.
+
+    Returns:
+        str: The storage name of the rendition, e.g. ``dishes/latte.small.webp``.
+    """
+    root, _ = os.path.splitext(name)
+    return f'{root}.{size}.webp'
+
+
+def generate_renditions(image: FieldFile, sizes: Iterable[str]) -> List[str]:
+    """
+    Generates WebP renditions of an image in the given sizes and stores them next to the original.
+
+    Images are scaled down to fit the rendition box, never up. Missing originals are skipped, and files
+    that Pillow cannot read are logged and skipped.
+
+    Args:
+        image (FieldFile): The image field value to generate renditions for.
+        sizes (Iterable): The rendition sizes to generate, from RENDITION_SIZES.
+
+    Returns:
+        list: The storage names of the generated renditions.
+    """
+    sizes = list(sizes)
+    if not image or not sizes or not image.storage.exists(image.name):
+        return []
+
+    storage = image.storage
+    try:
+        with storage.open(image.name, 'rb') as source_file:
+            source = Image.open(source_file)
+            source = ImageOps.exif_transpose(source)
+            source.load()
+    except OSError as e:
+        logger.warning('Cannot generate renditions for %s: %s', image.name, e)
+        return []
+
+    generated = []
+    for size in sizes:
+        name = get_rendition_name(image.name, size)
+        rendition = source.copy()
+        rendition.thumbnail(RENDITION_SIZES[size], Image.LANCZOS)
+        if rendition.mode not in ('RGB', 'RGBA'):
+            rendition = rendition.convert('RGBA')
+
+        buffer = BytesIO()
+        rendition.save(buffer, **RENDITION_OPTIONS)
+        if storage.exists(name):
+            storage.delete(name)
+        generated.append(storage.save(name, ContentFile(buffer.getvalue())))
+    return generated
+
+
+def delete_renditions(storage: Storage, names: Iterable[str]) -> None:
+    """
+    Deletes rendition files from the storage.
+
+    Args:
+        storage (Storage): The storage of the renditions.
+        names (Iterable): The storage names of the renditions.
+    """
+    for name in names:
+        storage.delete(name)
+
+
+def update_renditions(instance: models.Model, field_name: str, force: bool = False) -> List[str]:
+    """
+    Brings the renditions of the image of a model instance in line with the image and records them.
+
+    The names of the renditions are stored in the renditions field of the instance, so rendering a page never
+    has to ask the storage whether a rendition exists. Renditions of a replaced or removed image are deleted.
+    Renditions that exist in the storage but were not recorded yet, e.g. made before they were recorded, are
+    recorded without being generated again.
+
+    Args:
+        instance (Model): The saved instance, with an image field and a renditions field.
+        field_name (str): The name of the image field.
+        force (bool): Regenerate renditions that already exist.
+
+    Returns:
+        list: The storage names of the generated renditions.
+    """
+    image = getattr(instance, field_name)
+    storage = image.storage
+    recorded = list(instance.renditions)
+    wanted = [get_rendition_name(image.name, size) for size in RENDITION_SIZES] if image else []
+    delete_renditions(storage, [name for name in recorded if name not in wanted])
+
+    present, missing = [], []
+    for size, name in zip(RENDITION_SIZES, wanted):
+        if not force and (name in recorded or storage.exists(name)):
+            present.append(name)
+        else:
+            missing.append(size)
+    generated = generate_renditions(image, missing)
+
+    renditions = [name for name in wanted if name in present or name in generated]
+    if renditions != recorded:
+        type(instance).objects.filter(pk=instance.pk).update(renditions=renditions)
+        instance.renditions = renditions
+    return generated
+
+
+def get_rendition_url(image: FieldFile, size: str) -> str:
+    """
+    Returns the URL of an image rendition, falling back to the original while it is not generated yet.
+
+    Only the renditions recorded on the instance are used, so no storage lookup is needed.
+
+    Args:
+        image (FieldFile): The image field value.
+        size (str): The rendition size, one of RENDITION_SIZES.
+
+    Returns:
+        str: The URL of the rendition or of the original image, or an empty string if there is no image.
+    """
+    if not image:
+        return ''
+    name = get_rendition_name(image.name, size)
+    if name in (getattr(image.instance, 'renditions', None) or ()):
+        return image.storage.url(name)
+    return image.url
@@ -0,0 +1,193 @@
+import re
+from typing import List, Optional
+
+from django.db import connection
+from django.utils.html import strip_tags
+
+SEARCH_CONFIG = 'english'
+
+# The searchable tables, their indexed columns with their weights, their HTML columns, the tables joined to decide
+# which rows are public, and the condition of the public rows.
+SEARCH_TABLES = {
+    'coffee_post': {
+        'columns': (('title', 'A'), ('content', 'B')),
+        'html': ('content',),
+        'join': '',
+        'visible': 'coffee_post.is_visible',
+    },
+    'coffee_dish': {
+        'columns': (('name', 'A'), ('description', 'B')),
+        'html': (),
+        'join': 'JOIN coffee_dishcategory ON coffee_dishcategory.id = coffee_dish.category_id',
+        'visible': 'coffee_dish.is_visible AND coffee_dishcategory.is_visible',
+    },
+}
+
+BM25_WEIGHTS = {'A': 10.0, 'B': 1.0}
+
+
+def sqlite_strip_tags(value: Optional[str]) -> Optional[str]:
+    """
+    Removes the HTML tags from a column value, for the strip_tags() SQL function of SQLite.
+
+    Args:
+        value (str): The HTML, or None.
+
+    Returns:
+        str: The text without tags, or None.
+    """
+    return strip_tags(value) if value is not None else None
+
+
+def install_search_functions(db_connection) -> None:
+    """
+    Registers the SQL functions used by the full-text search triggers on a new database connection.
+
+    The FTS5 tokenizer of SQLite would index tag and attribute names, so HTML columns are indexed through
+    strip_tags(). PostgreSQL needs nothing, as its text search parser skips the tags.
+
+    Args:
+        db_connection (BaseDatabaseWrapper): The database connection.
+    """
+    if db_connection.vendor == 'sqlite':
+        db_connection.connection.create_function('strip_tags', 1, sqlite_strip_tags, deterministic=True)
+
+
+def install_search_index(db_connection) -> None:
+    """
+    Creates the full-text search index of the searchable tables, or recreates it after the tables were rebuilt.
+
+    On PostgreSQL every table gets a search_vector column kept up to date by a trigger and a GIN index on it.
+    On SQLite every table gets an FTS5 side table kept up to date by triggers, with the HTML columns indexed
+    without their tags. Both are filled from the existing rows. Other databases are left alone and searched with LIKE.
+
+    Args:
+        db_connection (BaseDatabaseWrapper): The database connection.
+    """
+    with db_connection.cursor() as cursor:
+        for table, options in SEARCH_TABLES.items():
+            columns = [column for column, weight in options['columns']]
+            column_list = ', '.join(columns)
+            if db_connection.vendor == 'postgresql':
+                vector = ' || '.join(f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.{column}, '')), "
+                                     f"'{weight}')" for column, weight in options['columns'])
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector')
+                cursor.execute(f'CREATE OR REPLACE FUNCTION {table}_search_vector() RETURNS trigger AS $$ '
+                               f'BEGIN NEW.search_vector := {vector}; RETURN NEW; END $$ LANGUAGE plpgsql')
+                cursor.execute(f'DROP TRIGGER IF EXISTS {table}_search_vector ON {table}')
+                cursor.execute(f'CREATE TRIGGER {table}_search_vector BEFORE INSERT OR UPDATE OF {column_list} '
+                               f'ON {table} FOR EACH ROW EXECUTE FUNCTION {table}_search_vector()')
+                cursor.execute(f'UPDATE {table} SET {columns[0]} = {columns[0]}')
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS {table}_search_idx ON {table} USING GIN (search_vector)')
+            elif db_connection.vendor == 'sqlite':
+                expressions = ['strip_tags({})' if column in options['html'] else '{}' for column in columns]
+                values = ', '.join(expression.format(column) for expression, column in zip(expressions, columns))
+                new_values = ', '.join(expression.format(f'new.{column}')
+                                       for expression, column in zip(expressions, columns))
+                for action in ('insert', 'update', 'delete'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {table}_fts_{action}')
+                cursor.execute(f'DROP TABLE IF EXISTS {table}_fts')
+                cursor.execute(f"CREATE VIRTUAL TABLE {table}_fts USING fts5({column_list}, "
+                               f"tokenize='porter unicode61')")
+                cursor.execute(f'CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN '
+                               f'INSERT INTO {table}_fts(rowid, {column_list}) VALUES (new.id, {new_values}); END')
+                cursor.execute(f'CREATE TRIGGER {table}_fts_update AFTER UPDATE ON {table} BEGIN '
+                               f'DELETE FROM {table}_fts WHERE rowid = old.id; '
+                               f'INSERT INTO {table}_fts(rowid, {column_list}) VALUES (new.id, {new_values}); END')
+                cursor.execute(f'CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN '
+                               f'DELETE FROM {table}_fts WHERE rowid = old.id; END')
+                cursor.execute(f'INSERT INTO {table}_fts(rowid, {column_list}) SELECT id, {values} FROM {table}')
+
+
+def uninstall_search_index(db_connection) -> None:
+    """
+    Drops the full-text search index of the searchable tables.
+
+    Args:
+        db_connection (BaseDatabaseWrapper): The database connection.
+    """
+    with db_connection.cursor() as cursor:
+        for table in SEARCH_TABLES:
+            if db_connection.vendor == 'postgresql':
+                cursor.execute(f'DROP TRIGGER IF EXISTS {table}_search_vector ON {table}')
+                cursor.execute(f'DROP FUNCTION IF EXISTS {table}_search_vector()')
+                cursor.execute(f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector')
+            elif db_connection.vendor == 'sqlite':
+                for action in ('insert', 'update', 'delete'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {table}_fts_{action}')
+                cursor.execute(f'DROP TABLE IF EXISTS {table}_fts')
+
+
+def make_fts_query(query: str) -> str:
+    """
+    Turns free text into an FTS5 query matching all of its words, so user input cannot inject FTS5 syntax.
+
+    Args:
+        query (str): The text typed by the user.
+
+    Returns:
+        str: The FTS5 query, or an empty string if the text has no words.
+    """
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', query))
+
+
+def search_ids(table: str, query: str, limit: int, public: bool = True) -> List[int]:
+    """
+    Returns the ids of the rows of a table matching a query, best matches first.
+
+    Args:
+        table (str): The searchable table, e.g. 'coffee_post'.
+        query (str): The text typed by the user.
+        limit (int): The maximum number of ids.
+        public (bool): Whether to leave out the hidden rows.
+
+    Returns:
+        list: The ids of the matching rows.
+    """
+    options = SEARCH_TABLES[table]
+    join, visible = (options['join'], options['visible']) if public else ('', 'TRUE')
+    if connection.vendor == 'postgresql':
+        sql = (f"SELECT {table}.id FROM {table} {join} CROSS JOIN websearch_to_tsquery('{SEARCH_CONFIG}', %s) query "
+               f"WHERE {visible} AND {table}.search_vector @@ query "
+               f"ORDER BY ts_rank({table}.search_vector, query) DESC, {table}.id DESC LIMIT %s")
+        params = [query, limit]
+    elif connection.vendor == 'sqlite':
+        query = make_fts_query(query)
+        if not query:
+            return []
+        weights = ', '.join(str(BM25_WEIGHTS[weight]) for column, weight in options['columns'])
+        sql = (f"SELECT {table}.id FROM {table}_fts JOIN {table} ON {table}.id = {table}_fts.rowid {join} "
+               f"WHERE {table}_fts MATCH %s AND {visible} "
+               f"ORDER BY bm25({table}_fts, {weights}), {table}.id DESC LIMIT %s")
+        params = [query, limit]
+    else:
+        words = re.findall(r'\w+', query)
+        if not words:
+            return []
+        match = ' AND '.join(f"({' OR '.join(f'{table}.{column} LIKE %s' for column, _ in options['columns'])})"
+                             for _ in words)
+        sql = f'SELECT {table}.id FROM {table} {join} WHERE {visible} AND {match} ORDER BY {table}.id DESC LIMIT %s'
+        params = [f'%{word}%' for word in words for _ in options['columns']] + [limit]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search(queryset, query: str, limit: int) -> list:
+    """
+    Returns the objects of a queryset matching a query, best matches first.
+
+    The full-text index finds and ranks the ids, then the objects are read by primary key in one query.
+
+    Args:
+        queryset (QuerySet): The queryset of a searchable model, e.g. with related objects to load.
+        query (str): The text typed by the user.
+        limit (int): The maximum number of objects.
+
+    Returns:
+        list: The matching objects.
+    """
+    ids = search_ids(queryset.model._meta.db_table, query, limit)
+    objects = queryset.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .budgets import install_query_recorder
+from .cache import invalidate_recent_posts, invalidate_menu
+from .metrics import COMMENTS_CREATED, ORDERS_CREATED, RESERVATIONS_CREATED
+from .models import Post, PostImage, Comment, Dish, DishCategory, Gallery, Reservation, ReservationSlot, Order
+from .renditions import delete_renditions, update_renditions
+from .search import install_search_functions
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=PostImage)
+@receiver([post_save, post_delete], sender=Comment)
+def post_changed(sender, **kwargs) -> None:
+    """
+    Invalidates the cached recent posts when a post, its images or its comments are saved or deleted.
+    """
+    invalidate_recent_posts()
+
+
+@receiver([post_save, post_delete], sender=Dish)
+@receiver([post_save, post_delete], sender=DishCategory)
+def menu_changed(sender, **kwargs) -> None:
+    """
+    Invalidates the cached menu and shop fragments when a dish or a dish category is saved or deleted.
+    """
+    invalidate_menu()
+
+
+@receiver(post_save, sender=Dish)
+@receiver(post_save, sender=Gallery)
+@receiver(post_save, sender=PostImage)
+def image_saved(sender, instance, raw=False, **kwargs) -> None:
+    """
+    Updates the renditions of a dish, gallery or post image when it is saved outside of fixture loading.
+    """
+    if not raw:
+        update_renditions(instance, instance.IMAGE_FIELD)
+
+
+@receiver(post_delete, sender=Dish)
+@receiver(post_delete, sender=Gallery)
+@receiver(post_delete, sender=PostImage)
+def image_deleted(sender, instance, **kwargs) -> None:
+    """
+    Deletes the renditions of a deleted dish, gallery or post image once the deletion is committed.
+    """
+    storage, renditions = getattr(instance, instance.IMAGE_FIELD).storage, list(instance.renditions)
+    if renditions:
+        transaction.on_commit(lambda: delete_renditions(storage, renditions))
+
+
+@receiver(post_delete, sender=Reservation)
+def reservation_deleted(sender, instance, **kwargs) -> None:
+    """
+    Frees the time slot of a deleted reservation in the availability index.
+    """
+    ReservationSlot.objects.release(*instance.get_slot_key())
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs) -> None:
+    """
+    Installs the query recorder of the query budgets and the full-text search functions on every new database
+    connection.
+    """
+    install_query_recorder(connection)
+    install_search_functions(connection)
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_save, sender=Reservation)
+@receiver(post_save, sender=Comment)
+def count_created(sender, created: bool, raw: bool = False, **kwargs) -> None:
+    """
+    Counts new orders, reservations and comments in the site metrics once they are committed.
+    """
+    counters = {Order: ORDERS_CREATED, Reservation: RESERVATIONS_CREATED, Comment: COMMENTS_CREATED}
+    if created and not raw:
+        transaction.on_commit(counters[sender].inc)
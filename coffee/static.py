@@ -0,0 +1,69 @@
+from typing import Callable
+
+from asgiref.sync import sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class WhiteNoiseASGI:
+    """
+    ASGI application serving the static files with WhiteNoise in front of the Django ASGI application.
+
+    WhiteNoise's Django middleware is sync-only, so under ASGI the files are looked up with the same WhiteNoise
+    configuration, from the WHITENOISE_* and static files settings, and streamed from here. Clients get the same
+    compressed variants, ETags and cache headers as from the middleware, and static requests never reach Django.
+
+    Attributes:
+        application (Callable): The Django ASGI application.
+        whitenoise (WhiteNoiseMiddleware): The WhiteNoise instance holding the static files.
+    """
+    chunk_size = 64 * 1024
+
+    def __init__(self, application: Callable) -> None:
+        self.application = application
+        self.whitenoise = WhiteNoiseMiddleware()
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope['type'] == 'http':
+            if self.whitenoise.autorefresh:
+                static_file = await sync_to_async(self.whitenoise.find_file, thread_sensitive=False)(scope['path'])
+            else:
+                static_file = self.whitenoise.files.get(scope['path'])
+            if static_file is not None:
+                await self.serve(static_file, scope, send)
+                return
+        await self.application(scope, receive, send)
+
+    async def serve(self, static_file, scope: dict, send: Callable) -> None:
+        """
+        Sends a static file, or the not modified or method not allowed response WhiteNoise chose for the request.
+
+        Args:
+            static_file (StaticFile): The WhiteNoise static file matching the path.
+            scope (dict): The ASGI connection scope.
+            send (Callable): The ASGI send callable.
+        """
+        request_headers = {'HTTP_' + name.decode('latin1').upper().replace('-', '_'): value.decode('latin1')
+                           for name, value in scope['headers']}
+        response = await sync_to_async(static_file.get_response, thread_sensitive=False)(
+            scope['method'], request_headers)
+        await send({
+            'type': 'http.response.start',
+            'status': int(response.status),
+            'headers': [(key.lower().encode('latin1'), str(value).encode('latin1'))
+                        for key, value in response.headers],
+        })
+        if response.file is None:
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        read = sync_to_async(response.file.read, thread_sensitive=False)
+        try:
+            chunk = await read(self.chunk_size)
+            while True:
+                next_chunk = await read(self.chunk_size) if chunk else b''
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': bool(next_chunk)})
+                if not next_chunk:
+                    break
+                chunk = next_chunk
+        finally:
+            await sync_to_async(response.file.close, thread_sensitive=False)()
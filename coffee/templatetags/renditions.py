@@ -0,0 +1,23 @@
+from django import template
+
+from coffee.renditions import get_rendition_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def rendition_url(image, size: str) -> str:
+    """
+    Renders the URL of a resized WebP rendition of an image.
+
+    Usage:
+        {% rendition_url dish.photo 'small' %}
+
+    Args:
+        image (FieldFile): The image field value.
+        size (str): The rendition size.
+
+    Returns:
+        str: The URL of the rendition.
+    """
+    return get_rendition_url(image, size)
@@ -0,0 +1,112 @@
+import logging
+from importlib import import_module
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.urls import URLPattern, reverse
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Test runner keeping the per-request performance log quiet while the tests run.
+
+    The coffee.timing logger is set to the TEST_PERFORMANCE_LOG_LEVEL setting for the run and restored afterwards.
+    """
+    def setup_test_environment(self, **kwargs) -> None:
+        super().setup_test_environment(**kwargs)
+        logger = logging.getLogger('coffee.timing')
+        self.performance_log_level = logger.level
+        logger.setLevel(settings.TEST_PERFORMANCE_LOG_LEVEL)
+
+    def teardown_test_environment(self, **kwargs) -> None:
+        logging.getLogger('coffee.timing').setLevel(self.performance_log_level)
+        super().teardown_test_environment(**kwargs)
+
+
+class QueryBudgetTestMixin:
+    """
+    Mixin for test cases rendering every named URL of some URLconfs and checking the query budget of each view.
+
+    The test case seeds the data and logs in the user the pages need, then calls assertQueryBudgets().
+
+    Attributes:
+        budget_urlconfs (tuple): The URLconf modules whose URLs are rendered.
+        budget_url_kwargs (dict): The URL kwargs of the URLs that need them, by namespaced URL name.
+        budget_url_params (dict): The query string parameters of the URLs that need them, by namespaced URL name.
+        budget_skip (tuple): The namespaced URL names that are not rendered, e.g. endless streams.
+        budget_post_data (dict): The forms posted by assertPostQueryBudgets(), a list of them by namespaced URL name.
+    """
+    budget_urlconfs = ('coffee.urls', 'manager.urls')
+    budget_url_kwargs = {}
+    budget_url_params = {}
+    budget_skip = ()
+    budget_post_data = {}
+
+    def get_budget_urls(self) -> List[Tuple[str, str]]:
+        """
+        Returns the URLs to render.
+
+        Returns:
+            list: The namespaced URL names with their URLs.
+        """
+        urls = []
+        for urlconf in self.budget_urlconfs:
+            module = import_module(urlconf)
+            for pattern in module.urlpatterns:
+                if not isinstance(pattern, URLPattern) or not pattern.name:
+                    continue
+                name = f'{module.app_name}:{pattern.name}'
+                if name not in self.budget_skip:
+                    urls.append((name, reverse(name, kwargs=self.budget_url_kwargs.get(name))))
+        return urls
+
+    def assertQueryBudgets(self) -> Dict[str, int]:
+        """
+        Renders every URL with GET and fails for server errors, missing pages and exceeded query budgets.
+
+        POST-only views answering 405 still have their queries checked.
+
+        Returns:
+            dict: The number of queries of every URL, by namespaced URL name.
+        """
+        query_counts = {}
+        for name, url in self.get_budget_urls():
+            with self.subTest(url=name):
+                response = self.client.get(url, self.budget_url_params.get(name))
+                query_counts[name] = self.assertResponseWithinBudget(name, response)
+        return query_counts
+
+    def assertPostQueryBudgets(self) -> Dict[str, List[int]]:
+        """
+        Posts the forms of budget_post_data, valid and invalid ones alike, and fails for server errors, missing
+        pages and exceeded query budgets.
+
+        Returns:
+            dict: The number of queries of every posted form, by namespaced URL name.
+        """
+        query_counts = {}
+        for name, url in self.get_budget_urls():
+            for data in self.budget_post_data.get(name, ()):
+                with self.subTest(url=name, data=data):
+                    response = self.client.post(url, data)
+                    query_counts.setdefault(name, []).append(self.assertResponseWithinBudget(name, response))
+        return query_counts
+
+    def assertResponseWithinBudget(self, name: str, response) -> int:
+        """
+        Fails if a response is a server error or a missing page, or if its view exceeded the query budget.
+
+        Args:
+            name (str): The namespaced URL name.
+            response (HttpResponse): The test client response.
+
+        Returns:
+            int: The number of queries of the request.
+        """
+        self.assertTrue(response.status_code < 400 or response.status_code == 405,
+                        f'{name} answered {response.status_code}')
+        request = response.wsgi_request
+        errors = request.query_budget.check(request.query_stats)
+        self.assertFalse(errors, f"{name} exceeded its query budget: {'; '.join(errors)}")
+        return request.query_stats.queries
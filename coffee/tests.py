@@ -1,11 +1,46 @@
+import json
+import os
+import shutil
+import smtplib
+import tempfile
 import uuid
-from datetime import time
+from datetime import datetime, time, timedelta
+from io import BytesIO, StringIO
+from decimal import Decimal
+from unittest import mock
+from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.utils import timezone
-from django.contrib.auth.models import User
-from django.test import TestCase
+from django.contrib.auth.models import Group, User
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import F, Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image as PILImage
+from coffee.cache import MENU_VERSION_CACHE_KEY, RECENT_POSTS_LIMIT, RECENT_POSTS_VERSION_CACHE_KEY, get_menu_version, \
+    get_recent_posts
+from coffee.cart import PricedCart, get_cart
+from coffee.cart_storage import SignedCookieCartStorage, clean_cart
 from coffee.models import Dish, DishCategory, PostCategory, Gallery, Tag, Post, Order, Reservation, Comment, PostImage, \
-    UserData
+    UserData, OrderDishesList, OutgoingEmail, ReservationSlot
+from coffee.forms import ReservationForm
+from coffee.orders import place_order
+from coffee import outbox
+from coffee.outbox import claim_due_emails, enqueue_email, send_queued_emails
+from coffee.search import make_fts_query, search
+from coffee.static import WhiteNoiseASGI
+from coffee.timing import RequestTimings, current_timings
+from coffee.testing import QueryBudgetTestMixin
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.values import MultiProcessValue
+from coffee.budgets import QueryBudget, QueryStats, query_budget, get_query_budget
+from coffee.renditions import RENDITION_SIZES, get_rendition_name, get_rendition_url
+from coffee.views import IndexPage, MenuPage, BlogPage, BlogSinglePage, ShopPage
 
 
 class DishCategoryTestCase(TestCase):
@@ -228,6 +263,8 @@ class ReservationTestCase(TestCase):
     Methods:
         test_reservation_creation(): Test method for creating a reservation.
         test_str_representation(): Test method for string representation of a reservation.
+        test_duplicate_guest_details(): Test that guests may share names and messages.
+        test_pending_index(): Test that the manager list of unprocessed reservations uses the partial index.
     """
     def test_reservation_creation(self) -> None:
         now_time = timezone.now().time()
@@ -247,6 +284,21 @@ class ReservationTestCase(TestCase):
                                                  time=now_time, phone='+380123456789')
         self.assertEqual(str(reservation), 'John - +380123456789')
 
+    def test_duplicate_guest_details(self) -> None:
+        data = {'name': 'Anna', 'last_name': 'Smith', 'date': timezone.localdate().isoformat(), 'time': '10:00AM',
+                'phone': '+380123456789', 'message': ''}
+        for _ in range(2):
+            form = ReservationForm(data)
+            self.assertTrue(form.is_valid(), form.errors)
+            form.save()
+        self.assertEqual(Reservation.objects.filter(name='Anna', message='').count(), 2)
+
+    def test_pending_index(self) -> None:
+        if connection.vendor != 'sqlite':
+            self.skipTest('The planner may prefer a sequential scan of a small table.')
+        queryset = Reservation.objects.filter(is_precessed=False).order_by('date', 'time')
+        self.assertIn('coffee_reservation_pending_idx', queryset.explain())
+
 
 class OrderTestCase(TestCase):
     """
@@ -255,16 +307,35 @@ class OrderTestCase(TestCase):
     Methods:
         test_order_creation(): Test method for creating an order.
         test_str_representation(): Test method for string representation of an order.
+        test_transition(): Test method for moving an order through the status state machine.
+        test_fixture_statuses(): Test method for checking that the sample data only uses valid statuses.
     """
     def test_order_creation(self) -> None:
-        order = Order.objects.create(order_status='Pending')
+        order = Order.objects.create(order_status=Order.STATUS_PENDING)
         self.assertTrue(order.order_id)
-        self.assertEqual(order.order_status, 'Pending')
+        self.assertEqual(order.order_status, Order.STATUS_PENDING)
 
     def test_str_representation(self) -> None:
-        order = Order.objects.create(order_status='Pending')
+        order = Order.objects.create(order_status=Order.STATUS_PENDING)
         self.assertEqual(str(order), f'Order {order.order_id} - {order.order_date} {order.order_time}')
 
+    def test_transition(self) -> None:
+        order = Order.objects.create()
+        self.assertEqual(order.get_next_statuses(), (Order.STATUS_PREPARING, Order.STATUS_CANCELLED))
+        for status in (Order.STATUS_PREPARING, Order.STATUS_READY, Order.STATUS_COMPLETED):
+            Order.objects.transition(order.pk, status)
+        with self.assertRaises(ValidationError):
+            Order.objects.transition(order.pk, Order.STATUS_CANCELLED)
+        order.refresh_from_db()
+        self.assertEqual(order.order_status, Order.STATUS_COMPLETED)
+        self.assertEqual(order.get_next_statuses(), ())
+
+    def test_fixture_statuses(self) -> None:
+        with open(os.path.join(settings.BASE_DIR, 'data.json'), encoding='utf-8') as fixture:
+            statuses = {item['fields']['order_status'] for item in json.load(fixture)
+                        if item['model'] == 'coffee.order'}
+        self.assertLessEqual(statuses, {status for status, _ in Order.STATUS_CHOICES})
+
 
 class UserDataTestCase(TestCase):
     """
@@ -277,7 +348,7 @@ class UserDataTestCase(TestCase):
     """
     def setUp(self) -> None:
         self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpassword')
-        self.order = Order.objects.create(order_status='Pending')
+        self.order = Order.objects.create(order_status=Order.STATUS_PENDING)
         self.user_data = UserData.objects.create(user=self.user, order=self.order, first_name='John',
                                                  last_name='Doe', street_name='Main St', house_number='123',
                                                  phone='+380123456789', email_address='john@example.com')
@@ -296,3 +367,1317 @@ class UserDataTestCase(TestCase):
     def test_str_representation(self) -> None:
         self.assertEqual(str(self.user_data), f"{self.user.username} - Order {self.order.order_id}")
 
+
+class PricedCartTestCase(TestCase):
+    """
+    Test case for the cart pricing service.
+
+    Methods:
+        setUp(): Set up dishes for testing.
+        test_totals(): Test line totals, grand total and items count.
+        test_stale_and_hidden_ids_are_skipped(): Test that unknown, hidden and malformed lines are ignored.
+        test_single_query(): Test that the whole cart is priced with one query.
+        test_cart_page_with_stale_id(): Test that the cart page renders when the cart holds a deleted dish.
+    """
+    def setUp(self) -> None:
+        category = DishCategory.objects.create(name='Test Category', order=1)
+        self.dish = Dish.objects.create(name='Latte', slug='latte', price=3.50, order=1, category=category,
+                                         photo='dishes/latte.jpg')
+        self.other_dish = Dish.objects.create(name='Mocha', slug='mocha', price=4.00, order=2, category=category)
+        self.hidden_dish = Dish.objects.create(name='Hidden', slug='hidden', price=9.00, order=3,
+                                               category=category, is_visible=False)
+
+    def test_totals(self) -> None:
+        priced_cart = PricedCart({str(self.dish.id): 2, str(self.other_dish.id): 1})
+        self.assertEqual(len(priced_cart), 2)
+        self.assertEqual(priced_cart.lines[0].total_for_product, Decimal('7.00'))
+        self.assertEqual(priced_cart.total_amount, Decimal('11.00'))
+        self.assertEqual(priced_cart.items_count, 3)
+
+    def test_stale_and_hidden_ids_are_skipped(self) -> None:
+        priced_cart = PricedCart({str(self.dish.id): 1, '999999': 2, str(self.hidden_dish.id): 1,
+                                  'None': 1, str(self.other_dish.id): 0})
+        self.assertEqual([line.product for line in priced_cart], [self.dish])
+        self.assertEqual(priced_cart.total_amount, Decimal('3.50'))
+        self.assertEqual(priced_cart.items_count, 1)
+
+    def test_single_query(self) -> None:
+        with self.assertNumQueries(1):
+            PricedCart({str(self.dish.id): 1, str(self.other_dish.id): 1})
+
+    def test_cart_page_with_stale_id(self) -> None:
+        self.client.cookies['cart'] = SignedCookieCartStorage.encode({str(self.dish.id): 2, '999999': 1})
+        response = self.client.get(reverse('coffee:cart'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_amount'], Decimal('7.00'))
+        self.assertEqual(response.context['cart_items_count'], 2)
+
+
+class PlaceOrderTestCase(TestCase):
+    """
+    Test case for atomic order placement.
+
+    Methods:
+        setUp(): Set up a dish and billing details for testing.
+        test_place_order(): Test that the order, its customer data and all lines are created.
+        test_place_order_rolls_back(): Test that a failure while writing lines leaves no order behind.
+        test_checkout_with_empty_cart(): Test that checkout refuses to create an order for an empty cart.
+    """
+    def setUp(self) -> None:
+        category = DishCategory.objects.create(name='Test Category', order=1)
+        self.dish = Dish.objects.create(name='Latte', slug='latte', price=3.50, order=1, category=category)
+        self.other_dish = Dish.objects.create(name='Mocha', slug='mocha', price=4.00, order=2, category=category)
+        self.billing_details = {'first_name': 'John', 'last_name': 'Doe', 'street_name': 'Main St',
+                                'house_number': '12', 'phone': '+380123456789', 'email_address': 'john@example.com'}
+
+    def test_place_order(self) -> None:
+        priced_cart = PricedCart({str(self.dish.id): 3, str(self.other_dish.id): 1})
+        with CaptureQueriesContext(connection) as queries:
+            order = place_order(priced_cart, self.billing_details)
+
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT')
+                   and 'coffee_outgoingemail' not in query['sql']]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(OrderDishesList.objects.filter(order=order).count(), 2)
+        self.assertEqual(OutgoingEmail.objects.count(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(order.order_status, Order.STATUS_PENDING)
+        self.assertEqual(UserData.objects.get(order=order).first_name, 'John')
+        line = OrderDishesList.objects.get(order=order, dish=self.dish)
+        self.assertEqual((line.dish, line.price, line.quantity), (self.dish, Decimal('3.50'), 3))
+
+    def test_place_order_rolls_back(self) -> None:
+        priced_cart = PricedCart({str(self.dish.id): 1})
+        with mock.patch.object(OrderDishesList.objects, 'bulk_create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                place_order(priced_cart, self.billing_details)
+
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(UserData.objects.exists())
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_checkout_with_empty_cart(self) -> None:
+        response = self.client.post(reverse('coffee:checkout'), self.billing_details)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Order.objects.exists())
+
+
+class RecentPostsCacheTestCase(TestCase):
+    """
+    Test case for the cached recent posts.
+
+    Methods:
+        setUp(): Clear the cache and create posts for testing.
+        test_recent_posts_are_cached(): Test that a warm cache serves recent posts without loading posts.
+        test_cache_is_invalidated_on_save(): Test that saving a post refreshes the cached list.
+        test_cache_is_invalidated_on_delete(): Test that deleting a post refreshes the cached list.
+        test_version_is_shared(): Test that a version bumped by another worker is seen despite the local cache.
+    """
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.category = PostCategory.objects.create(name='Test Post Category')
+        self.posts = [Post.objects.create(title=f'Post {i}', content='Content', author=self.user,
+                                          category=self.category) for i in range(RECENT_POSTS_LIMIT + 1)]
+
+    def test_recent_posts_are_cached(self) -> None:
+        self.assertEqual(len(get_recent_posts()), RECENT_POSTS_LIMIT)
+        with CaptureQueriesContext(connection) as queries:
+            get_recent_posts()
+        self.assertFalse([query for query in queries.captured_queries if 'coffee_post' in query['sql']])
+
+    def test_cache_is_invalidated_on_save(self) -> None:
+        get_recent_posts()
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(title='Newest Post', content='Content', author=self.user,
+                                       category=self.category)
+        self.assertEqual(get_recent_posts()[0], post)
+
+    def test_cache_is_invalidated_on_delete(self) -> None:
+        newest = get_recent_posts()[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            newest.delete()
+        self.assertNotIn(newest, get_recent_posts())
+
+    def test_version_is_shared(self) -> None:
+        newest = get_recent_posts()[0]
+        Post.objects.filter(pk=newest.pk).update(title='Renamed by another worker')
+        self.assertEqual(get_recent_posts()[0].title, newest.title)
+
+        caches['shared'].set(RECENT_POSTS_VERSION_CACHE_KEY, 'bumped by another worker', None)
+        self.assertEqual(get_recent_posts()[0].title, 'Renamed by another worker')
+
+
+class PostListingTestCase(TestCase):
+    """
+    Test case for loading post cards without N+1 queries.
+
+    Methods:
+        setUp(): Create posts with comments and images for testing.
+        test_for_listing(): Test that comment counts, cover images and authors come from the listing query.
+        test_blog_page_query_count(): Test that the blog page query count does not grow with the number of posts.
+    """
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.category = PostCategory.objects.create(name='Test Post Category')
+        self.post = self.create_post('Post 0')
+
+    def create_post(self, title: str) -> Post:
+        post = Post.objects.create(title=title, content='<p>Content</p>', author=self.user, category=self.category)
+        Comment.objects.create(post=post, content='Comment', email='test@example.com', author='Test Author')
+        PostImage.objects.create(post=post, post_image=f'post_images/{title}.jpg')
+        PostImage.objects.create(post=post, post_image=f'post_images/{title}-2.jpg')
+        return post
+
+    def test_for_listing(self) -> None:
+        post = Post.objects.for_listing().get(pk=self.post.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(post.comments_count, 1)
+            self.assertEqual(post.cover_image.post_image.name, 'post_images/Post 0.jpg')
+            self.assertEqual(post.author, self.user)
+
+    def test_blog_page_query_count(self) -> None:
+        cache.clear()
+        with CaptureQueriesContext(connection) as single_post:
+            self.client.get(reverse('coffee:blog'))
+        for i in range(1, 6):
+            self.create_post(f'Post {i}')
+        cache.clear()
+        with CaptureQueriesContext(connection) as many_posts:
+            response = self.client.get(reverse('coffee:blog'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(many_posts), len(single_post))
+
+
+class CommentTreeTestCase(TestCase):
+    """
+    Test case for the threaded comment tree.
+
+    Methods:
+        setUp(): Create a post with nested comments for testing.
+        test_as_tree(): Test that the tree is built from one query at any depth.
+        test_blog_single_page_query_count(): Test that the page query count does not grow with nesting.
+    """
+    def setUp(self) -> None:
+        cache.clear()
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.post = Post.objects.create(title='Test Post', content='Test Content', author=user,
+                                        category=PostCategory.objects.create(name='Test Post Category'))
+        self.root = self.create_comment('Root')
+        self.reply = self.create_comment('Reply', parent=self.root)
+        self.nested_reply = self.create_comment('Nested reply', parent=self.reply)
+
+    def create_comment(self, content: str, parent: Comment = None) -> Comment:
+        return Comment.objects.create(post=self.post, content=content, email='test@example.com',
+                                      author='Test Author', parent=parent)
+
+    def test_as_tree(self) -> None:
+        deepest = self.create_comment('Deepest', parent=self.nested_reply)
+        with self.assertNumQueries(1):
+            roots = Comment.objects.filter(post=self.post).order_by('date_posted', 'id').as_tree()
+
+        self.assertEqual(roots, [self.root])
+        self.assertEqual(roots[0].children, [self.reply])
+        self.assertEqual(roots[0].children[0].children, [self.nested_reply])
+        self.assertEqual(roots[0].children[0].children[0].children, [deepest])
+
+    def test_blog_single_page_query_count(self) -> None:
+        url = reverse('coffee:blog_single', args=[self.post.id])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as shallow:
+            self.client.get(url)
+        parent = self.nested_reply
+        for i in range(5):
+            parent = self.create_comment(f'Level {i}', parent=parent)
+        cache.clear()
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as deep:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Level 4')
+        self.assertEqual(len(deep), len(shallow))
+
+
+class PostExcerptTestCase(TestCase):
+    """
+    Test case for the stored plain-text post excerpt.
+
+    Methods:
+        setUp(): Create a post with rich content for testing.
+        test_excerpt_is_stored_on_save(): Test that saving a post stores its plain-text excerpt.
+        test_excerpt_without_content(): Test that the excerpt is read without loading the content.
+        test_backfill_command(): Test that the management command fills in missing excerpts.
+    """
+    def setUp(self) -> None:
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.post = Post.objects.create(title='Test Post', content='<p>Rich <b>content</b></p>' + 'x' * 200,
+                                        author=user, category=PostCategory.objects.create(name='Test Category'))
+
+    def test_excerpt_is_stored_on_save(self) -> None:
+        self.assertEqual(Post.objects.get(pk=self.post.pk).excerpt, ('Rich content' + 'x' * 200)[:150])
+        self.post.content = '<p>Updated</p>'
+        self.post.save(update_fields=['content'])
+        self.assertEqual(Post.objects.get(pk=self.post.pk).truncated_content(), 'Updated')
+
+    def test_excerpt_without_content(self) -> None:
+        post = Post.objects.defer('content').get(pk=self.post.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(post.truncated_content().startswith('Rich content'))
+
+    def test_backfill_command(self) -> None:
+        Post.objects.update(excerpt='')
+        call_command('backfill_post_excerpts', stdout=StringIO())
+        self.assertTrue(Post.objects.get(pk=self.post.pk).excerpt.startswith('Rich content'))
+
+
+class MenuFragmentCacheTestCase(TestCase):
+    """
+    Test case for the versioned menu and shop fragment cache.
+
+    Methods:
+        setUp(): Create a category and a dish for testing.
+        test_menu_grid_is_cached(): Test that a warm menu page does not query categories or dishes.
+        test_dish_change_invalidates_fragments(): Test that editing a dish shows up on the next render.
+        test_version_is_shared(): Test that a version bumped by another worker is seen despite the local cache.
+        test_shop_grid_has_no_cached_csrf_token(): Test that the cached shop grid does not embed a CSRF token.
+    """
+    def setUp(self) -> None:
+        cache.clear()
+        self.category = DishCategory.objects.create(name='Coffee', order=1)
+        self.dish = Dish.objects.create(name='Latte', slug='latte', price=3.50, order=1, category=self.category,
+                                        photo='dishes/latte.jpg')
+
+    def test_menu_grid_is_cached(self) -> None:
+        for url in (reverse('coffee:menu'), reverse('coffee:shop')):
+            self.client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertContains(response, 'Latte')
+            self.assertFalse([query for query in queries.captured_queries if 'coffee_dish' in query['sql']])
+
+    def test_dish_change_invalidates_fragments(self) -> None:
+        self.client.get(reverse('coffee:menu'))
+        self.client.get(reverse('coffee:shop'))
+        self.dish.name = 'Flat White'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dish.save()
+        self.assertContains(self.client.get(reverse('coffee:menu')), 'Flat White')
+        self.assertContains(self.client.get(reverse('coffee:shop')), 'Flat White')
+
+    def test_version_is_shared(self) -> None:
+        version = get_menu_version()
+        cache.clear()
+        self.assertEqual(get_menu_version(), version)
+
+        self.client.get(reverse('coffee:menu'))
+        Dish.objects.filter(pk=self.dish.pk).update(name='Cortado')
+        caches['shared'].set(MENU_VERSION_CACHE_KEY, 'bumped by another worker', None)
+        self.assertEqual(get_menu_version(), 'bumped by another worker')
+        self.assertContains(self.client.get(reverse('coffee:menu')), 'Cortado')
+
+    def test_shop_grid_has_no_cached_csrf_token(self) -> None:
+        response = self.client.get(reverse('coffee:shop'))
+        self.assertContains(response, 'csrfmiddlewaretoken', count=1)
+        self.assertContains(response, 'form="add-to-cart-form"')
+
+
+class VisibleDishesPrefetchTestCase(TestCase):
+    """
+    Test case for prefetching visible dishes of visible categories.
+
+    Methods:
+        setUp(): Create visible and hidden categories and dishes for testing.
+        test_with_visible_dishes(): Test that hidden rows are filtered out in two queries.
+        test_iter_uses_prefetch(): Test that iterating a prefetched category runs no queries.
+        test_menu_page_queries(): Test that the menu grid costs exactly two queries.
+    """
+    def setUp(self) -> None:
+        cache.clear()
+        self.category = DishCategory.objects.create(name='Coffee', order=1)
+        DishCategory.objects.create(name='Hidden Category', order=2, is_visible=False)
+        self.second = Dish.objects.create(name='Mocha', slug='mocha', price=4.00, order=2, category=self.category,
+                                          photo='dishes/mocha.jpg')
+        self.first = Dish.objects.create(name='Latte', slug='latte', price=3.50, order=1, category=self.category,
+                                         photo='dishes/latte.jpg')
+        Dish.objects.create(name='Hidden Dish', slug='hidden-dish', price=1.00, order=3, category=self.category,
+                            is_visible=False, photo='dishes/hidden.jpg')
+
+    def test_with_visible_dishes(self) -> None:
+        with self.assertNumQueries(2):
+            categories = list(DishCategory.objects.with_visible_dishes())
+        self.assertEqual(categories, [self.category])
+        self.assertEqual(categories[0].visible_dishes, [self.first, self.second])
+
+    def test_iter_uses_prefetch(self) -> None:
+        category = DishCategory.objects.with_visible_dishes().get()
+        with self.assertNumQueries(0):
+            self.assertEqual(list(category), [self.first, self.second])
+
+    def test_menu_page_queries(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('coffee:menu'))
+        grid_queries = [query for query in queries.captured_queries
+                        if 'coffee_dish"' in query['sql'] or 'coffee_dishcategory"' in query['sql']]
+        self.assertEqual(len(grid_queries), 2)
+        self.assertNotContains(response, 'Hidden Dish')
+        self.assertNotContains(response, 'Hidden Category')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class RenditionsTestCase(TestCase):
+    """
+    Test case for the responsive image renditions.
+
+    Methods:
+        setUp(): Create a dish with a real photo for testing.
+        tearDown(): Remove the temporary media directory.
+        test_renditions_generated_on_save(): Test that saving a dish stores and records every rendition.
+        test_rendition_url(): Test that the rendition URL uses the recorded renditions without storage lookups.
+        test_renditions_replaced(): Test that replacing or deleting a photo deletes its renditions.
+        test_unreadable_image(): Test that an unreadable image does not raise.
+        test_generate_renditions_command(): Test that the management command backfills missing renditions.
+    """
+    def setUp(self) -> None:
+        self.category = DishCategory.objects.create(name='Test Category', order=1)
+        self.dish = Dish.objects.create(name='Latte', slug='latte', price=3.50, order=1, category=self.category,
+                                        photo=self.make_photo('latte.jpg'))
+
+    def tearDown(self) -> None:
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+
+    @staticmethod
+    def make_photo(name: str) -> SimpleUploadedFile:
+        buffer = BytesIO()
+        PILImage.new('RGB', (1600, 1200), 'brown').save(buffer, 'JPEG')
+        return SimpleUploadedFile(name, buffer.getvalue())
+
+    def test_renditions_generated_on_save(self) -> None:
+        storage = self.dish.photo.storage
+        names = [get_rendition_name(self.dish.photo.name, size) for size in RENDITION_SIZES]
+        self.assertEqual(Dish.objects.get(pk=self.dish.pk).renditions, names)
+        for (size, box), name in zip(RENDITION_SIZES.items(), names):
+            with storage.open(name) as rendition_file:
+                rendition = PILImage.open(rendition_file)
+                self.assertEqual(rendition.format, 'WEBP')
+                width, height = rendition.size
+            self.assertEqual(width, box[0])
+            self.assertLessEqual(height, box[1])
+
+    def test_rendition_url(self) -> None:
+        dish = Dish.objects.get(pk=self.dish.pk)
+        with mock.patch.object(dish.photo.storage, 'exists') as exists:
+            self.assertTrue(get_rendition_url(dish.photo, 'small').endswith('/dishes/latte.small.webp'))
+            dish.renditions = []
+            self.assertEqual(get_rendition_url(dish.photo, 'small'), dish.photo.url)
+        exists.assert_not_called()
+
+    def test_renditions_replaced(self) -> None:
+        storage = self.dish.photo.storage
+        old_renditions = list(self.dish.renditions)
+        self.dish.photo = self.make_photo('mocha.jpg')
+        self.dish.save()
+        self.assertFalse(any(storage.exists(name) for name in old_renditions))
+        self.assertTrue(all(storage.exists(name) for name in self.dish.renditions))
+
+        new_renditions = list(self.dish.renditions)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dish.delete()
+        self.assertFalse(any(storage.exists(name) for name in new_renditions))
+
+    def test_unreadable_image(self) -> None:
+        self.dish.photo = SimpleUploadedFile('broken.jpg', b'not an image')
+        with self.assertLogs('coffee.renditions', 'WARNING'):
+            self.dish.save()
+        self.assertEqual(self.dish.renditions, [])
+
+    def test_generate_renditions_command(self) -> None:
+        name = get_rendition_name(self.dish.photo.name, 'thumb')
+        self.dish.photo.storage.delete(name)
+        Dish.objects.filter(pk=self.dish.pk).update(renditions=[])
+        out = StringIO()
+        call_command('generate_renditions', stdout=out)
+        self.assertIn('Generated 1 renditions.', out.getvalue())
+        self.assertEqual(Dish.objects.get(pk=self.dish.pk).renditions,
+                         [get_rendition_name(self.dish.photo.name, size) for size in RENDITION_SIZES])
+
+
+class CartStorageTestCase(TestCase):
+    """
+    Test case for the pluggable cart storage backends.
+
+    Methods:
+        setUp(): Create a dish for testing.
+        test_clean_cart(): Test that invalid ids and quantities are dropped and limits are applied.
+        test_signed_cookie_storage(): Test that cart changes go to a signed cookie without database writes.
+        test_tampered_cookie_is_ignored(): Test that a cookie with a bad signature yields an empty cart.
+        test_cache_storage(): Test that the cache backend keeps the cart under the id stored in the cookie.
+        test_cache_storage_requires_shared_cache(): Test that the cache backend refuses a per-process cache.
+        test_shared_cache_keeps_many_carts(): Test that the database fallback of the shared cache does not cull carts.
+        test_session_storage(): Test that the session backend keeps the cart in the session.
+    """
+    def setUp(self) -> None:
+        category = DishCategory.objects.create(name='Test Category', order=1)
+        self.dish = Dish.objects.create(name='Latte', slug='latte', price=3.50, order=1, category=category)
+
+    def add_to_cart(self, quantity: int = 2):
+        return self.client.post(reverse('coffee:add_to_cart'), {'product_id': self.dish.id, 'quantity': quantity})
+
+    @override_settings(CART_MAX_LINES=2, CART_MAX_QUANTITY=10)
+    def test_clean_cart(self) -> None:
+        self.assertEqual(clean_cart({'1': 3, 'abc': 1, '0': 1, '2': -1, '3': 'x', '4': True, '5': 50, '6': 1}),
+                         {'1': 3, '5': 10})
+        self.assertEqual(clean_cart(['1', 2]), {})
+
+    def test_signed_cookie_storage(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.add_to_cart()
+        self.assertFalse([query for query in queries.captured_queries
+                          if not query['sql'].startswith('SELECT')])
+        self.assertIn('cart', response.cookies)
+        self.assertEqual(self.client.get(reverse('coffee:cart')).context['cart_items_count'], 2)
+
+    def test_tampered_cookie_is_ignored(self) -> None:
+        self.client.cookies['cart'] = SignedCookieCartStorage.encode({str(self.dish.id): 2}) + 'x'
+        response = self.client.get(reverse('coffee:cart'))
+        self.assertEqual(response.context['cart_items_count'], 0)
+
+    @override_settings(CART_STORAGE='coffee.cart_storage.CacheCartStorage')
+    def test_cache_storage(self) -> None:
+        response = self.add_to_cart()
+        cart_id = response.cookies['cart'].value
+        self.assertEqual(caches['shared'].get(f'coffee:cart:{cart_id}'), {str(self.dish.id): 2})
+        self.add_to_cart(quantity=1)
+        self.assertEqual(caches['shared'].get(f'coffee:cart:{cart_id}'), {str(self.dish.id): 3})
+
+    @override_settings(CART_STORAGE='coffee.cart_storage.CacheCartStorage', CART_CACHE_ALIAS='default')
+    def test_cache_storage_requires_shared_cache(self) -> None:
+        with self.assertRaises(ImproperlyConfigured):
+            self.add_to_cart()
+
+    def test_shared_cache_keeps_many_carts(self) -> None:
+        shared_cache = caches['shared']
+        shared_cache.set_many({f'coffee:cart:{number}': {'1': 1} for number in range(400)})
+        self.assertEqual(len(shared_cache.get_many([f'coffee:cart:{number}' for number in range(400)])), 400)
+
+    @override_settings(CART_STORAGE='coffee.cart_storage.SessionCartStorage')
+    def test_session_storage(self) -> None:
+        self.add_to_cart()
+        self.assertEqual(self.client.session['cart'], {str(self.dish.id): 2})
+
+
+class CartJsonTestCase(TestCase):
+    """
+    Test case for the JSON cart endpoints.
+
+    Methods:
+        setUp(): Create dishes for testing.
+        test_add_to_cart(): Test that adding returns the updated line and totals from a single query.
+        test_add_hidden_dish(): Test that hidden dishes are rejected and not kept in the cart.
+        test_invalid_input(): Test that malformed product ids and quantities are rejected.
+        test_leading_zeros(): Test that product ids with leading zeros address the same cart line.
+        test_update_cart(): Test that updating returns the new line total.
+        test_remove_from_cart(): Test that removing returns a null line and the remaining totals.
+        test_cart_page_lines(): Test that every cart line row carries the id the cart script updates it by.
+    """
+    def setUp(self) -> None:
+        category = DishCategory.objects.create(name='Test Category', order=1)
+        self.latte = Dish.objects.create(name='Latte', slug='latte', price=3.50, order=1, category=category)
+        self.mocha = Dish.objects.create(name='Mocha', slug='mocha', price=4.00, order=2, category=category)
+        self.hidden = Dish.objects.create(name='Hidden', slug='hidden', price=1.00, order=3, category=category,
+                                          is_visible=False)
+
+    def post(self, name: str, product_id, quantity=None):
+        data = {'product_id': product_id}
+        if quantity is not None:
+            data['quantity'] = quantity
+        return self.client.post(reverse(f'coffee:{name}'), data)
+
+    def test_add_to_cart(self) -> None:
+        self.post('add_to_cart_json', self.mocha.id)
+        with self.assertNumQueries(1):
+            response = self.post('add_to_cart_json', self.latte.id, 2)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['line'], {'product_id': self.latte.id, 'name': 'Latte', 'price': '3.50',
+                                        'quantity': 2, 'total_for_product': '7.00'})
+        self.assertEqual(data['cart']['items_count'], 3)
+        self.assertEqual(data['cart']['total_amount'], '11.00')
+        self.assertEqual(len(data['cart']['lines']), 2)
+
+    def test_add_hidden_dish(self) -> None:
+        response = self.post('add_to_cart_json', self.hidden.id)
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn(str(self.hidden.id), get_cart(response.wsgi_request))
+
+    def test_invalid_input(self) -> None:
+        self.assertEqual(self.post('add_to_cart_json', 'abc').status_code, 400)
+        self.assertEqual(self.post('add_to_cart_json', self.latte.id, 0).status_code, 400)
+        self.assertEqual(self.post('update_cart_json', self.latte.id, 'x').status_code, 400)
+        self.assertEqual(self.post('update_cart_json', self.latte.id, 2).status_code, 404)
+
+    def test_leading_zeros(self) -> None:
+        padded = f'0{self.latte.id}'
+        data = self.post('add_to_cart_json', padded, 2).json()
+        self.assertEqual(data['line']['quantity'], 2)
+        self.post('add_to_cart', padded)
+        self.assertEqual(self.post('update_cart_json', padded, 4).json()['line']['quantity'], 4)
+
+        response = self.post('remove_from_cart_json', padded)
+        self.assertIsNone(response.json()['line'])
+        self.assertEqual(get_cart(response.wsgi_request), {})
+
+    def test_update_cart(self) -> None:
+        self.post('add_to_cart_json', self.latte.id)
+        data = self.post('update_cart_json', self.latte.id, 4).json()
+        self.assertEqual(data['line']['quantity'], 4)
+        self.assertEqual(data['line']['total_for_product'], '14.00')
+        self.assertEqual(data['cart']['items_count'], 4)
+
+    def test_remove_from_cart(self) -> None:
+        self.post('add_to_cart_json', self.latte.id)
+        self.post('add_to_cart_json', self.mocha.id)
+        data = self.post('remove_from_cart_json', self.latte.id).json()
+        self.assertIsNone(data['line'])
+        self.assertEqual(data['cart']['items_count'], 1)
+        self.assertEqual(data['cart']['total_amount'], '4.00')
+
+    def test_cart_page_lines(self) -> None:
+        self.post('add_to_cart_json', self.latte.id)
+        self.post('add_to_cart_json', self.mocha.id)
+        content = self.client.get(reverse('coffee:cart')).content.decode()
+        self.assertEqual(content.count('data-cart-line="'), 2)
+        self.assertIn(f'<tr class="text-center" data-cart-line="{self.latte.id}">', content)
+        self.assertIn(f'<tr class="text-center" data-cart-line="{self.mocha.id}">', content)
+
+
+class OutboxTestCase(TestCase):
+    """
+    Test case for the outgoing email queue.
+
+    Methods:
+        test_contact_form_enqueues(): Test that the contact form queues the email instead of sending it.
+        test_contact_form_bad_header(): Test that header injection is rejected when queueing.
+        test_send_queued_emails(): Test that due emails are sent in one batch and marked as sent.
+        test_failed_email_is_retried(): Test that failures are retried with backoff and finally given up.
+        test_failure_keeps_other_outcomes(): Test that any error is recorded for its email only.
+        test_claimed_emails_are_leased(): Test that claimed emails are skipped until their lease runs out.
+        test_command(): Test that the management command drains the outbox.
+    """
+    def test_contact_form_enqueues(self) -> None:
+        response = self.client.post(reverse('coffee:contact'), {
+            'subject': 'Hello', 'message': 'A question', 'email': 'guest@example.com'})
+        self.assertRedirects(response, reverse('coffee:home'))
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual((email.to, email.reply_to), ([settings.CONTACT_EMAIL], ['guest@example.com']))
+
+    def test_contact_form_bad_header(self) -> None:
+        response = self.client.post(reverse('coffee:contact'), {
+            'subject': 'Hello\nBcc: victim@example.com', 'message': 'Spam', 'email': 'guest@example.com'})
+        self.assertContains(response, 'Invalid header found.')
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_send_queued_emails(self) -> None:
+        for number in range(3):
+            enqueue_email(f'Subject {number}', 'Body', ['guest@example.com'])
+        later = enqueue_email('Later', 'Body', ['guest@example.com'])
+        OutgoingEmail.objects.filter(pk=later.pk).update(next_attempt_at=timezone.now() + timedelta(hours=1))
+
+        with mock.patch('coffee.outbox.get_connection', wraps=mail.get_connection) as get_connection:
+            self.assertEqual(send_queued_emails(), (3, 0))
+        get_connection.assert_called_once()
+        self.assertEqual([message.subject for message in mail.outbox], ['Subject 0', 'Subject 1', 'Subject 2'])
+        self.assertEqual(OutgoingEmail.objects.filter(status=OutgoingEmail.STATUS_SENT).count(), 3)
+        self.assertEqual(send_queued_emails(), (0, 0))
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_failed_email_is_retried(self) -> None:
+        email = enqueue_email('Subject', 'Body', ['guest@example.com'])
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=smtplib.SMTPServerDisconnected('Connection lost')):
+            self.assertEqual(send_queued_emails(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), (OutgoingEmail.STATUS_PENDING, 1))
+            self.assertGreater(email.next_attempt_at, timezone.now())
+
+            OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(send_queued_emails(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), (OutgoingEmail.STATUS_FAILED, 2))
+            self.assertEqual(email.last_error, 'Connection lost')
+
+    def test_failure_keeps_other_outcomes(self) -> None:
+        first = enqueue_email('First', 'Body', ['guest@example.com'])
+        broken = enqueue_email('Broken', 'Body', ['guest@example.com'])
+        last = enqueue_email('Last', 'Body', ['guest@example.com'])
+        build_message = outbox.build_message
+
+        def build_broken_message(email, connection=None):
+            if email.pk == broken.pk:
+                raise ValueError('Bad header')
+            return build_message(email, connection)
+
+        with mock.patch('coffee.outbox.build_message', side_effect=build_broken_message):
+            self.assertEqual(send_queued_emails(), (2, 1))
+        self.assertEqual([message.subject for message in mail.outbox], ['First', 'Last'])
+        statuses = dict(OutgoingEmail.objects.values_list('pk', 'status'))
+        self.assertEqual((statuses[first.pk], statuses[broken.pk], statuses[last.pk]),
+                         (OutgoingEmail.STATUS_SENT, OutgoingEmail.STATUS_PENDING, OutgoingEmail.STATUS_SENT))
+        broken.refresh_from_db()
+        self.assertEqual((broken.attempts, broken.last_error), (1, 'Bad header'))
+
+    def test_claimed_emails_are_leased(self) -> None:
+        email = enqueue_email('Subject', 'Body', ['guest@example.com'])
+        self.assertEqual(claim_due_emails(10), [email])
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.STATUS_SENDING)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertEqual(send_queued_emails(), (0, 0))
+
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(send_queued_emails(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_command(self) -> None:
+        enqueue_email('Subject', 'Body', ['guest@example.com'])
+        call_command('send_queued_emails', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+
+
+@override_settings(MIDDLEWARE=[middleware for middleware in settings.MIDDLEWARE if 'whitenoise' not in middleware])
+class AsyncPagesTestCase(TestCase):
+    """
+    Test case for the read-only pages served by async views, with the middleware of the ASGI profile.
+
+    Methods:
+        setUp(): Create a post, a category and a dish for testing.
+        test_views_are_async(): Test that the read-only pages are async views.
+        test_async_pages(): Test that the pages render through the async request handler.
+        test_blog_filters(): Test that the blog page filters by category and tag and rejects unknown ones.
+        test_missing_post(): Test that an unknown post returns 404.
+        test_index_hides_hidden_dishes(): Test that the home page only lists visible dishes of visible categories.
+        test_static_files(): Test that WhiteNoise serves static files in front of the ASGI application.
+    """
+    def setUp(self) -> None:
+        cache.clear()
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.category = PostCategory.objects.create(name='Test Post Category')
+        self.tag = Tag.objects.create(tag_name='Test Tag')
+        self.post = Post.objects.create(title='Post', content='<p>Content</p>', author=user, category=self.category)
+        self.post.tags.add(self.tag)
+        dish_category = DishCategory.objects.create(name='Coffee', order=1)
+        Dish.objects.create(name='Latte', slug='latte', price=3.50, order=1, category=dish_category,
+                            photo='dishes/latte.jpg')
+
+    def test_views_are_async(self) -> None:
+        for view in (IndexPage, MenuPage, BlogPage, BlogSinglePage, ShopPage):
+            self.assertTrue(view.view_is_async, view.__name__)
+
+    async def test_async_pages(self) -> None:
+        for url in (reverse('coffee:home'), reverse('coffee:menu'), reverse('coffee:shop'),
+                    reverse('coffee:blog'), reverse('coffee:blog_single', args=[self.post.id])):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+
+    async def test_blog_filters(self) -> None:
+        response = await self.async_client.get(reverse('coffee:blog'),
+                                               {'category': self.category.id, 'tag': self.tag.id})
+        self.assertEqual([post.id for post in response.context['page_obj']], [self.post.id])
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+
+        response = await self.async_client.get(reverse('coffee:blog'), {'tag': self.tag.id + 1})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_missing_post(self) -> None:
+        response = await self.async_client.get(reverse('coffee:blog_single', args=[self.post.id + 1]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_index_hides_hidden_dishes(self) -> None:
+        category = await DishCategory.objects.acreate(name='Desserts', order=2)
+        await Dish.objects.acreate(name='Cake', slug='cake', price=2, order=1, category=category)
+        await Dish.objects.acreate(name='Secret cake', slug='secret-cake', price=2, order=2, category=category,
+                                   is_visible=False)
+        hidden_category = await DishCategory.objects.acreate(name='Hidden', order=3, is_visible=False)
+        await Dish.objects.acreate(name='Hidden pie', slug='hidden-pie', price=2, order=1, category=hidden_category)
+
+        response = await self.async_client.get(reverse('coffee:home'))
+        categories = response.context['categories']
+        self.assertEqual([[dish.name for dish in category.visible_dishes] for category in categories], [['Cake']])
+        self.assertNotContains(response, 'Secret cake')
+        self.assertNotContains(response, 'Hidden pie')
+
+    async def test_static_files(self) -> None:
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root)
+        with open(os.path.join(static_root, 'site.css'), 'w') as css_file:
+            css_file.write('body { color: brown; }')
+
+        async def django_application(scope, receive, send):
+            await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+            await send({'type': 'http.response.body', 'body': b'django'})
+
+        async def call(path: str, headers=()) -> tuple:
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            await application({'type': 'http', 'method': 'GET', 'path': path, 'headers': list(headers)}, None, send)
+            return (messages[0]['status'], dict(messages[0]['headers']),
+                    b''.join(message.get('body', b'') for message in messages[1:]))
+
+        with override_settings(STATIC_ROOT=static_root, STATIC_URL='/static/'):
+            application = WhiteNoiseASGI(django_application)
+        status, headers, body = await call('/static/site.css')
+        self.assertEqual((status, body), (200, b'body { color: brown; }'))
+        self.assertIn(b'max-age', headers[b'cache-control'])
+        status, _, body = await call('/static/site.css', [(b'if-none-match', headers[b'etag'])])
+        self.assertEqual((status, body), (304, b''))
+        self.assertEqual(await call('/menu/'), (200, {}, b'django'))
+
+
+@override_settings(RESERVATION_SLOT_CAPACITY=2, RESERVATION_SLOT_MINUTES=30,
+                   RESERVATION_OPENING_TIME='08:00', RESERVATION_CLOSING_TIME='10:00')
+class ReservationSlotTestCase(TestCase):
+    """
+    Test case for the reservation availability index.
+
+    Methods:
+        create_reservation(name, reservation_time): Create a reservation for testing.
+        test_reservation_books_slot(): Test that saving a reservation books its slot.
+        test_full_slot_is_rejected(): Test that a booking over the slot capacity is rejected.
+        test_move_and_delete(): Test that moving or deleting a reservation frees its slot.
+        test_reservation_form(): Test that the form rejects closed hours and full slots.
+        test_full_slot_message(): Test that the booking pages show why a booking was rejected.
+        test_slots_endpoint(): Test that the free slots of a date come from one query.
+        test_rebuild_command(): Test that the index can be rebuilt from the reservations.
+    """
+    def setUp(self) -> None:
+        self.date = timezone.localdate() + timedelta(days=1)
+
+    def create_reservation(self, name: str, reservation_time: time = time(8, 10)) -> Reservation:
+        return Reservation.objects.create(name=name, last_name=f'{name} Doe', date=self.date,
+                                          time=reservation_time, phone='+380123456789', message=name)
+
+    def test_reservation_books_slot(self) -> None:
+        self.create_reservation('Anna')
+        slot = ReservationSlot.objects.get(date=self.date)
+        self.assertEqual((slot.time, slot.booked, slot.capacity), (time(8, 0), 1, 2))
+
+    def test_full_slot_is_rejected(self) -> None:
+        self.create_reservation('Anna')
+        self.create_reservation('Boris', time(8, 20))
+        with self.assertRaises(ValidationError):
+            self.create_reservation('Clara', time(8, 29))
+        self.assertEqual(Reservation.objects.count(), 2)
+        self.assertEqual(ReservationSlot.objects.get(date=self.date).booked, 2)
+
+    def test_move_and_delete(self) -> None:
+        reservation = self.create_reservation('Anna')
+        reservation.time = time(9, 0)
+        reservation.save()
+        self.assertEqual(dict(ReservationSlot.objects.values_list('time', 'booked')),
+                         {time(8, 0): 0, time(9, 0): 1})
+
+        reservation.delete()
+        self.assertEqual(ReservationSlot.objects.get(time=time(9, 0)).booked, 0)
+
+    def test_reservation_form(self) -> None:
+        self.create_reservation('Anna')
+        self.create_reservation('Boris')
+        data = {'name': 'Clara', 'last_name': 'Clara Doe', 'date': self.date.isoformat(),
+                'phone': '+380123456789', 'message': 'Clara'}
+
+        form = ReservationForm({**data, 'time': '08:15AM'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('This time slot is fully booked.', form.non_field_errors())
+
+        form = ReservationForm({**data, 'time': '11:00PM'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('time', form.errors)
+
+        self.assertTrue(ReservationForm({**data, 'time': '09:30AM'}).is_valid())
+
+    def test_full_slot_message(self) -> None:
+        self.create_reservation('Anna')
+        self.create_reservation('Boris')
+        data = {'name': 'Clara', 'last_name': 'Clara Doe', 'date': self.date.isoformat(), 'time': '08:15AM',
+                'phone': '+380123456789', 'message': 'Clara'}
+
+        for url in (reverse('coffee:home'), reverse('coffee:menu')):
+            response = self.client.post(url, data)
+            self.assertContains(response, 'This time slot is fully booked.')
+            self.assertContains(response, 'value="Clara Doe"')
+        self.assertEqual(Reservation.objects.count(), 2)
+
+    def test_slots_endpoint(self) -> None:
+        self.create_reservation('Anna')
+        self.create_reservation('Boris')
+        self.create_reservation('Clara', time(9, 0))
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('coffee:reservation_slots'), {'date': self.date.isoformat()})
+        data = response.json()
+        self.assertEqual(data['free_slots'], ['08:30', '09:00', '09:30'])
+        self.assertEqual(data['slots'][2], {'time': '09:00', 'capacity': 2, 'booked': 1, 'free': 1})
+
+        response = self.client.get(reverse('coffee:reservation_slots'), {'date': '2024-13-45'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rebuild_command(self) -> None:
+        self.create_reservation('Anna')
+        self.create_reservation('Boris', time(9, 0))
+        ReservationSlot.objects.all().delete()
+
+        call_command('rebuild_reservation_slots', stdout=StringIO())
+        self.assertEqual(dict(ReservationSlot.objects.values_list('time', 'booked')),
+                         {time(8, 0): 1, time(9, 0): 1})
+
+
+class SearchTestCase(TestCase):
+    """
+    Test case for the full-text search of posts and dishes.
+
+    Methods:
+        setUp(): Create posts and dishes for testing.
+        test_search_posts(): Test that posts are matched by stemmed words and ranked by title first.
+        test_index_follows_changes(): Test that the index follows updates and deletions.
+        test_search_dishes(): Test that visible dishes are matched by name and description.
+        test_hidden_category(): Test that the dishes of a hidden category are not found.
+        test_html_not_indexed(): Test that the tags and attributes of the post content are not matched.
+        test_search_page(): Test that the search page renders the results and ignores search syntax.
+        test_admin_search(): Test that the admin searches hidden posts through the index too.
+        test_rebuild_command(): Test that the rebuild command restores a dropped index.
+    """
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        post_category = PostCategory.objects.create(name='News')
+        self.title_post = Post.objects.create(title='Brewing at home', content='<p>Grind fresh beans.</p>',
+                                              author=self.user, category=post_category)
+        self.content_post = Post.objects.create(title='Our new cafe', content='<p>We brewed a new blend.</p>',
+                                                author=self.user, category=post_category)
+        Post.objects.create(title='Hidden brew', content='<p>Draft</p>', author=self.user, category=post_category,
+                            is_visible=False)
+        category = DishCategory.objects.create(name='Coffee', order=1)
+        self.latte = Dish.objects.create(name='Latte', slug='latte', price=3, order=1, category=category,
+                                         description='Espresso with steamed milk')
+        Dish.objects.create(name='Secret latte', slug='secret-latte', price=5, order=2, category=category,
+                            is_visible=False)
+
+    def test_search_posts(self) -> None:
+        self.assertEqual(search(Post.objects.all(), 'brew', 10), [self.title_post, self.content_post])
+        self.assertEqual(search(Post.objects.all(), 'brew beans', 10), [self.title_post])
+        self.assertEqual(search(Post.objects.all(), 'brew', 1), [self.title_post])
+        self.assertEqual(search(Post.objects.all(), 'tea', 10), [])
+
+    def test_index_follows_changes(self) -> None:
+        self.content_post.content = '<p>Tea time</p>'
+        self.content_post.save()
+        self.assertEqual(search(Post.objects.all(), 'brew', 10), [self.title_post])
+        self.assertEqual(search(Post.objects.all(), 'tea', 10), [self.content_post])
+
+        self.content_post.delete()
+        self.assertEqual(search(Post.objects.all(), 'tea', 10), [])
+
+    def test_search_dishes(self) -> None:
+        self.assertEqual(search(Dish.objects.all(), 'latte', 10), [self.latte])
+        self.assertEqual(search(Dish.objects.all(), 'milk', 10), [self.latte])
+
+    def test_hidden_category(self) -> None:
+        DishCategory.objects.filter(pk=self.latte.category_id).update(is_visible=False)
+        self.assertEqual(search(Dish.objects.all(), 'latte', 10), [])
+
+    def test_html_not_indexed(self) -> None:
+        post = Post.objects.create(title='Opening hours', content='<p class="strong"><span>Open daily</span></p>',
+                                   author=self.user, category=self.title_post.category)
+        self.assertEqual(search(Post.objects.all(), 'daily', 10), [post])
+        self.assertEqual(search(Post.objects.all(), 'strong', 10), [])
+        self.assertEqual(search(Post.objects.all(), 'span', 10), [])
+
+    def test_search_page(self) -> None:
+        response = self.client.get(reverse('coffee:search'), {'q': 'latte brewing'})
+        self.assertEqual((response.context['posts'], response.context['dishes']), ([], []))
+
+        response = self.client.get(reverse('coffee:search'), {'q': 'brewing'})
+        self.assertEqual(response.context['posts'], [self.title_post, self.content_post])
+        self.assertContains(response, 'Brewing at home')
+
+        for query in ('"latte', 'latte OR NEAR(', 'content:milk*', '--'):
+            response = self.client.get(reverse('coffee:search'), {'q': query})
+            self.assertEqual(response.status_code, 200, query)
+        self.assertEqual(make_fts_query('latte OR "milk'), '"latte" "OR" "milk"')
+
+    def test_admin_search(self) -> None:
+        self.client.force_login(User.objects.create_superuser(username='admin', password='testpassword'))
+        response = self.client.get(reverse('admin:coffee_post_changelist'), {'q': 'brew'})
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+    def test_rebuild_command(self) -> None:
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('DROP TABLE coffee_post_fts')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(search(Post.objects.all(), 'beans', 10), [self.title_post])
+        Post.objects.create(title='Cold brew', content='<p>Beans</p>', author=self.user,
+                            category=self.title_post.category)
+        self.assertEqual(len(search(Post.objects.all(), 'beans', 10)), 2)
+
+
+class QueryBudgetTestCase(QueryBudgetTestMixin, TestCase):
+    """
+    Test case for the query budgets of the views.
+
+    Methods:
+        setUp(): Seed posts, dishes, reservations and orders and log in a staff manager.
+        test_budgets(): Test that every coffee and manager page stays within its query budget.
+        test_budgets_do_not_grow(): Test that the budgeted pages do not run more queries with more data.
+        test_post_budgets(): Test that valid and invalid form submissions stay within the query budgets.
+        test_budget_declarations(): Test the budget decorator, the default budget and the budget checks.
+    """
+    budget_skip = ('manager:events',)
+
+    def setUp(self) -> None:
+        cache.clear()
+        user = User.objects.create_user(username='manager', password='testpassword', is_staff=True)
+        user.groups.add(Group.objects.create(name='manager'))
+        self.client.force_login(user)
+        self.seed(3)
+
+    def seed(self, count: int) -> None:
+        user = User.objects.get(username='manager')
+        post_category, _ = PostCategory.objects.get_or_create(name='News')
+        tag, _ = Tag.objects.get_or_create(tag_name='Coffee')
+        dish_category, _ = DishCategory.objects.get_or_create(name='Coffee', defaults={'order': 1})
+        start = Post.objects.count()
+        for number in range(start, start + count):
+            post = Post.objects.create(title=f'Post {number}', content='<p>Content</p>', author=user,
+                                       category=post_category)
+            post.tags.add(tag)
+            comment = Comment.objects.create(post=post, content='Nice', email='a@example.com', author='Anna')
+            Comment.objects.create(post=post, content='Thanks', email='b@example.com', author='Boris', parent=comment)
+            dish = Dish.objects.create(name=f'Dish {number}', slug=f'dish-{number}', price=3, order=number,
+                                       category=dish_category)
+            Reservation.objects.create(name=f'Guest {number}', last_name='Doe', date=timezone.localdate(),
+                                       time=time(8 + number % 12, 0), phone='+380123456789')
+            order = Order.objects.create()
+            user_data = UserData.objects.create(order=order, first_name='John', last_name='Doe',
+                                                street_name='Main St', house_number='1', phone='+380123456789',
+                                                email_address='john@example.com')
+            OrderDishesList.objects.create(order=order, user_data=user_data, dish=dish, price=3, quantity=1)
+        self.budget_url_kwargs = {
+            'coffee:blog_single': {'id': Post.objects.first().id},
+            'manager:edit_reservations': {'pk': Reservation.objects.first().pk},
+            'manager:order_status': {'pk': Order.objects.first().pk},
+        }
+        self.budget_url_params = {
+            'coffee:reservation_slots': {'date': timezone.localdate().isoformat()},
+            'coffee:search': {'q': 'content'},
+        }
+        reservation = Reservation.objects.first()
+        booking = {'name': 'Anna', 'last_name': 'Doe', 'date': (timezone.localdate() + timedelta(days=1)).isoformat(),
+                   'time': '10:00AM', 'phone': '+380123456789'}
+        edit = {'name': reservation.name, 'last_name': 'Doe', 'date': reservation.date.isoformat(),
+                'phone': '+380123456789', 'is_precessed': 'on'}
+        billing = {'first_name': 'John', 'last_name': 'Doe', 'street_name': 'Main St', 'house_number': '1',
+                   'phone': '+380123456789', 'email_address': 'john@example.com'}
+        self.budget_post_data = {
+            'coffee:home': [booking, {}],
+            'coffee:menu': [booking, {}],
+            'coffee:blog_single': [{'content': 'Lovely'}, {}],
+            'manager:edit_reservations': [{**edit, 'version': reservation.updated_at.isoformat()}, edit],
+            'coffee:checkout': [{}, billing],
+            'manager:bulk_reservations': [{'action': 'process', 'all_matching': 'on'}, {}],
+            'manager:order_status': [{'status': Order.STATUS_PREPARING}, {'status': 'burnt'}],
+        }
+        self.client.post(reverse('coffee:add_to_cart'), {'product_id': Dish.objects.first().id, 'quantity': 1})
+
+    def test_budgets(self) -> None:
+        self.assertQueryBudgets()
+
+    def test_budgets_do_not_grow(self) -> None:
+        query_counts = self.assertQueryBudgets()
+        self.seed(10)
+        cache.clear()
+        caches['shared'].clear()
+        self.assertEqual(self.assertQueryBudgets(), query_counts)
+
+    def test_post_budgets(self) -> None:
+        self.assertPostQueryBudgets()
+
+    def test_budget_declarations(self) -> None:
+        self.assertEqual(get_query_budget(BlogPage.as_view()).queries, 8)
+        self.assertEqual(get_query_budget(lambda request: None).queries, settings.QUERY_BUDGET['queries'])
+
+        view = query_budget(queries=1)(lambda request: None)
+        self.assertEqual((view.query_budget.queries, view.query_budget.time_ms), (1, None))
+
+        stats = QueryStats()
+        stats.record(3.0)
+        stats.record(4.5)
+        self.assertEqual(QueryBudget(queries=2, time_ms=10).check(stats), [])
+        self.assertEqual(QueryBudget(queries=1, time_ms=5).check(stats),
+                         ['2 queries, budget 1', '7.5 ms of SQL, budget 5 ms'])
+
+        with self.assertLogs('coffee.budgets', 'WARNING'):
+            with override_settings(QUERY_BUDGET={'queries': 0}):
+                response = self.client.get(reverse('coffee:about'))
+        self.assertGreater(response.wsgi_request.query_stats.queries, 0)
+
+
+@override_settings(MIDDLEWARE=[middleware for middleware in settings.MIDDLEWARE if 'whitenoise' not in middleware])
+class ServerTimingTestCase(TestCase):
+    """
+    Test case for the Server-Timing header and the per-request performance log.
+
+    Methods:
+        setUp(): Create a post and a dish for testing.
+        get_record(url): Request a page and return its response and log record.
+        test_server_timing(): Test that the header and the log record report the queries, templates and cache.
+        test_header_visibility(): Test that the header is only sent to staff users or with DEBUG on.
+        test_async_views(): Test that the timings of async views are reported under the async handler.
+        test_cache_stats(): Test that every cache read is counted once, including the reads of get_many().
+    """
+    def setUp(self) -> None:
+        cache.clear()
+        self.staff = User.objects.create_user(username='staff', password='testpassword', is_staff=True)
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.post = Post.objects.create(title='Post', content='<p>Content</p>', author=user,
+                                        category=PostCategory.objects.create(name='News'))
+        Dish.objects.create(name='Latte', slug='latte', price=3, order=1,
+                            category=DishCategory.objects.create(name='Coffee', order=1))
+
+    def get_record(self, url: str):
+        with self.assertLogs('coffee.timing', 'INFO') as logs:
+            response = self.client.get(url)
+        return response, json.loads(logs.records[-1].getMessage())
+
+    def test_server_timing(self) -> None:
+        self.client.force_login(self.staff)
+        response, record = self.get_record(reverse('coffee:blog_single', args=[self.post.id]))
+        self.assertEqual((record['url_name'], record['status'], record['method']), ('coffee:blog_single', 200, 'GET'))
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertGreaterEqual(record['total_ms'], record['db_ms'])
+
+        metrics = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+        self.assertEqual(metrics, ['db', 'template', 'cache', 'total'])
+        self.assertIn(f'desc="{record["queries"]} queries"', response['Server-Timing'])
+
+        _, cold = self.get_record(reverse('coffee:menu'))
+        _, warm = self.get_record(reverse('coffee:menu'))
+        self.assertGreater(warm['cache_hits'], cold['cache_hits'])
+        self.assertLess(warm['cache_misses'], cold['cache_misses'])
+
+        _, record = self.get_record('/missing/')
+        self.assertEqual((record['url_name'], record['status']), (None, 404))
+
+    def test_header_visibility(self) -> None:
+        response, record = self.get_record(reverse('coffee:menu'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertGreater(record['queries'], 0)
+
+        self.client.login(username='testuser', password='testpassword')
+        self.assertNotIn('Server-Timing', self.client.get(reverse('coffee:menu')))
+        self.client.logout()
+        with override_settings(DEBUG=True):
+            self.assertIn('Server-Timing', self.client.get(reverse('coffee:menu')))
+
+    async def test_async_views(self) -> None:
+        await self.async_client.aforce_login(self.staff)
+        with self.assertLogs('coffee.timing', 'INFO') as logs:
+            response = await self.async_client.get(reverse('coffee:menu'))
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['url_name'], 'coffee:menu')
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertIn('template;dur=', response['Server-Timing'])
+
+    def test_cache_stats(self) -> None:
+        cache.set('present', 1)
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            self.assertEqual(cache.get_many(['present', 'absent']), {'present': 1})
+            self.assertIsNone(cache.get('absent'))
+        finally:
+            current_timings.reset(token)
+        self.assertEqual((timings.cache_hits, timings.cache_misses), (1, 2))
+
+
+class MetricsTestCase(TestCase):
+    """
+    Test case for the Prometheus metrics endpoint.
+
+    Methods:
+        setUp(): Create a dish for testing.
+        get_sample(name, **labels): Return the current value of a metric sample.
+        test_access(): Test that only staff users and scrapers with the token can read the metrics.
+        test_request_metrics(): Test that the latency and the queries of requests are recorded by URL name.
+        test_checkout_metrics(): Test that checkouts record the cart size, the duration and the new order.
+        test_created_counters(): Test that reservations and comments are counted once committed.
+        test_multiprocess_directory(): Test that the metrics are read from the shared directory when it is set.
+        test_multiprocess_aggregation(): Test that the samples written by several processes are added up.
+    """
+    def setUp(self) -> None:
+        cache.clear()
+        self.dish = Dish.objects.create(name='Latte', slug='latte', price=3, order=1,
+                                        category=DishCategory.objects.create(name='Coffee', order=1))
+
+    @staticmethod
+    def get_sample(name: str, **labels) -> float:
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_access(self) -> None:
+        url = reverse('coffee:metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer secret'}).status_code, 403)
+
+        with override_settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer wrong'}).status_code, 403)
+            self.assertEqual(self.client.get(url, headers={'Authorization': 'Basic secret'}).status_code, 403)
+            response = self.client.get(url, headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'# TYPE cafe_request_duration_seconds histogram', response.content)
+
+        self.client.force_login(User.objects.create_user(username='staff', password='testpassword', is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_request_metrics(self) -> None:
+        count = self.get_sample('cafe_request_duration_seconds_count', url_name='coffee:menu', method='GET')
+        queries = self.get_sample('cafe_request_queries_sum', url_name='coffee:menu')
+        self.client.get(reverse('coffee:menu'))
+        self.assertEqual(self.get_sample('cafe_request_duration_seconds_count', url_name='coffee:menu', method='GET'),
+                         count + 1)
+        self.assertGreater(self.get_sample('cafe_request_queries_sum', url_name='coffee:menu'), queries)
+
+        unresolved = self.get_sample('cafe_request_duration_seconds_count', url_name='unresolved', method='GET')
+        self.client.get('/missing/')
+        self.assertEqual(self.get_sample('cafe_request_duration_seconds_count', url_name='unresolved', method='GET'),
+                         unresolved + 1)
+
+    def test_checkout_metrics(self) -> None:
+        carts = self.get_sample('cafe_checkout_cart_items_count')
+        items = self.get_sample('cafe_checkout_cart_items_sum')
+        checkouts = self.get_sample('cafe_checkout_duration_seconds_count')
+        orders = self.get_sample('cafe_orders_created_total')
+
+        self.client.post(reverse('coffee:add_to_cart'), {'product_id': self.dish.id, 'quantity': 3})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('coffee:checkout'), {
+                'first_name': 'John', 'last_name': 'Doe', 'street_name': 'Main St', 'house_number': '12',
+                'phone': '+380123456789', 'email_address': 'john@example.com'})
+        self.assertTemplateUsed(response, 'order_created.html')
+
+        self.assertEqual(self.get_sample('cafe_checkout_cart_items_count'), carts + 1)
+        self.assertEqual(self.get_sample('cafe_checkout_cart_items_sum'), items + 3)
+        self.assertEqual(self.get_sample('cafe_checkout_duration_seconds_count'), checkouts + 1)
+        self.assertEqual(self.get_sample('cafe_orders_created_total'), orders + 1)
+
+    def test_created_counters(self) -> None:
+        reservations = self.get_sample('cafe_reservations_created_total')
+        comments = self.get_sample('cafe_comments_created_total')
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        post = Post.objects.create(title='Post', content='Content', author=user,
+                                   category=PostCategory.objects.create(name='News'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation = Reservation.objects.create(name='John', last_name='Doe', date=timezone.localdate(),
+                                                     time=time(12, 0), phone='+380123456789')
+            Comment.objects.create(post=post, content='Nice', email='a@example.com', author='Anna')
+            reservation.save()
+            self.assertEqual(self.get_sample('cafe_reservations_created_total'), reservations)
+
+        self.assertEqual(self.get_sample('cafe_reservations_created_total'), reservations + 1)
+        self.assertEqual(self.get_sample('cafe_comments_created_total'), comments + 1)
+
+    def test_multiprocess_directory(self) -> None:
+        self.client.force_login(User.objects.create_user(username='staff', password='testpassword', is_staff=True))
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROC_DIR=directory):
+            response = self.client.get(reverse('coffee:metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(b'cafe_request_duration_seconds', response.content)
+
+    def test_multiprocess_aggregation(self) -> None:
+        self.client.force_login(User.objects.create_user(username='staff', password='testpassword', is_staff=True))
+        with tempfile.TemporaryDirectory() as directory:
+            with mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': directory}):
+                for pid, orders in ((101, 1), (102, 2)):
+                    with mock.patch('prometheus_client.values.ValueClass', MultiProcessValue(lambda: pid)):
+                        Counter('cafe_orders_created', 'Orders placed.', registry=None).inc(orders)
+                        Histogram('cafe_request_queries', 'SQL queries.', ['url_name'], buckets=(1, 5),
+                                  registry=None).labels('coffee:menu').observe(3)
+            self.assertEqual(len(os.listdir(directory)), 4)
+
+            with override_settings(METRICS_MULTIPROC_DIR=directory):
+                response = self.client.get(reverse('coffee:metrics'))
+        self.assertIn(b'cafe_orders_created_total 3.0', response.content)
+        self.assertIn(b'cafe_request_queries_count{url_name="coffee:menu"} 2.0', response.content)
+        self.assertIn(b'cafe_request_queries_sum{url_name="coffee:menu"} 6.0', response.content)
+
+
+class GenerateDataTestCase(TestCase):
+    """
+    Test case for the synthetic data generator.
+
+    Methods:
+        generate: Runs the generator and returns a snapshot of the generated data.
+        test_generate: Test the generated rows and their relations.
+        test_deterministic: Test that the same seed and --now generate the same data.
+        test_now: Test that the dates are anchored on --now and that invalid values are rejected.
+        test_invalidates_caches: Test that the cached menu and recent posts are invalidated.
+    """
+    def generate(self, seed: int = 0, now: str = '2024-06-01T12:00:00') -> tuple:
+        call_command('generate_data', scale=0.2, seed=seed, batch_size=40, now=now, stdout=StringIO())
+        return (list(Dish.objects.order_by('pk').values_list('name', 'price', 'category__name')),
+                list(Comment.objects.order_by('pk').values_list('post__title', 'parent__content', 'content')),
+                list(OrderDishesList.objects.order_by('pk').values_list('order__order_id', 'dish__name', 'quantity')),
+                list(Reservation.objects.order_by('pk').values_list('date', 'time', 'phone')))
+
+    def test_generate(self) -> None:
+        self.generate()
+
+        self.assertEqual((User.objects.count(), Post.objects.count(), Comment.objects.count(),
+                          Reservation.objects.count(), Order.objects.count(), UserData.objects.count()),
+                         (4, 8, 48, 60, 50, 50))
+        self.assertTrue(Comment.objects.filter(parent__isnull=False).exists())
+        self.assertFalse(Comment.objects.exclude(parent=None).exclude(post=F('parent__post')).exists())
+        self.assertFalse(Post.objects.filter(excerpt='').exists())
+        self.assertGreater(Post.objects.dates('date_posted', 'day').count(), 1)
+        self.assertFalse(OrderDishesList.objects.exclude(price=F('dish__price')).exists())
+        self.assertFalse(OrderDishesList.objects.exclude(user_data__order=F('order')).exists())
+        self.assertFalse(ReservationSlot.objects.filter(booked__gt=F('capacity')).exists())
+        self.assertEqual(ReservationSlot.objects.aggregate(total=Sum('booked'))['total'], 60)
+
+        post = Post.objects.create(title='Fresh post', content='Content', author=User.objects.first(),
+                                   category=PostCategory.objects.first())
+        self.assertGreater(post.date_posted, timezone.now() - timedelta(minutes=1))
+
+    def test_deterministic(self) -> None:
+        with transaction.atomic():
+            snapshot = self.generate()
+            transaction.set_rollback(True)
+        self.assertEqual(self.generate(), snapshot)
+        self.assertTrue(all(snapshot))
+
+    def test_now(self) -> None:
+        self.generate(now='2024-06-01')
+        now = timezone.make_aware(datetime(2024, 6, 1))
+        self.assertLessEqual(Post.objects.latest('date_posted').date_posted, now)
+        self.assertGreater(Post.objects.earliest('date_posted').date_posted, now - timedelta(days=366))
+        self.assertLessEqual(Reservation.objects.latest('created_at').created_at, now)
+
+        with self.assertRaises(CommandError):
+            call_command('generate_data', scale=0.2, now='June', stdout=StringIO())
+
+    def test_invalidates_caches(self) -> None:
+        version = get_menu_version()
+        with mock.patch('coffee.management.commands.generate_data.invalidate_recent_posts') as invalidated, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.generate()
+        self.assertNotEqual(get_menu_version(), version)
+        invalidated.assert_called_once_with()
@@ -0,0 +1,181 @@
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpRequest, HttpResponse
+from django.template.backends.django import DjangoTemplates
+
+from .metrics import observe_request
+
+logger = logging.getLogger(__name__)
+
+_missing = object()
+
+
+class RequestTimings:
+    """
+    The template rendering time and the cache hits and misses of a request.
+
+    Attributes:
+        template_time (float): The time spent rendering templates, in milliseconds.
+        cache_hits (int): The number of cache reads that found a value.
+        cache_misses (int): The number of cache reads that found nothing.
+    """
+    def __init__(self) -> None:
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar('current_timings', default=None)
+
+
+class TimedTemplate:
+    """
+    Template of the DjangoTemplates backend adding its rendering time to the timings of the current request.
+
+    Only templates rendered through the backend are timed, so included templates are not counted twice.
+    """
+    def __init__(self, template) -> None:
+        self.template = template
+
+    def __getattr__(self, name: str):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None) -> str:
+        timings = current_timings.get()
+        if timings is None:
+            return self.template.render(context, request)
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            timings.template_time += (time.perf_counter() - start) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    DjangoTemplates backend whose templates measure their rendering time.
+    """
+    def from_string(self, template_code: str) -> TimedTemplate:
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name: str) -> TimedTemplate:
+        return TimedTemplate(super().get_template(template_name))
+
+
+class CacheStatsMixin:
+    """
+    Cache backend mixin counting the hits and misses of the current request.
+
+    Only get() is counted, as the get_many() of the base backend reads every key through it.
+    """
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version)
+        timings = current_timings.get()
+        if timings is not None:
+            if value is _missing:
+                timings.cache_misses += 1
+            else:
+                timings.cache_hits += 1
+        return default if value is _missing else value
+
+
+class LocMemCacheWithStats(CacheStatsMixin, LocMemCache):
+    """
+    Local memory cache counting the hits and misses of the current request.
+    """
+
+
+class ServerTimingMiddleware:
+    """
+    Middleware reporting where the time of every request went.
+
+    The SQL time and query count come from QueryBudgetMiddleware, the template time and cache hits and misses from
+    the timed template and cache backends. They are sent in a Server-Timing header and logged as one JSON line per
+    request, tagged with the URL name, and feed the latency and query histograms of the site metrics. The middleware
+    should come first, so the total covers all other middleware.
+
+    The header tells anyone how long the queries of a page take, so it is only sent to staff users, or to everyone
+    when DEBUG is on.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.is_async:
+            return self.__acall__(request)
+        start, timings = time.perf_counter(), RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        user = getattr(request, 'user', None) if not settings.DEBUG else None
+        return self.finish(request, response, timings, start, settings.DEBUG or getattr(user, 'is_staff', False))
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        start, timings = time.perf_counter(), RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        user = await request.auser() if not settings.DEBUG and hasattr(request, 'auser') else None
+        return self.finish(request, response, timings, start, settings.DEBUG or getattr(user, 'is_staff', False))
+
+    @staticmethod
+    def finish(request: HttpRequest, response: HttpResponse, timings: RequestTimings, start: float,
+               send_header: bool) -> HttpResponse:
+        """
+        Logs the request and adds the Server-Timing header to the response.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            response (HttpResponse): The HTTP response.
+            timings (RequestTimings): The template and cache timings of the request.
+            start (float): The time the request started, from time.perf_counter().
+            send_header (bool): Whether to add the Server-Timing header.
+
+        Returns:
+            HttpResponse: The HTTP response.
+        """
+        total = (time.perf_counter() - start) * 1000
+        stats = getattr(request, 'query_stats', None)
+        resolver_match = getattr(request, 'resolver_match', None)
+        record = {
+            'url_name': resolver_match.view_name if resolver_match else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total, 2),
+            'db_ms': round(stats.db_time, 2) if stats else None,
+            'queries': stats.queries if stats else None,
+            'template_ms': round(timings.template_time, 2),
+            'cache_hits': timings.cache_hits,
+            'cache_misses': timings.cache_misses,
+        }
+
+        if send_header:
+            metrics = []
+            if stats:
+                metrics.append(f'db;dur={record["db_ms"]};desc="{stats.queries} queries"')
+            metrics.append(f'template;dur={record["template_ms"]}')
+            metrics.append(f'cache;desc="hits={timings.cache_hits} misses={timings.cache_misses}"')
+            metrics.append(f'total;dur={record["total_ms"]}')
+            response['Server-Timing'] = ', '.join(metrics)
+
+        logger.info(json.dumps(record))
+        observe_request(record['url_name'], request.method, total / 1000, record['queries'])
+        return response
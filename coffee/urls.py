@@ -9,6 +9,7 @@ urlpatterns = [
     path('services/', ServicesPage.as_view(), name='services'),
     path('blog/', BlogPage.as_view(), name='blog'),
     path('blog/<int:id>/', BlogSinglePage.as_view(), name='blog_single'),
+    path('search/', SearchPage.as_view(), name='search'),
     path('about/', AboutPage.as_view(), name='about'),
     path('contact/', ContactPage.as_view(), name='contact'),
     path('shop/', ShopPage.as_view(), name='shop'),
@@ -16,5 +17,10 @@ urlpatterns = [
     path('add_to_cart/', AddToCartView.as_view(), name='add_to_cart'),
     path('remove_from_cart/', RemoveFromCartView.as_view(), name='remove_from_cart'),
     path('update_cart/', UpdateCartView.as_view(), name='update_cart'),
+    path('api/cart/add/', AddToCartJsonView.as_view(), name='add_to_cart_json'),
+    path('api/cart/remove/', RemoveFromCartJsonView.as_view(), name='remove_from_cart_json'),
+    path('api/cart/update/', UpdateCartJsonView.as_view(), name='update_cart_json'),
+    path('api/reservations/slots/', ReservationSlotsView.as_view(), name='reservation_slots'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     path('checkout/', CheckoutPage.as_view(), name='checkout'),
 ]
\ No newline at end of file
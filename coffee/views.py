@@ -1,22 +1,119 @@
-from typing import Any, Union, Type
+import hmac
+from typing import Any, Optional, Union, Type
+
+from asgiref.sync import sync_to_async
 
 from django.db.models import Count
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect
 from django.core.paginator import Paginator
+from django.utils.dateparse import parse_date
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
-from django.views.generic import TemplateView, ListView
-from django.core.mail import BadHeaderError, send_mail
-from django.http import HttpResponseRedirect, HttpResponse, Http404
+from django.views.generic import TemplateView
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.mail import BadHeaderError
+from django.http import HttpResponseRedirect, HttpResponse, Http404, JsonResponse, HttpResponseForbidden
 from django.urls import reverse_lazy, reverse
 
 from account.forms import AuthenticatedMessageForm, AnonymousMessageForm
+from .cache import get_menu_version, MENU_FRAGMENT_TIMEOUT
+from .cart import get_priced_cart, clear_cart, add_to_cart, update_cart, remove_from_cart
+from .cart_storage import clean_product_id
 from .forms import ReservationForm, BillingDetailsForm
-from .models import Post, DishCategory, Dish, Comment, PostCategory, Tag, OrderDishesList, UserData, Order
+from .models import Post, DishCategory, Dish, Comment, PostCategory, Tag, ReservationSlot
+from .orders import place_order
+from .outbox import enqueue_email
+from .search import search
+from .budgets import query_budget
+from .metrics import CART_SIZE, CHECKOUT_DURATION, render_metrics
+
+
+async def alist(queryset) -> list:
+    """
+    Evaluates a queryset with the async ORM API.
+
+    Args:
+        queryset (QuerySet): The queryset to evaluate.
+
+    Returns:
+        list: The objects of the queryset.
+    """
+    return [obj async for obj in queryset]
+
+
+class CountedPaginator(Paginator):
+    """
+    Paginator for objects that were already counted, e.g. with the async ORM API.
+
+    Attributes:
+        count (int): The total number of objects.
+    """
+    def __init__(self, object_list, per_page: int, count: int, **kwargs) -> None:
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @property
+    def count(self) -> int:
+        return self._count
 
 
-class IndexPage(TemplateView):
+class AsyncTemplateView(TemplateView):
+    """
+    Template view whose GET handler runs natively under ASGI.
+
+    Subclasses build their context in aget_context_data() with the async ORM API. Lazy values left in the
+    context, such as context processors, are evaluated while the template renders in a worker thread.
+
+    Methods:
+        get(request, *args, **kwargs): Renders the template with the async context data.
+        aget_context_data(**kwargs): Retrieves the context data asynchronously.
+    """
+    async def get(self, request, *args, **kwargs) -> HttpResponse:
+        """
+        Handles GET requests by rendering the template.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+
+        Returns:
+            HttpResponse: The template response.
+        """
+        context = await self.aget_context_data(**kwargs)
+        return self.render_to_response(context)
+
+    async def aget_context_data(self, **kwargs) -> dict:
+        """
+        Retrieves the context data asynchronously.
+
+        Returns:
+            dict: The context data.
+        """
+        return self.get_context_data(**kwargs)
+
+
+class MenuFragmentCacheMixin:
+    """
+    Mixin providing the version and timeout of the cached category and dish grids.
+    """
+    async def aget_context_data(self, **kwargs) -> dict:
+        """
+        Adds the menu fragment cache version and timeout to the context.
+
+        The version is read from the shared cache, which may be a database table, so it is read in a thread.
+
+        Returns:
+            dict: The context data.
+        """
+        context = await super().aget_context_data(**kwargs)
+        context['menu_version'] = await sync_to_async(get_menu_version)()
+        context['menu_fragment_timeout'] = MENU_FRAGMENT_TIMEOUT
+        return context
+
+
+@query_budget(queries=10)
+class IndexPage(AsyncTemplateView):
     """
     View for rendering the index page.
 
@@ -27,28 +124,23 @@ class IndexPage(TemplateView):
     template_name = 'coffee_home.html'
     form_class = ReservationForm
 
-    def get_context_data(self, **kwargs) -> dict:
+    async def aget_context_data(self, **kwargs) -> dict:
         """
         Retrieves context data for rendering the index page.
 
         Returns:
             dict: The context data for the index page.
         """
-        context = super().get_context_data(**kwargs)
+        context = await super().aget_context_data(**kwargs)
 
         excluded_category_name = 'Coffee'
-        categories = DishCategory.objects.exclude(name=excluded_category_name)[:3]
+        categories = DishCategory.objects.exclude(name=excluded_category_name).with_visible_dishes()[:3]
 
         category_name = 'Coffee'
         dishes_coffee = Dish.objects.filter(category__name=category_name, is_visible=True)[:4]
-        recent_posts = Post.objects.order_by('-date_posted')[:4]
-        cart = self.request.session.get('cart', {})
-        cart_items_count = sum(cart.values())
 
-        context['recent_posts'] = recent_posts
-        context['categories'] = categories
-        context['dishes_coffee'] = dishes_coffee
-        context['cart_items_count'] = cart_items_count
+        context['categories'] = await alist(categories)
+        context['dishes_coffee'] = await alist(dishes_coffee)
         return context
 
     @method_decorator(csrf_exempt)
@@ -61,7 +153,7 @@ class IndexPage(TemplateView):
         """
         return super().dispatch(*args, **kwargs)
 
-    def post(self, request, *args, **kwargs) -> HttpResponse:
+    async def post(self, request, *args, **kwargs) -> HttpResponse:
         """
         Handles POST requests for the index page.
 
@@ -72,15 +164,17 @@ class IndexPage(TemplateView):
             HttpResponse: The HTTP response.
         """
         form = self.form_class(request.POST)
-        if form.is_valid():
-            form.save()
-            return redirect('/')
-        else:
-            print(form.errors)
-            return self.render_to_response(self.get_context_data(form=form))
+        if await sync_to_async(form.is_valid)():
+            try:
+                await sync_to_async(form.save)()
+                return redirect('/')
+            except ValidationError as error:
+                form.add_error(None, error)
+        return self.render_to_response(await self.aget_context_data(form=form))
 
 
-class MenuPage(TemplateView):
+@query_budget(queries=10)
+class MenuPage(MenuFragmentCacheMixin, AsyncTemplateView):
     """
     View representing the menu page.
 
@@ -91,28 +185,25 @@ class MenuPage(TemplateView):
     template_name = 'coffee_menu.html'
     form_class = ReservationForm
 
-    def get_context_data(self, **kwargs) -> dict:
+    async def aget_context_data(self, **kwargs) -> dict:
         """
         Retrieves context data for rendering the menu page.
 
+        The categories are left lazy, so they are only queried when the cached menu grid has expired.
+
         Returns:
             dict: Context data for rendering the menu page.
         """
-        context = super().get_context_data(**kwargs)
+        context = await super().aget_context_data(**kwargs)
         try:
-            categories = DishCategory.objects.prefetch_related('dishes').all()
-            recent_posts = Post.objects.order_by('-date_posted')[:2]
-            cart = self.request.session.get('cart', {})
-            cart_items_count = sum(cart.values())
+            categories = DishCategory.objects.with_visible_dishes()
         except DishCategory.DoesNotExist:
             raise Http404("No categories found")
 
         context['categories'] = categories
-        context['recent_posts'] = recent_posts
-        context['cart_items_count'] = cart_items_count
         return context
 
-    def post(self, request, *args, **kwargs) -> HttpResponse:
+    async def post(self, request, *args, **kwargs) -> HttpResponse:
         """
         Handles POST requests on the menu page.
 
@@ -125,12 +216,13 @@ class MenuPage(TemplateView):
             HttpResponse: Redirects to home page on successful form submission, or renders menu page with form errors.
         """
         form = self.form_class(request.POST)
-        if form.is_valid():
-            form.save()
-            return redirect('/')
-        else:
-            print(form.errors)
-            return self.render_to_response(self.get_context_data(form=form))
+        if await sync_to_async(form.is_valid)():
+            try:
+                await sync_to_async(form.save)()
+                return redirect('/')
+            except ValidationError as error:
+                form.add_error(None, error)
+        return self.render_to_response(await self.aget_context_data(form=form))
 
 
 class ServicesPage(TemplateView):
@@ -142,27 +234,9 @@ class ServicesPage(TemplateView):
     """
     template_name = 'coffee_services.html'
 
-    def get_context_data(self, **kwargs) -> dict:
-        """
-        Retrieves context data for rendering the template.
 
-        Returns:
-            dict: The context data.
-        """
-        context = super().get_context_data(**kwargs)
-        try:
-            recent_posts = Post.objects.order_by('-date_posted')[:4]
-            cart = self.request.session.get('cart', {})
-            cart_items_count = sum(cart.values())
-        except Exception:
-            raise Http404("Error processing requests")
-
-        context['cart_items_count'] = cart_items_count
-        context['recent_posts'] = recent_posts
-        return context
-
-
-class BlogPage(TemplateView):
+@query_budget(queries=8)
+class BlogPage(AsyncTemplateView):
     """
     View representing the blog page.
 
@@ -171,41 +245,39 @@ class BlogPage(TemplateView):
     """
     template_name = 'coffee_blog.html'
 
-    def get_context_data(self, **kwargs) -> dict:
+    async def aget_context_data(self, **kwargs) -> dict:
         """
         Retrieves context data for rendering the blog page.
 
+        The category and tag are looked up and the posts counted before the posts of the page are fetched.
+
         Returns:
             dict: Context data for rendering the blog page.
 
         Raises:
             Http404: If no such category or tag is found, or if an error occurs during processing.
         """
-        context = super().get_context_data(**kwargs)
+        context = await super().aget_context_data(**kwargs)
         try:
-            posts = Post.objects.all().order_by('-date_posted')
-            recent_posts = Post.objects.order_by('-date_posted')[:4]
-            cart = self.request.session.get('cart', {})
-            cart_items_count = sum(cart.values())
+            posts = Post.objects.for_listing().defer('content').order_by('-date_posted')
 
             category_id = self.request.GET.get('category')
             tag_id = self.request.GET.get('tag')
 
             if category_id:
-                category = get_object_or_404(PostCategory, id=category_id)
-                posts = posts.filter(category=category)
+                await PostCategory.objects.aget(id=category_id)
+                posts = posts.filter(category_id=category_id)
 
             if tag_id:
-                tag = get_object_or_404(Tag, id=tag_id)
-                posts = posts.filter(tags=tag)
+                await Tag.objects.aget(id=tag_id)
+                posts = posts.filter(tags__id=tag_id)
 
-            paginator = Paginator(posts, 6)
+            paginator = CountedPaginator(posts, 6, await posts.acount())
             page_number = self.request.GET.get('page')
             page_obj = paginator.get_page(page_number)
+            page_obj.object_list = await alist(page_obj.object_list)
 
-            context['recent_posts'] = recent_posts
             context['page_obj'] = page_obj
-            context['cart_items_count'] = cart_items_count
 
         except (PostCategory.DoesNotExist, Tag.DoesNotExist):
             raise Http404("No such category or tag found")
@@ -215,6 +287,36 @@ class BlogPage(TemplateView):
         return context
 
 
+@query_budget(queries=8)
+class SearchPage(AsyncTemplateView):
+    """
+    View for searching the blog posts and the menu dishes.
+
+    Attributes:
+        template_name (str): The name of the template to be rendered.
+        results_limit (int): The maximum number of posts and of dishes shown.
+    """
+    template_name = 'coffee_search.html'
+    results_limit = 20
+
+    async def aget_context_data(self, **kwargs) -> dict:
+        """
+        Retrieves the best matching posts and dishes from the full-text search index.
+
+        Returns:
+            dict: Context data for rendering the search page.
+        """
+        context = await super().aget_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()[:100]
+        context['query'] = query
+        context['posts'], context['dishes'] = [], []
+        if query:
+            context['posts'] = await sync_to_async(search)(Post.objects.for_listing().defer('content'), query,
+                                                           self.results_limit)
+            context['dishes'] = await sync_to_async(search)(Dish.objects.all(), query, self.results_limit)
+        return context
+
+
 class AboutPage(TemplateView):
     """
     View representing the about page.
@@ -234,16 +336,11 @@ class AboutPage(TemplateView):
         try:
             context = super().get_context_data(**kwargs)
             category_name = 'Coffee'
-            recent_posts = Post.objects.order_by('-date_posted')[:2]
             dishes_coffee = Dish.objects.filter(category__name=category_name, is_visible=True)[:4]
-            cart = self.request.session.get('cart', {})
-            cart_items_count = sum(cart.values())
         except Exception:
             raise Http404("Error processing request")
 
-        context['recent_posts'] = recent_posts
         context['dishes_coffee'] = dishes_coffee
-        context['cart_items_count'] = cart_items_count
         return context
 
 
@@ -256,25 +353,6 @@ class ContactPage(TemplateView):
     """
     template_name = 'coffee_contact.html'
 
-    def get_context_data(self, **kwargs) -> dict:
-        """
-        Retrieves context data for rendering the contact page.
-
-        Returns:
-            dict: A dictionary containing context data.
-        """
-        try:
-            context = super().get_context_data(**kwargs)
-            cart = self.request.session.get('cart', {})
-            recent_posts = Post.objects.order_by('-date_posted')[:2]
-            cart_items_count = sum(cart.values())
-        except Exception:
-            raise Http404("Error processing request")
-
-        context['cart_items_count'] = cart_items_count
-        context['recent_posts'] = recent_posts
-        return context
-
     def post(self, request, *args, **kwargs) -> Union[HttpResponseRedirect, HttpResponse]:
         """
         Handles POST requests to the contact page.
@@ -293,13 +371,7 @@ class ContactPage(TemplateView):
 
         if subject and message and email:
             try:
-                send_mail(
-                    subject,
-                    message,
-                    email,
-                    ['u.juliana.serg@ukr.net'],
-                    fail_silently=False,
-                )
+                enqueue_email(subject, message, [settings.CONTACT_EMAIL], reply_to=[email])
             except BadHeaderError:
                 return HttpResponse('Invalid header found.')
 
@@ -308,7 +380,8 @@ class ContactPage(TemplateView):
             return HttpResponse("Make sure all fields are entered and valid.")
 
 
-class ShopPage(TemplateView):
+@query_budget(queries=7)
+class ShopPage(MenuFragmentCacheMixin, AsyncTemplateView):
     """
     View representing the shop page.
 
@@ -317,28 +390,26 @@ class ShopPage(TemplateView):
     """
     template_name = 'coffee_shop.html'
 
-    def get_context_data(self, **kwargs) -> dict:
+    async def aget_context_data(self, **kwargs) -> dict:
         """
         Retrieves context data for rendering the shop page.
 
+        The categories are left lazy, so they are only queried when the cached shop grid has expired.
+
         Returns:
             dict: A dictionary containing context data.
         """
         try:
-            context = super().get_context_data(**kwargs)
-            categories = DishCategory.objects.filter(is_visible=True).prefetch_related('dishes')
-            recent_posts = Post.objects.order_by('-date_posted')[:2]
-            cart = self.request.session.get('cart', {})
-            cart_items_count = sum(cart.values())
+            context = await super().aget_context_data(**kwargs)
+            categories = DishCategory.objects.with_visible_dishes()
         except Exception:
             raise Http404("Error processing request")
 
-        context['recent_posts'] = recent_posts
         context['categories'] = categories
-        context['cart_items_count'] = cart_items_count
         return context
 
 
+@query_budget(queries=6)
 class CartPage(View):
     """
     View representing the cart page.
@@ -352,7 +423,7 @@ class CartPage(View):
         """
         Handles GET requests for the cart page.
 
-        Retrieves recent posts, coffee dishes, and items in the cart.
+        Retrieves coffee dishes and items in the cart.
         Calculates total amount and items count in the cart.
 
         Args:
@@ -365,27 +436,15 @@ class CartPage(View):
             Http404: If there is an error processing the request.
         """
         try:
-            recent_posts = Post.objects.order_by('-date_posted')[:2]
             category_name = 'Coffee'
-            cart = request.session.get('cart', {})
-            products_in_cart = []
+            priced_cart = get_priced_cart(request)
             dishes_coffee = Dish.objects.filter(category__name=category_name, is_visible=True)[:4]
-            total_amount = 0
-            cart_items_count = 0
-
-            for product_id, quantity in cart.items():
-                product = Dish.objects.get(id=product_id)
-                total_for_product = product.price * quantity
-                total_amount += total_for_product
-                cart_items_count += quantity
-                products_in_cart.append({'product': product, 'quantity': quantity, 'total_for_product': total_for_product})
 
             context = {
                 'dishes_coffee': dishes_coffee,
-                'recent_posts': recent_posts,
-                'products_in_cart': products_in_cart,
-                'total_amount': total_amount,
-                'cart_items_count': cart_items_count,
+                'products_in_cart': priced_cart.lines,
+                'total_amount': priced_cart.total_amount,
+                'cart_items_count': priced_cart.items_count,
             }
 
             return render(request, self.template_name, context)
@@ -393,7 +452,7 @@ class CartPage(View):
             raise Http404("Error processing request")
 
 
-class AddToCartView(TemplateView):
+class AddToCartView(View):
     """
     View for adding items to the shopping cart.
 
@@ -412,17 +471,16 @@ class AddToCartView(TemplateView):
         Returns:
             HttpResponseRedirect: Redirects to the shop page.
         """
-        product_id = request.POST.get('product_id')
+        product_id = clean_product_id(request.POST.get('product_id'))
         quantity = int(request.POST.get('quantity', 1))
 
-        cart = request.session.get('cart', {})
-        cart[product_id] = cart.get(product_id, 0) + quantity
-        request.session['cart'] = cart
+        if product_id is not None:
+            add_to_cart(request, product_id, quantity)
 
         return redirect('coffee:shop')
 
 
-class RemoveFromCartView(TemplateView):
+class RemoveFromCartView(View):
     """
     View for removing items from the shopping cart.
 
@@ -442,19 +500,16 @@ class RemoveFromCartView(TemplateView):
             HttpResponseRedirect: Redirects to the cart page.
         """
         try:
-            product_id = request.POST.get('product_id')
+            product_id = clean_product_id(request.POST.get('product_id'))
 
-            cart = request.session.get('cart', {})
-            if product_id in cart:
-                del cart[product_id]
-                request.session['cart'] = cart
+            remove_from_cart(request, product_id)
 
             return redirect('coffee:cart')
         except Exception:
             raise Http404("Error processing request")
 
 
-class UpdateCartView(TemplateView):
+class UpdateCartView(View):
     """
     View for updating items in the shopping cart.
 
@@ -474,19 +529,251 @@ class UpdateCartView(TemplateView):
             HttpResponseRedirect: Redirects to the cart page.
         """
         try:
-            product_id = request.POST.get('product_id')
+            product_id = clean_product_id(request.POST.get('product_id'))
             quantity = int(request.POST.get('quantity', 1))
 
-            cart = request.session.get('cart', {})
-            if product_id in cart and quantity > 0:
-                cart[product_id] = quantity
-                request.session['cart'] = cart
+            update_cart(request, product_id, quantity)
 
             return redirect('coffee:cart')
         except Exception:
             raise Http404("Error processing request")
 
 
+class CartJsonMixin:
+    """
+    Mixin for the JSON cart endpoints, which answer with the updated line and cart totals instead of a redirect.
+
+    The response is built from a single batched price lookup of the cart.
+
+    Methods:
+        get_product_id(request): Returns the validated product ID of the request.
+        get_quantity(request): Returns the validated quantity of the request.
+        error_response(message, status): Returns a JSON error response.
+        cart_response(request, product_id): Returns the updated line and cart totals.
+    """
+    def get_product_id(self, request) -> Optional[str]:
+        """
+        Returns the product ID posted with the request.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+
+        Returns:
+            str: The product ID without leading zeros, or None if it is missing or malformed.
+        """
+        return clean_product_id(request.POST.get('product_id'))
+
+    def get_quantity(self, request) -> Optional[int]:
+        """
+        Returns the quantity posted with the request.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+
+        Returns:
+            int: The positive quantity, or None if it is malformed.
+        """
+        try:
+            quantity = int(request.POST.get('quantity', 1))
+        except (TypeError, ValueError):
+            return None
+        return quantity if quantity > 0 else None
+
+    def error_response(self, message: str, status: int = 400) -> JsonResponse:
+        """
+        Returns a JSON error response.
+
+        Args:
+            message (str): The error message.
+            status (int): The HTTP status code.
+
+        Returns:
+            JsonResponse: The error response.
+        """
+        return JsonResponse({'error': message}, status=status)
+
+    def cart_response(self, request, product_id: str) -> JsonResponse:
+        """
+        Returns the updated line of the product and the cart totals.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            product_id (str): The ID of the changed product.
+
+        Returns:
+            JsonResponse: The line of the product, or null if it is no longer in the cart, and the cart totals.
+        """
+        priced_cart = get_priced_cart(request)
+        line = priced_cart.get_line(product_id)
+        return JsonResponse({
+            'line': line.to_dict() if line else None,
+            'cart': priced_cart.to_dict(),
+        })
+
+
+class AddToCartJsonView(CartJsonMixin, View):
+    """
+    JSON endpoint for adding items to the shopping cart.
+
+    Methods:
+        post(request, *args, **kwargs): Adds a product to the cart.
+    """
+    def post(self, request, *args, **kwargs) -> JsonResponse:
+        """
+        Handles POST requests to add items to the cart.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            JsonResponse: The updated line and cart totals, or an error.
+        """
+        product_id = self.get_product_id(request)
+        quantity = self.get_quantity(request)
+        if product_id is None or quantity is None:
+            return self.error_response('Invalid product or quantity.')
+
+        add_to_cart(request, product_id, quantity)
+        if get_priced_cart(request).get_line(product_id) is None:
+            remove_from_cart(request, product_id)
+            return self.error_response('Dish not found.', status=404)
+
+        return self.cart_response(request, product_id)
+
+
+class RemoveFromCartJsonView(CartJsonMixin, View):
+    """
+    JSON endpoint for removing items from the shopping cart.
+
+    Methods:
+        post(request, *args, **kwargs): Removes a product from the cart.
+    """
+    def post(self, request, *args, **kwargs) -> JsonResponse:
+        """
+        Handles POST requests to remove items from the cart.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            JsonResponse: The cart totals, or an error.
+        """
+        product_id = self.get_product_id(request)
+        if product_id is None:
+            return self.error_response('Invalid product.')
+
+        remove_from_cart(request, product_id)
+
+        return self.cart_response(request, product_id)
+
+
+class UpdateCartJsonView(CartJsonMixin, View):
+    """
+    JSON endpoint for updating items in the shopping cart.
+
+    Methods:
+        post(request, *args, **kwargs): Updates the quantity of a product in the cart.
+    """
+    def post(self, request, *args, **kwargs) -> JsonResponse:
+        """
+        Handles POST requests to update items in the cart.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            JsonResponse: The updated line and cart totals, or an error.
+        """
+        product_id = self.get_product_id(request)
+        quantity = self.get_quantity(request)
+        if product_id is None or quantity is None:
+            return self.error_response('Invalid product or quantity.')
+
+        if not update_cart(request, product_id, quantity):
+            return self.error_response('Dish is not in the cart.', status=404)
+
+        return self.cart_response(request, product_id)
+
+
+@query_budget(queries=2)
+class ReservationSlotsView(View):
+    """
+    JSON endpoint listing the reservation time slots of a day with their free places.
+
+    Methods:
+        get(request, *args, **kwargs): Returns the slots of the requested date.
+    """
+    def get(self, request, *args, **kwargs) -> JsonResponse:
+        """
+        Handles GET requests for the time slots of the date given in the query string.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            JsonResponse: The slots of the date, or an error if the date is missing or malformed.
+        """
+        try:
+            date = parse_date(request.GET.get('date', ''))
+        except ValueError:
+            date = None
+        if date is None:
+            return JsonResponse({'error': 'Please provide a date as YYYY-MM-DD.'}, status=400)
+
+        slots = ReservationSlot.objects.availability(date)
+        return JsonResponse({
+            'date': date.isoformat(),
+            'slots': slots,
+            'free_slots': [slot['time'] for slot in slots if slot['free']],
+        })
+
+
+class MetricsView(View):
+    """
+    View exposing the site metrics in the Prometheus text format to staff users and scrapers with the token.
+
+    Scrapers send the METRICS_TOKEN setting as a bearer token. The client address is not trusted, since behind
+    the platform router every request comes from a proxy.
+    """
+    def get(self, request, *args, **kwargs) -> HttpResponse:
+        """
+        Handles GET requests by rendering the metrics of the dyno.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+
+        Returns:
+            HttpResponse: The metrics, or 403 for other clients.
+        """
+        if not request.user.is_staff and not self.has_token(request):
+            return HttpResponseForbidden()
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    @staticmethod
+    def has_token(request) -> bool:
+        """
+        Checks if the request carries the metrics token, comparing it in constant time.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+
+        Returns:
+            bool: True if the token is configured and matches, False otherwise.
+        """
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        return bool(settings.METRICS_TOKEN) and scheme.lower() == 'bearer' and hmac.compare_digest(
+            token.strip().encode(), settings.METRICS_TOKEN.encode())
+
+
+@query_budget(queries=12)
 class CheckoutPage(TemplateView):
     """
     View for displaying the checkout page.
@@ -505,21 +792,13 @@ class CheckoutPage(TemplateView):
         """
         try:
             context = super().get_context_data(**kwargs)
-            recent_posts = Post.objects.order_by('-date_posted')[:3]
             categories_with_counts = PostCategory.objects.annotate(num_posts=Count('posts'))
-            cart = self.request.session.get('cart', {})
-            cart_items_count = sum(cart.values())
-
-            total_amount = 0
-            for product_id, quantity in cart.items():
-                product = Dish.objects.get(id=product_id)
-                total_amount += product.price * quantity
+            priced_cart = get_priced_cart(self.request)
 
             context['tags'] = Tag.objects.all()
-            context['recent_posts'] = recent_posts
             context['categories_with_counts'] = categories_with_counts
-            context['cart_items_count'] = cart_items_count
-            context['total_amount'] = total_amount
+            context['cart_items_count'] = priced_cart.items_count
+            context['total_amount'] = priced_cart.total_amount
             context['form'] = BillingDetailsForm()
         except Exception:
             raise Http404("Error processing request")
@@ -536,37 +815,20 @@ class CheckoutPage(TemplateView):
             HttpResponse: The HTTP response object.
         """
         form = BillingDetailsForm(request.POST)
+        priced_cart = get_priced_cart(request)
+        if form.is_valid() and not priced_cart:
+            form.add_error(None, 'Your cart is empty.')
+
         if form.is_valid():
             try:
-                order = Order.objects.create(order_status='Pending')
-
-                user_data = UserData.objects.create(
-                    order=order,
-                    user=request.user if request.user.is_authenticated else None,
-                    first_name=form.cleaned_data['first_name'],
-                    last_name=form.cleaned_data['last_name'],
-                    street_name=form.cleaned_data['street_name'],
-                    house_number=form.cleaned_data['house_number'],
-                    phone=form.cleaned_data['phone'],
-                    email_address=form.cleaned_data['email_address']
-                )
-
-                recent_posts = Post.objects.order_by('-date_posted')[:2]
-                total_amount = 0
-                for product_id, quantity in request.session['cart'].items():
-                    product = Dish.objects.get(id=product_id)
-                    OrderDishesList.objects.create(
-                        user_data=user_data,
-                        order=order,
-                        dish=product,
-                        price=product.price,
-                        quantity=quantity)
-                    total_amount += product.price * quantity
-
-                del request.session['cart']
+                with CHECKOUT_DURATION.time():
+                    order = place_order(priced_cart, form.cleaned_data,
+                                        request.user if request.user.is_authenticated else None)
+                CART_SIZE.observe(priced_cart.items_count)
+                clear_cart(request)
 
                 return render(request, 'order_created.html',
-                              {'order': order, 'total_amount': total_amount, 'recent_posts': recent_posts})
+                              {'order': order, 'total_amount': priced_cart.total_amount})
             except Exception:
                 raise Http404("Error processing request")
         else:
@@ -597,48 +859,57 @@ class MessageFormMixin:
         else:
             return AnonymousMessageForm
 
+    async def aget_message_form(self, request) -> Type[AuthenticatedMessageForm | AnonymousMessageForm]:
+        """
+        Retrieves the appropriate message form, loading the user with the async API.
 
-class BlogSinglePage(MessageFormMixin, TemplateView):
+        Args:
+            request: The HTTP request object.
+
+        Returns:
+            Union[AuthenticatedMessageForm, AnonymousMessageForm]: The appropriate message form.
+        """
+        user = await request.auser()
+        if user.is_authenticated:
+            return AuthenticatedMessageForm
+        else:
+            return AnonymousMessageForm
+
+
+@query_budget(queries=11)
+class BlogSinglePage(MessageFormMixin, AsyncTemplateView):
     """
     View for displaying a single blog post page.
     """
     model = Post
     template_name = 'coffee_blog_single.html'
 
-    def get_context_data(self, **kwargs) -> dict:
+    async def aget_context_data(self, **kwargs) -> dict:
         """
         Retrieves context data for rendering the single blog post page.
 
         Returns:
             dict: The context data for rendering the page.
         """
-        try:
-            context = super().get_context_data(**kwargs)
-            post_id = kwargs.get('id')
-            post = Post.objects.get(id=post_id)
-            comments = post.comments.filter(parent=None).order_by('date_posted')
-            categories_with_counts = PostCategory.objects.annotate(num_posts=Count('posts'))
-            recent_posts = Post.objects.order_by('-date_posted')[:5]
-            tags = post.tags.all()
-            cart = self.request.session.get('cart', {})
-            cart_items_count = sum(cart.values())
-
-            context['recent_posts'] = recent_posts
-            context['post'] = post
-            context['comments'] = comments
-            context['categories_with_counts'] = categories_with_counts
-            context['tags'] = tags
-            context['cart_items_count'] = cart_items_count
+        context = await super().aget_context_data(**kwargs)
+        post_id = kwargs.get('id')
+        comments = Comment.objects.filter(post_id=post_id).order_by('date_posted', 'id')
+        categories_with_counts = PostCategory.objects.annotate(num_posts=Count('posts'))
+        tags = Tag.objects.filter(post=post_id)
 
+        try:
+            context['post'] = await Post.objects.for_listing().aget(id=post_id)
         except Post.DoesNotExist:
             raise Http404("Post does not exist.")
 
-        form = self.get_message_form(self.request)
-        context['form'] = form()
+        context['comments'] = await sync_to_async(comments.as_tree)()
+        context['categories_with_counts'] = await alist(categories_with_counts)
+        context['tags'] = await alist(tags)
+        context['form'] = (await self.aget_message_form(self.request))()
 
         return context
 
-    def post(self, request, *args, **kwargs) -> HttpResponse:
+    async def post(self, request, *args, **kwargs) -> HttpResponse:
         """
         Handles POST requests to process comments submitted via the message form.
 
@@ -648,33 +919,49 @@ class BlogSinglePage(MessageFormMixin, TemplateView):
         Returns:
             HttpResponse: The HTTP response object.
         """
-        form_class = self.get_message_form(self.request)
-        parent_id = self.request.POST.get('parent_id')
+        form_class = await self.aget_message_form(self.request)
         comment_form = form_class(self.request.POST)
 
-        if comment_form.is_valid():
-            try:
-                comment = comment_form.save(commit=False)
+        if await sync_to_async(comment_form.is_valid)():
+            return await sync_to_async(self.save_comment)(request, comment_form, **kwargs)
+        else:
+            context = await self.aget_context_data(**kwargs)
+            context['form'] = comment_form
+            return self.render_to_response(context)
+
+    def save_comment(self, request, comment_form, **kwargs) -> HttpResponse:
+        """
+        Saves a valid comment and redirects back to the blog.
+
+        Args:
+            request: The HTTP request object.
+            comment_form: The valid message form.
 
-                if request.user.is_authenticated:
-                    comment.author = request.user.username
-                    comment.email = request.user.email
+        Returns:
+            HttpResponse: The redirect to the blog page.
 
-                comment.post = Post.objects.get(id=kwargs.get('id'))
+        Raises:
+            Http404: If there is an error processing the request.
+        """
+        parent_id = self.request.POST.get('parent_id')
+        try:
+            comment = comment_form.save(commit=False)
 
-                if parent_id:
-                    parent_comment = Comment.objects.get(id=parent_id)
-                    comment.parent = parent_comment
+            if request.user.is_authenticated:
+                comment.author = request.user.username
+                comment.email = request.user.email
 
-                comment.save()
+            comment.post = Post.objects.get(id=kwargs.get('id'))
 
-                category_id = self.request.POST.get('category')
-                tag_id = self.request.POST.get('tag')
-                url = reverse('coffee:blog') + f'?category={category_id}&tag={tag_id}&id={kwargs.get("id")}'
-                return redirect(url)
-            except Exception:
-                raise Http404("Error processing request")
-        else:
-            context = self.get_context_data(**kwargs)
-            context['form'] = comment_form
-            return self.render_to_response(context)
+            if parent_id:
+                parent_comment = Comment.objects.get(id=parent_id)
+                comment.parent = parent_comment
+
+            comment.save()
+
+            category_id = self.request.POST.get('category')
+            tag_id = self.request.POST.get('tag')
+            url = reverse('coffee:blog') + f'?category={category_id}&tag={tag_id}&id={kwargs.get("id")}'
+            return redirect(url)
+        except Exception:
+            raise Http404("Error processing request")
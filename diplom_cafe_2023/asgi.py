@@ -3,6 +3,10 @@ ASGI config for diplom_cafe_2023 project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Run it with ``gunicorn diplom_cafe_2023.asgi:application -k uvicorn.workers.UvicornWorker`` (see the Procfile).
+Static files are served by WhiteNoise in front of Django (see coffee.static), because WhiteNoise's middleware
+is sync-only.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
@@ -11,6 +15,9 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from coffee.static import WhiteNoiseASGI
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'diplom_cafe_2023.settings')
+os.environ.setdefault('DJANGO_ASGI', '1')
 
-application = get_asgi_application()
+application = WhiteNoiseASGI(get_asgi_application())
@@ -72,7 +72,9 @@ CKEDITOR_UPLOAD_PATH = "uploads/"
 CKEDITOR_IMAGE_BACKEND = 'pillow'
 
 MIDDLEWARE = [
+    'coffee.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'coffee.budgets.QueryBudgetMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,13 +82,20 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'coffee.middleware.CartMiddleware',
 ]
 
+# WhiteNoise's middleware is sync-only and would make Django hold a thread for every request under ASGI,
+# so the ASGI profile (see asgi.py) leaves it out and serves static files with WhiteNoise in front of Django.
+
+if os.environ.get('DJANGO_ASGI') == '1':
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
 ROOT_URLCONF = 'diplom_cafe_2023.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'coffee.timing.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates']
         ,
         'APP_DIRS': True,
@@ -96,7 +105,8 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                'main_app.context_processors.main_menu_items'
+                'main_app.context_processors.main_menu_items',
+                'main_app.context_processors.site_chrome',
             ],
         },
     },
@@ -139,6 +149,11 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# ManagerBackend loads the manager membership with the user of each request, so the manager views need no
+# extra query for it. The sessions started under another backend have to log in again.
+
+AUTHENTICATION_BACKENDS = ['manager.backends.ManagerBackend']
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 
@@ -173,3 +188,92 @@ EMAIL_HOST_PASSWORD = '12IWYDFxxk7VDV7I'
 EMAIL_USE_SSL = True
 DEFAULT_FROM_EMAIL = 'u.juliana.serg@ukr.net'
 
+# Shopping cart storage: SignedCookieCartStorage, CacheCartStorage or SessionCartStorage from coffee.cart_storage.
+# CacheCartStorage keeps the carts in the CART_CACHE_ALIAS cache, which must be shared by all workers. It only takes
+# the cart writes off the database when that cache is Redis, see CACHES.
+
+CART_STORAGE = os.environ.get('CART_STORAGE', 'coffee.cart_storage.SignedCookieCartStorage')
+CART_COOKIE_NAME = 'cart'
+CART_COOKIE_AGE = 60 * 60 * 24 * 14
+CART_MAX_LINES = 50
+CART_MAX_QUANTITY = 100
+CART_CACHE_ALIAS = 'shared'
+
+# Outgoing email queue, delivered by `python manage.py send_queued_emails`
+
+CONTACT_EMAIL = 'u.juliana.serg@ukr.net'
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60
+OUTBOX_LEASE = 60 * 5
+
+# Table reservations: slot length in minutes, reservations accepted per slot and opening hours
+
+RESERVATION_SLOT_MINUTES = 30
+RESERVATION_SLOT_CAPACITY = 10
+RESERVATION_OPENING_TIME = '08:00'
+RESERVATION_CLOSING_TIME = '22:00'
+
+# Live manager events: PostgresBroadcaster (LISTEN/NOTIFY) on PostgreSQL, LocalBroadcaster for a single web process
+# on other databases, unless a broadcaster class is set here
+
+MANAGER_EVENTS_BACKEND = os.environ.get('MANAGER_EVENTS_BACKEND')
+MANAGER_EVENTS_CHANNEL = 'manager_events'
+MANAGER_EVENTS_HEARTBEAT = 15
+MANAGER_EVENTS_QUEUE_SIZE = 100
+
+# Default query budget of views without their own @query_budget, see coffee.budgets
+
+QUERY_BUDGET = {'queries': 20, 'time_ms': 500}
+
+# The default cache lives in the memory of each worker. The shared cache is seen by every worker, for data that
+# must not differ between them: Redis when REDIS_URL is set, which is what production should use. Without it, the
+# shared cache falls back to a database table, created by `python manage.py createcachetable`; every write to it
+# is still a few database statements, and MAX_ENTRIES is raised so carts and versions are not culled at 300 keys.
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'coffee.timing.LocMemCacheWithStats',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'coffee_shared_cache',
+        'OPTIONS': {'MAX_ENTRIES': 1000000},
+    },
+}
+
+# Per-request performance log: one JSON line per request from coffee.timing.ServerTimingMiddleware. The test runner
+# lowers it to warnings, see TEST_PERFORMANCE_LOG_LEVEL.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'performance': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'coffee.timing': {
+            'handlers': ['performance'],
+            'level': os.environ.get('PERFORMANCE_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+TEST_RUNNER = 'coffee.testing.TestRunner'
+TEST_PERFORMANCE_LOG_LEVEL = os.environ.get('PERFORMANCE_LOG_LEVEL', 'WARNING')
+
+# Prometheus metrics at /metrics/, for staff users and scrapers sending `Authorization: Bearer <METRICS_TOKEN>`.
+# Set PROMETHEUS_MULTIPROC_DIR to an empty directory before starting gunicorn to aggregate the metrics of all
+# workers (see the Procfile).
+
+METRICS_MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
@@ -0,0 +1,35 @@
+from typing import Dict, List
+
+from coffee.cache import bump_version, get_version
+
+from .models import MainMenuItems
+
+MAIN_MENU_VERSION_CACHE_KEY = 'main_app:main_menu_version'
+
+_local_main_menu: Dict[str, List[MainMenuItems]] = {}
+
+
+def get_main_menu() -> List[MainMenuItems]:
+    """
+    Returns the visible main menu items, loading them once per worker and menu version.
+
+    Each worker keeps the menu in memory under the version it was loaded for. The current version lives in the
+    shared cache, so a change saved by one worker makes every worker reload the menu on its next request.
+
+    Returns:
+        list: The visible main menu items in display order.
+    """
+    version = get_version(MAIN_MENU_VERSION_CACHE_KEY)
+    items = _local_main_menu.get(version)
+    if items is None:
+        items = list(MainMenuItems.objects.filter(is_visible=True))
+        _local_main_menu.clear()
+        _local_main_menu[version] = items
+    return items
+
+
+def invalidate_main_menu() -> None:
+    """
+    Bumps the main menu version once the current transaction is committed, so every worker reloads the menu.
+    """
+    bump_version(MAIN_MENU_VERSION_CACHE_KEY)
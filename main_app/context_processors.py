@@ -1,11 +1,16 @@
-from typing import Dict
+from typing import Dict, Any, List
 
+from django.utils.functional import SimpleLazyObject, lazy
+
+from coffee.cache import get_recent_posts
+from coffee.cart import get_cart_items_count
+from .cache import get_main_menu
 from .models import MainMenuItems
 
 
-def main_menu_items(request) -> Dict[str, MainMenuItems]:
+def main_menu_items(request) -> Dict[str, List[MainMenuItems]]:
     """
-    Retrieve main menu items for display.
+    Retrieve main menu items for display from the cache.
 
     Args:
         request (HttpRequest): The HTTP request object.
@@ -13,5 +18,22 @@ def main_menu_items(request) -> Dict[str, MainMenuItems]:
     Returns:
         dict: A dictionary containing the main menu items.
     """
-    items = MainMenuItems.objects.filter(is_visible=True)
-    return {'main_menu': items}
+    return {'main_menu': get_main_menu()}
+
+
+def site_chrome(request) -> Dict[str, Any]:
+    """
+    Retrieve the recent posts and cart items count shown in the sidebar, navbar and footer.
+
+    Both values are evaluated lazily, so pages that do not render them pay nothing.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        dict: A dictionary containing the cached recent posts and the cart items count.
+    """
+    return {
+        'recent_posts': SimpleLazyObject(get_recent_posts),
+        'cart_items_count': lazy(get_cart_items_count, int)(request),
+    }
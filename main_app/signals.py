@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import invalidate_main_menu
+from .models import MainMenuItems
+
+
+@receiver([post_save, post_delete], sender=MainMenuItems)
+def main_menu_item_changed(sender, **kwargs) -> None:
+    """
+    Invalidates the cached main menu when a menu item is saved or deleted.
+    """
+    invalidate_main_menu()
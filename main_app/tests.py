@@ -1,4 +1,13 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from coffee.cart import save_cart
+from coffee.models import Post, PostCategory
+from .cache import MAIN_MENU_VERSION_CACHE_KEY, _local_main_menu, get_main_menu
+from .context_processors import site_chrome, main_menu_items
 from .models import MainMenuItems
 
 
@@ -37,3 +46,79 @@ class MainMenuItemsTestCase(TestCase):
 
     def test_string_representation(self):
         self.assertEqual(str(self.menu_item), 'Test Item/test-item')
+
+
+class SiteChromeTestCase(TestCase):
+    """
+    Test case for the site chrome context processor.
+
+    Methods:
+        setUp(): Set up method for creating test data.
+        test_recent_posts(): Test method for the cached recent posts in the context.
+        test_cart_items_count(): Test method for the cart items count in the context.
+    """
+    def setUp(self) -> None:
+        cache.clear()
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.post = Post.objects.create(title='Test Post', content='Test Content', author=user,
+                                        category=PostCategory.objects.create(name='Test Category'))
+        self.request = RequestFactory().get('/')
+        save_cart(self.request, {'1': 2, '2': 3})
+
+    def test_recent_posts(self) -> None:
+        context = site_chrome(self.request)
+        self.assertEqual(list(context['recent_posts']), [self.post])
+
+    def test_cart_items_count(self) -> None:
+        with self.assertNumQueries(0):
+            context = site_chrome(self.request)
+            self.assertEqual(context['cart_items_count'], 5)
+
+
+class MainMenuCacheTestCase(TestCase):
+    """
+    Test case for the cached main menu.
+
+    Methods:
+        setUp(): Set up method for creating test data.
+        test_menu_is_cached(): Test method for serving the menu without loading the items once it is cached.
+        test_menu_is_invalidated_on_save(): Test method for reloading the menu after an item is saved.
+        test_menu_is_invalidated_on_delete(): Test method for reloading the menu after an item is deleted.
+        test_version_is_shared(): Test method for reloading the menu when another worker bumps the version.
+        test_hidden_items_are_excluded(): Test method for excluding hidden menu items.
+    """
+    def setUp(self) -> None:
+        _local_main_menu.clear()
+        self.menu_item = MainMenuItems.objects.create(title='Menu', slug='menu', url='/menu/', order=1)
+
+    def test_menu_is_cached(self) -> None:
+        self.assertEqual(main_menu_items(None)['main_menu'], [self.menu_item])
+        with CaptureQueriesContext(connection) as queries:
+            main_menu_items(None)
+        self.assertFalse([query for query in queries.captured_queries
+                          if MainMenuItems._meta.db_table in query['sql']])
+
+    def test_menu_is_invalidated_on_save(self) -> None:
+        get_main_menu()
+        self.menu_item.title = 'Our Menu'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.menu_item.save()
+        self.assertEqual(get_main_menu()[0].title, 'Our Menu')
+
+    def test_menu_is_invalidated_on_delete(self) -> None:
+        get_main_menu()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.menu_item.delete()
+        self.assertEqual(get_main_menu(), [])
+
+    def test_version_is_shared(self) -> None:
+        get_main_menu()
+        MainMenuItems.objects.filter(pk=self.menu_item.pk).update(title='Our Menu')
+        self.assertEqual(get_main_menu()[0].title, 'Menu')
+
+        caches['shared'].set(MAIN_MENU_VERSION_CACHE_KEY, 'bumped by another worker', None)
+        self.assertEqual(get_main_menu()[0].title, 'Our Menu')
+
+    def test_hidden_items_are_excluded(self) -> None:
+        MainMenuItems.objects.create(title='Hidden', slug='hidden', url='/hidden/', order=2, is_visible=False)
+        self.assertEqual(get_main_menu(), [self.menu_item])
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ManagerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'manager'
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Group
+from django.db.models import Exists, OuterRef
+
+MANAGER_GROUP_NAME = 'manager'
+
+UserModel = get_user_model()
+
+
+class ManagerBackend(ModelBackend):
+    """
+    Authentication backend that reads the manager membership along with the user of each request.
+
+    Methods:
+        get_user(user_id: int) -> User | None: Returns the user, flagged with its manager membership.
+    """
+
+    def get_user(self, user_id: int):
+        """
+        Returns the user of a session, annotated with `is_manager` by the same query.
+
+        Args:
+            user_id (int): The id of the user.
+
+        Returns:
+            User | None: The user, or None if it does not exist or cannot authenticate.
+        """
+        managers = Group.objects.filter(user=OuterRef('pk'), name=MANAGER_GROUP_NAME)
+        try:
+            user = UserModel._default_manager.annotate(is_manager=Exists(managers)).get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+def is_manager(user) -> bool:
+    """
+    Checks if a user belongs to the manager group.
+
+    The users loaded by ManagerBackend already carry the answer. For the other ones, the group is queried once
+    and the answer is kept on the user object, so it lasts for the current request only.
+
+    Args:
+        user (User): The user to check.
+
+    Returns:
+        bool: True if the user is a manager, False otherwise.
+    """
+    if not user.is_authenticated:
+        return False
+
+    if getattr(user, 'is_manager', None) is None:
+        user.is_manager = user.groups.filter(name=MANAGER_GROUP_NAME).exists()
+    return user.is_manager
@@ -0,0 +1,107 @@
+import datetime
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from coffee.models import Reservation, ReservationSlot
+
+ACTION_PROCESS = 'process'
+ACTION_RESCHEDULE = 'reschedule'
+
+
+def encode_selection(reservation: Reservation) -> str:
+    """
+    Encodes a reservation and the version the manager saw as a bulk selection value.
+
+    Args:
+        reservation (Reservation): The reservation.
+
+    Returns:
+        str: The id and the last update time of the reservation.
+    """
+    return f'{reservation.pk}@{reservation.updated_at.isoformat()}'
+
+
+def decode_selection(values: Iterable[str]) -> Dict[int, datetime.datetime]:
+    """
+    Decodes bulk selection values, skipping malformed ones.
+
+    Args:
+        values (iterable): The selection values.
+
+    Returns:
+        dict: The last update time the manager saw, by reservation id.
+    """
+    selection = {}
+    for value in values:
+        pk, _, version = value.partition('@')
+        try:
+            updated_at = parse_datetime(version)
+            pk = int(pk)
+        except ValueError:
+            continue
+        if updated_at is not None:
+            selection[pk] = updated_at
+    return selection
+
+
+def select_versions(selection: Dict[int, datetime.datetime]) -> QuerySet:
+    """
+    Returns the selected reservations that have not changed since the manager saw them.
+
+    Args:
+        selection (dict): The last update time the manager saw, by reservation id.
+
+    Returns:
+        QuerySet: The unchanged reservations.
+    """
+    condition = Q(pk__in=[])
+    for pk, updated_at in selection.items():
+        condition |= Q(pk=pk, updated_at=updated_at)
+    return Reservation.objects.filter(condition)
+
+
+def update_reservations(queryset: QuerySet, action: str, date: Optional[datetime.date] = None,
+                        time: Optional[datetime.time] = None) -> List[int]:
+    """
+    Marks reservations as processed or moves them to another date and time with a single UPDATE.
+
+    The matching rows are locked first, so their ids can be reported. A reschedule books all the places it
+    needs in the target slot at once and frees the old slots, or fails as a whole.
+
+    Args:
+        queryset (QuerySet): The reservations to update.
+        action (str): ACTION_PROCESS or ACTION_RESCHEDULE.
+        date (date, optional): The new date for ACTION_RESCHEDULE.
+        time (time, optional): The new time for ACTION_RESCHEDULE.
+
+    Returns:
+        list: The ids of the updated reservations.
+
+    Raises:
+        ValidationError: If the target slot does not have enough free places.
+    """
+    with transaction.atomic():
+        rows = list(queryset.select_for_update().order_by().values_list('pk', 'date', 'time'))
+        ids = [pk for pk, _, _ in rows]
+        if not ids:
+            return ids
+
+        if action == ACTION_RESCHEDULE:
+            target = (date, ReservationSlot.get_slot_time(time))
+            moved = Counter((row_date, ReservationSlot.get_slot_time(row_time)) for _, row_date, row_time in rows)
+            moved.pop(target, None)
+            if moved:
+                ReservationSlot.objects.reserve(*target, count=sum(moved.values()))
+            for slot_key, count in moved.items():
+                ReservationSlot.objects.release(*slot_key, count=count)
+            changes = {'date': date, 'time': time}
+        else:
+            changes = {'is_precessed': True}
+
+        Reservation.objects.filter(pk__in=ids).update(updated_at=timezone.now(), **changes)
+    return ids
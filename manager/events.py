@@ -0,0 +1,249 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from typing import Optional, Set
+
+from django.conf import settings
+from django.db import connection, connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+RESERVATION_CREATED = 'reservation.created'
+ORDER_CREATED = 'order.created'
+
+
+class Subscription:
+    """
+    A queue of events for one listening client, living on the event loop that created it.
+
+    Events may be put from any thread. When the client reads too slowly and the queue is full, new events are
+    dropped instead of growing the memory of the process.
+
+    Attributes:
+        broadcaster (LocalBroadcaster): The broadcaster the subscription listens to.
+        queue (asyncio.Queue): The events waiting to be read.
+        loop (asyncio.AbstractEventLoop): The event loop of the client.
+    """
+    def __init__(self, broadcaster: 'LocalBroadcaster', max_size: int) -> None:
+        self.broadcaster = broadcaster
+        self.queue = asyncio.Queue(max_size)
+        self.loop = asyncio.get_running_loop()
+
+    def put(self, event: dict) -> None:
+        """
+        Hands an event to the event loop of the client.
+
+        Args:
+            event (dict): The event.
+        """
+        try:
+            self.loop.call_soon_threadsafe(self.put_nowait, event)
+        except RuntimeError:
+            self.close()
+
+    def put_nowait(self, event: dict) -> None:
+        """
+        Queues an event, dropping it if the queue is full.
+
+        Args:
+            event (dict): The event.
+        """
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning('Dropping %s event for a slow subscriber', event.get('type'))
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """
+        Waits for the next event.
+
+        Args:
+            timeout (float, optional): The number of seconds to wait.
+
+        Returns:
+            dict: The next event, or None if the timeout expired.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        """
+        Stops receiving events.
+        """
+        self.broadcaster.unsubscribe(self)
+
+
+class LocalBroadcaster:
+    """
+    Broadcaster delivering events to the subscribers of the current process.
+
+    This is enough with a single web process. With several processes, use PostgresBroadcaster so events published
+    by one process reach the managers connected to the others.
+
+    Attributes:
+        subscriptions (set): The open subscriptions.
+    """
+    def __init__(self) -> None:
+        self.subscriptions: Set[Subscription] = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self) -> Subscription:
+        """
+        Opens a subscription on the running event loop.
+
+        Returns:
+            Subscription: The new subscription.
+        """
+        subscription = Subscription(self, settings.MANAGER_EVENTS_QUEUE_SIZE)
+        with self.lock:
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """
+        Closes a subscription.
+
+        Args:
+            subscription (Subscription): The subscription.
+        """
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def publish(self, event: dict) -> None:
+        """
+        Publishes an event to all subscribers.
+
+        Args:
+            event (dict): The JSON-serializable event with its type.
+        """
+        self.deliver(event)
+
+    def deliver(self, event: dict) -> None:
+        """
+        Delivers an event to the subscribers of the current process.
+
+        Args:
+            event (dict): The event.
+        """
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            subscription.put(event)
+
+
+class PostgresBroadcaster(LocalBroadcaster):
+    """
+    Broadcaster sending events through PostgreSQL LISTEN/NOTIFY, so they reach the subscribers of every process.
+
+    Events are published with pg_notify() on the default database. A daemon thread per process, started with the
+    first subscription, listens on its own connection and delivers the notifications to the local subscribers.
+
+    Attributes:
+        channel (str): The notification channel.
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self.channel = settings.MANAGER_EVENTS_CHANNEL
+        self.listener: Optional[threading.Thread] = None
+
+    def subscribe(self) -> Subscription:
+        with self.lock:
+            if self.listener is None:
+                self.listener = threading.Thread(target=self.listen, name='manager-events', daemon=True)
+                self.listener.start()
+        return super().subscribe()
+
+    def publish(self, event: dict) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, json.dumps(event)])
+
+    def listen(self) -> None:
+        """
+        Delivers the notifications of the channel to the local subscribers, reconnecting after errors.
+        """
+        while True:
+            try:
+                self.listen_once()
+            except Exception:
+                logger.exception('Lost the %s notification channel, reconnecting', self.channel)
+                time.sleep(settings.MANAGER_EVENTS_HEARTBEAT)
+
+    def listen_once(self) -> None:
+        """
+        Opens a dedicated connection, listens on the channel and delivers notifications until the connection fails.
+        """
+        wrapper = connections.create_connection('default')
+        raw_connection = wrapper.get_new_connection(wrapper.get_connection_params())
+        try:
+            raw_connection.autocommit = True
+            with raw_connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            while True:
+                if select.select([raw_connection], [], [], settings.MANAGER_EVENTS_HEARTBEAT) == ([], [], []):
+                    continue
+                raw_connection.poll()
+                while raw_connection.notifies:
+                    notification = raw_connection.notifies.pop(0)
+                    try:
+                        self.deliver(json.loads(notification.payload))
+                    except ValueError:
+                        logger.warning('Ignoring malformed %s notification', self.channel)
+        finally:
+            raw_connection.close()
+
+
+_broadcaster = None
+
+
+def get_broadcaster() -> LocalBroadcaster:
+    """
+    Returns the broadcaster of the process, creating it on first use.
+
+    The MANAGER_EVENTS_BACKEND setting chooses the broadcaster. Without it, PostgresBroadcaster is used on
+    PostgreSQL, so events reach every web process, and LocalBroadcaster on other databases.
+
+    Returns:
+        LocalBroadcaster: The broadcaster.
+    """
+    global _broadcaster
+    if _broadcaster is None:
+        if settings.MANAGER_EVENTS_BACKEND:
+            _broadcaster = import_string(settings.MANAGER_EVENTS_BACKEND)()
+        elif connection.vendor == 'postgresql':
+            _broadcaster = PostgresBroadcaster()
+        else:
+            _broadcaster = LocalBroadcaster()
+    return _broadcaster
+
+
+def publish(event_type: str, **data) -> None:
+    """
+    Publishes an event to the connected managers.
+
+    Args:
+        event_type (str): The type of the event, e.g. 'reservation.created'.
+        **data: The data of the event.
+    """
+    try:
+        get_broadcaster().publish({'type': event_type, **data})
+    except Exception:
+        logger.exception('Cannot publish %s event', event_type)
+
+
+def format_event(event: dict) -> str:
+    """
+    Formats an event as a server-sent event.
+
+    Args:
+        event (dict): The event with its type.
+
+    Returns:
+        str: The event in the text/event-stream format.
+    """
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
@@ -1,13 +1,194 @@
+import datetime
+
 from django import forms
-from coffee.models import Reservation
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from coffee.models import Order, Reservation, ReservationSlot
+from .bulk import ACTION_PROCESS, ACTION_RESCHEDULE, decode_selection, select_versions, update_reservations
 
 
 class ReservationEditForm(forms.ModelForm):
     """
     Form for editing reservation details.
 
+    The version field carries the last update time the manager saw, so that saving over a change made by
+    someone else in the meantime is rejected.
     """
+    STALE_MESSAGE = 'This reservation was changed by someone else. Please reload the page.'
+
+    version = forms.DateTimeField(widget=forms.HiddenInput)
+
     class Meta:
         model = Reservation
         fields = ('is_precessed', 'name', 'last_name', 'date', 'phone', 'message', )
 
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        if self.instance.pk is not None:
+            self.fields['version'].initial = self.instance.updated_at
+
+    def save(self, commit: bool = True) -> Reservation:
+        """
+        Saves the reservation if it was not updated since the form was displayed.
+
+        The row is locked while its version is compared, so a concurrent edit either commits first and makes
+        this one fail, or waits until this one is saved.
+
+        Args:
+            commit (bool): Whether to save the reservation.
+
+        Returns:
+            Reservation: The reservation.
+
+        Raises:
+            ValidationError: If the reservation was changed in the meantime.
+        """
+        with transaction.atomic():
+            current = Reservation.objects.select_for_update().filter(
+                pk=self.instance.pk, updated_at=self.cleaned_data['version']).values_list('pk', flat=True)
+            if not current:
+                raise ValidationError(self.STALE_MESSAGE, code='stale')
+            return super().save(commit)
+
+
+class ReservationFilterForm(forms.Form):
+    """
+    Form for filtering the reservation dashboard.
+
+    Attributes:
+        date_from (forms.DateField): The first date to show.
+        date_to (forms.DateField): The last date to show.
+        status (forms.ChoiceField): Whether to show pending, processed or all reservations.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSED = 'processed'
+    STATUS_ALL = 'all'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSED, 'Processed'),
+        (STATUS_ALL, 'All'),
+    )
+
+    date_from = forms.DateField(label='From', required=False,
+                                widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    date_to = forms.DateField(label='To', required=False,
+                              widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    status = forms.ChoiceField(label='Status', choices=STATUS_CHOICES, required=False,
+                               widget=forms.Select(attrs={'class': 'form-control'}))
+
+    def filter(self, queryset):
+        """
+        Applies the valid filters to a queryset of reservations.
+
+        Invalid filters are ignored, and only pending reservations are shown by default.
+
+        Args:
+            queryset (QuerySet): The reservations.
+
+        Returns:
+            QuerySet: The filtered reservations.
+        """
+        data = self.cleaned_data if self.is_valid() else {}
+        status = data.get('status') or self.STATUS_PENDING
+        if status != self.STATUS_ALL:
+            queryset = queryset.filter(is_precessed=status == self.STATUS_PROCESSED)
+        if data.get('date_from'):
+            queryset = queryset.filter(date__gte=data['date_from'])
+        if data.get('date_to'):
+            queryset = queryset.filter(date__lte=data['date_to'])
+        return queryset
+
+
+class BulkReservationForm(ReservationFilterForm):
+    """
+    Form for processing or rescheduling many reservations at once.
+
+    The reservations are either the selected ones, each with the version the manager saw, or all reservations
+    matching the filters.
+
+    Attributes:
+        action (forms.ChoiceField): Whether to mark the reservations processed or reschedule them.
+        new_date (forms.DateField): The new date when rescheduling.
+        new_time (forms.TimeField): The new time when rescheduling.
+        all_matching (forms.BooleanField): Whether to update all reservations matching the filters.
+    """
+    ACTION_CHOICES = (
+        (ACTION_PROCESS, 'Mark processed'),
+        (ACTION_RESCHEDULE, 'Reschedule'),
+    )
+
+    action = forms.ChoiceField(label='Action', choices=ACTION_CHOICES,
+                               widget=forms.Select(attrs={'class': 'form-control'}))
+    new_date = forms.DateField(label='New date', required=False,
+                               widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    new_time = forms.TimeField(label='New time', required=False,
+                               widget=forms.TimeInput(attrs={'type': 'time', 'class': 'form-control'}))
+    all_matching = forms.BooleanField(label='All matching the filters', required=False)
+
+    def clean(self) -> dict:
+        """
+        Validates the selection and the reschedule target.
+
+        Returns:
+            dict: The cleaned data.
+        """
+        cleaned_data = super().clean()
+        self.selection = decode_selection(self.data.getlist('selected') if hasattr(self.data, 'getlist') else [])
+        if not self.selection and not cleaned_data.get('all_matching'):
+            raise forms.ValidationError('Please select reservations.')
+        if cleaned_data.get('action') == ACTION_RESCHEDULE and not (cleaned_data.get('new_date')
+                                                                    and cleaned_data.get('new_time')):
+            raise forms.ValidationError('Please choose the new date and time.')
+        if cleaned_data.get('action') == ACTION_RESCHEDULE:
+            self.clean_target(cleaned_data['new_date'], cleaned_data['new_time'])
+        return cleaned_data
+
+    @staticmethod
+    def clean_target(new_date: datetime.date, new_time: datetime.time) -> None:
+        """
+        Checks that the reschedule target is in the future and within the opening hours.
+
+        Args:
+            new_date (date): The new date.
+            new_time (time): The new time.
+
+        Raises:
+            forms.ValidationError: If the target is in the past or the cafe is closed at that time.
+        """
+        if ReservationSlot.get_slot_time(new_time) not in ReservationSlot.get_day_slots():
+            raise forms.ValidationError('Please choose a time between %(opening)s and %(closing)s.',
+                                        params={'opening': settings.RESERVATION_OPENING_TIME,
+                                                'closing': settings.RESERVATION_CLOSING_TIME})
+        if timezone.make_aware(datetime.datetime.combine(new_date, new_time)) < timezone.now():
+            raise forms.ValidationError('Please choose a date and time in the future.')
+
+    def save(self) -> dict:
+        """
+        Updates the reservations.
+
+        Returns:
+            dict: The number of updated reservations and the ids of selected reservations that changed in the
+            meantime and were left alone.
+        """
+        if self.selection:
+            queryset = select_versions(self.selection)
+        else:
+            queryset = self.filter(Reservation.objects.all())
+        updated = update_reservations(queryset, self.cleaned_data['action'],
+                                      self.cleaned_data.get('new_date'), self.cleaned_data.get('new_time'))
+        return {
+            'updated': len(updated),
+            'conflicts': sorted(set(self.selection) - set(updated)),
+        }
+
+
+class OrderStatusForm(forms.Form):
+    """
+    Form for moving an order to its next status in the fulfilment queue.
+
+    Attributes:
+        status (forms.ChoiceField): The new status of the order.
+    """
+    status = forms.ChoiceField(label='Status', choices=Order.STATUS_CHOICES)
@@ -0,0 +1,104 @@
+import datetime
+from typing import List, Optional, Tuple
+
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_date, parse_time
+
+Cursor = Tuple[datetime.date, datetime.time, int]
+
+
+def encode_cursor(reservation) -> str:
+    """
+    Encodes the (date, time, id) position of a reservation as a cursor for the query string.
+
+    Args:
+        reservation (Reservation): The reservation.
+
+    Returns:
+        str: The cursor.
+    """
+    return f'{reservation.date.isoformat()}_{reservation.time.isoformat()}_{reservation.pk}'
+
+
+def decode_cursor(value: Optional[str]) -> Optional[Cursor]:
+    """
+    Decodes a cursor from the query string.
+
+    Args:
+        value (str): The cursor.
+
+    Returns:
+        tuple: The date, time and id of the cursor, or None if it is missing or malformed.
+    """
+    try:
+        date, time, pk = value.split('_')
+        cursor = parse_date(date), parse_time(time), int(pk)
+    except (AttributeError, TypeError, ValueError):
+        return None
+    return cursor if None not in cursor else None
+
+
+class KeysetPage:
+    """
+    A page of reservations found by seeking to a cursor instead of counting and skipping rows.
+
+    Attributes:
+        object_list (list): The reservations of the page.
+        has_next (bool): Indicates if there are reservations after the page.
+        has_previous (bool): Indicates if there are reservations before the page.
+        next_cursor (str): The cursor of the next page.
+        previous_cursor (str): The cursor of the previous page.
+    """
+    def __init__(self, object_list: List, has_next: bool, has_previous: bool) -> None:
+        self.object_list = object_list
+        self.has_next = has_next and bool(object_list)
+        self.has_previous = has_previous and bool(object_list)
+        self.next_cursor = encode_cursor(object_list[-1]) if self.has_next else None
+        self.previous_cursor = encode_cursor(object_list[0]) if self.has_previous else None
+
+    def has_other_pages(self) -> bool:
+        """
+        Returns True if there are pages before or after this one.
+
+        Returns:
+            bool: True if there are other pages.
+        """
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+
+def paginate_keyset(queryset: QuerySet, per_page: int, after: Optional[Cursor] = None,
+                    before: Optional[Cursor] = None) -> KeysetPage:
+    """
+    Returns the page of a queryset that follows the 'after' cursor or precedes the 'before' cursor.
+
+    The queryset is ordered by (date, time, id). Each page is one indexed range query fetching one row more
+    than needed, however deep the page is.
+
+    Args:
+        queryset (QuerySet): The reservations to paginate.
+        per_page (int): The number of reservations per page.
+        after (tuple, optional): The cursor the page starts after.
+        before (tuple, optional): The cursor the page ends before.
+
+    Returns:
+        KeysetPage: The page.
+    """
+    if before is not None:
+        date, time, pk = before
+        queryset = queryset.filter(
+            Q(date__lte=date) & (Q(date__lt=date) | Q(time__lt=time) | Q(time=time, pk__lt=pk)))
+        object_list = list(queryset.order_by('-date', '-time', '-pk')[:per_page + 1])
+        return KeysetPage(object_list[:per_page][::-1], has_next=True, has_previous=len(object_list) > per_page)
+
+    if after is not None:
+        date, time, pk = after
+        queryset = queryset.filter(
+            Q(date__gte=date) & (Q(date__gt=date) | Q(time__gt=time) | Q(time=time, pk__gt=pk)))
+    object_list = list(queryset.order_by('date', 'time', 'pk')[:per_page + 1])
+    return KeysetPage(object_list[:per_page], has_next=len(object_list) > per_page, has_previous=after is not None)
@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from coffee.models import Order, Reservation
+from .events import ORDER_CREATED, RESERVATION_CREATED, publish
+
+
+@receiver(post_save, sender=Reservation)
+def reservation_created(sender, instance: Reservation, created: bool, **kwargs) -> None:
+    """
+    Pushes new reservations to the connected managers once they are committed.
+    """
+    if created:
+        transaction.on_commit(lambda: publish(
+            RESERVATION_CREATED, id=instance.pk, name=f'{instance.name} {instance.last_name}',
+            date=instance.date.isoformat(), time=instance.time.strftime('%H:%M') if instance.time else None))
+
+
+@receiver(post_save, sender=Order)
+def order_created(sender, instance: Order, created: bool, **kwargs) -> None:
+    """
+    Pushes new orders to the connected managers once they are committed.
+    """
+    if created:
+        transaction.on_commit(lambda: publish(
+            ORDER_CREATED, id=instance.pk, order_id=str(instance.order_id), status=instance.order_status))
@@ -1,3 +1,406 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+from datetime import date, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from coffee.models import Dish, DishCategory, Order, OrderDishesList, Reservation, ReservationSlot, UserData
+from manager.bulk import encode_selection
+from manager.backends import ManagerBackend, is_manager
+from manager.events import ORDER_CREATED, RESERVATION_CREATED, LocalBroadcaster, PostgresBroadcaster, get_broadcaster, \
+    publish
+
+
+class ManagerIndexTestCase(TestCase):
+    """
+    Test case for the manager reservation dashboard.
+
+    Methods:
+        setUp(): Create a manager and reservations for testing.
+        test_requires_manager(): Test that only managers can open the dashboard.
+        test_keyset_pagination(): Test that pages follow each other without gaps or repeats.
+        test_filters(): Test the date range and status filters.
+        test_manager_flag(): Test that the manager membership is loaded with the user and follows group changes.
+    """
+    def setUp(self) -> None:
+        cache.clear()
+        self.group = Group.objects.create(name='manager')
+        self.manager = User.objects.create_user(username='manager', password='testpassword')
+        self.manager.groups.add(self.group)
+        self.start = date(2030, 1, 1)
+        Reservation.objects.bulk_create([
+            Reservation(name=f'Guest {number}', last_name='Doe', date=self.start + timedelta(days=number % 3),
+                        time=time(12, 0), phone='+380123456789', is_precessed=number >= 30)
+            for number in range(35)
+        ])
+        self.client.login(username='manager', password='testpassword')
+
+    def get_names(self, **params) -> tuple:
+        response = self.client.get(reverse('manager:home'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, [reservation.name for reservation in response.context['reservations']]
+
+    def test_requires_manager(self) -> None:
+        User.objects.create_user(username='guest', password='testpassword')
+        self.client.login(username='guest', password='testpassword')
+        self.assertEqual(self.client.get(reverse('manager:home')).status_code, 403)
+
+    def test_keyset_pagination(self) -> None:
+        expected = [reservation.name for reservation in
+                    Reservation.objects.filter(is_precessed=False).order_by('date', 'time', 'id')]
+
+        response, first = self.get_names()
+        page = response.context['page_obj']
+        self.assertEqual(first, expected[:25])
+        self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
+
+        response, second = self.get_names(after=page.next_cursor)
+        page = response.context['page_obj']
+        self.assertEqual(second, expected[25:])
+        self.assertFalse(page.has_next)
+
+        response, previous = self.get_names(before=page.previous_cursor)
+        self.assertEqual(previous, expected[:25])
+        self.assertFalse(response.context['page_obj'].has_previous)
+
+        self.assertEqual(self.get_names(after='garbage')[1], expected[:25])
+
+    def test_filters(self) -> None:
+        _, names = self.get_names(date_from=self.start + timedelta(days=1), date_to=self.start + timedelta(days=1))
+        self.assertEqual(len(names), 10)
+
+        _, names = self.get_names(status='processed')
+        self.assertEqual(sorted(names), sorted(f'Guest {number}' for number in range(30, 35)))
+
+        response, names = self.get_names(status='all', date_to=self.start)
+        self.assertEqual(len(names), 12)
+        self.assertIn('status=all', response.context['filter_query'])
+
+    def test_manager_flag(self) -> None:
+        with self.assertNumQueries(1):
+            user = ManagerBackend().get_user(self.manager.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(is_manager(user))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse('manager:home')).status_code, 200)
+        self.assertEqual(len([query for query in queries.captured_queries if 'auth_group' in query['sql']]), 1)
+
+        self.manager.groups.remove(self.group)
+        self.assertFalse(is_manager(ManagerBackend().get_user(self.manager.pk)))
+        self.assertEqual(self.client.get(reverse('manager:home')).status_code, 403)
+
+        self.group.user_set.add(self.manager)
+        self.assertEqual(self.client.get(reverse('manager:home')).status_code, 200)
+
+        self.group.delete()
+        self.assertEqual(self.client.get(reverse('manager:home')).status_code, 403)
+
+        with self.assertNumQueries(1):
+            self.assertFalse(is_manager(self.manager))
+            self.assertFalse(is_manager(self.manager))
+
+
+@override_settings(RESERVATION_SLOT_CAPACITY=3)
+class BulkReservationTestCase(TestCase):
+    """
+    Test case for bulk reservation processing.
+
+    Methods:
+        setUp(): Create a manager and reservations for testing.
+        test_process_selected(): Test that selected reservations are processed with one UPDATE.
+        test_stale_selection(): Test that reservations changed by someone else are reported and left alone.
+        test_process_matching(): Test that all reservations matching the filters can be processed.
+        test_reschedule(): Test that rescheduling moves the slot bookings or fails as a whole.
+        test_reschedule_target(): Test that rescheduling into the past or outside the opening hours is rejected.
+        test_html_form(): Test that the dashboard form redirects back with a message.
+        test_edit(): Test that a reservation is saved with the version the manager saw, which is required.
+        test_edit_conflict(): Test that editing a reservation changed in the meantime is rejected.
+    """
+    def setUp(self) -> None:
+        cache.clear()
+        manager = User.objects.create_user(username='manager', password='testpassword')
+        manager.groups.add(Group.objects.create(name='manager'))
+        self.client.login(username='manager', password='testpassword')
+        self.date = date(2030, 1, 1)
+        self.reservations = [
+            Reservation.objects.create(name=f'Guest {number}', last_name='Doe', date=self.date,
+                                       time=time(12, 0), phone='+380123456789')
+            for number in range(3)
+        ]
+
+    def post(self, data: dict, **headers):
+        return self.client.post(reverse('manager:bulk_reservations'), data,
+                                headers=headers or {'Accept': 'application/json'})
+
+    def test_process_selected(self) -> None:
+        selected = [encode_selection(reservation) for reservation in self.reservations[:2]]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post({'action': 'process', 'selected': selected})
+        self.assertEqual(response.json(), {'updated': 2, 'conflicts': []})
+        updates = [query for query in queries.captured_queries
+                   if query['sql'].startswith('UPDATE "coffee_reservation"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Reservation.objects.filter(is_precessed=True).count(), 2)
+
+    def test_stale_selection(self) -> None:
+        selected = [encode_selection(reservation) for reservation in self.reservations]
+        Reservation.objects.get(pk=self.reservations[0].pk).save()
+
+        response = self.post({'action': 'process', 'selected': selected})
+        self.assertEqual(response.json(), {'updated': 2, 'conflicts': [self.reservations[0].pk]})
+        self.assertFalse(Reservation.objects.get(pk=self.reservations[0].pk).is_precessed)
+
+    def test_process_matching(self) -> None:
+        Reservation.objects.create(name='Later', last_name='Doe', date=self.date + timedelta(days=1),
+                                   time=time(12, 0), phone='+380123456789')
+        response = self.post({'action': 'process', 'all_matching': 'on', 'date_to': self.date.isoformat()})
+        self.assertEqual(response.json()['updated'], 3)
+        self.assertEqual(Reservation.objects.filter(is_precessed=False).get().name, 'Later')
+
+        self.assertEqual(self.post({'action': 'process'}).status_code, 400)
+
+    def test_reschedule(self) -> None:
+        new_date = self.date + timedelta(days=1)
+        selected = [encode_selection(reservation) for reservation in self.reservations[:2]]
+        response = self.post({'action': 'reschedule', 'selected': selected,
+                              'new_date': new_date.isoformat(), 'new_time': '18:00'})
+        self.assertEqual(response.json()['updated'], 2)
+        self.assertEqual(dict(ReservationSlot.objects.values_list('date', 'booked')), {self.date: 1, new_date: 2})
+
+        Reservation.objects.create(name='Other', last_name='Doe', date=new_date, time=time(18, 0),
+                                   phone='+380123456789')
+        response = self.post({'action': 'reschedule', 'all_matching': 'on', 'date_to': self.date.isoformat(),
+                              'new_date': new_date.isoformat(), 'new_time': '18:00'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Reservation.objects.filter(date=self.date).count(), 1)
+
+    def test_reschedule_target(self) -> None:
+        selected = [encode_selection(self.reservations[0])]
+        for new_date, new_time in ((self.date, '23:00'), (self.date, '07:30'), (date(2020, 1, 1), '12:00')):
+            response = self.post({'action': 'reschedule', 'selected': selected,
+                                  'new_date': new_date.isoformat(), 'new_time': new_time})
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(Reservation.objects.filter(date=self.date, time=time(12, 0)).count(), 3)
+
+    def test_html_form(self) -> None:
+        response = self.post({'action': 'process', 'selected': [encode_selection(self.reservations[0])],
+                              'status': 'pending'}, Accept='text/html')
+        self.assertRedirects(response, reverse('manager:home') + '?status=pending', fetch_redirect_response=False)
+        response = self.client.get(response.url)
+        self.assertContains(response, 'Updated 1 reservations.')
+        self.assertEqual(len(response.context['reservations']), 2)
+
+    def test_edit(self) -> None:
+        reservation = self.reservations[0]
+        url = reverse('manager:edit_reservations', args=[reservation.pk])
+        data = {'is_precessed': 'on', 'name': 'Guest 0', 'last_name': 'Doe', 'date': self.date.isoformat(),
+                'phone': '+380123456789'}
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('version', response.context['form'].errors)
+        self.assertContains(response, 'This field is required.')
+        self.assertNotContains(response, '>Version</label>')
+
+        data['version'] = self.client.get(url).context['form']['version'].value()
+        self.assertRedirects(self.client.post(url, data), reverse('manager:home'), fetch_redirect_response=False)
+        self.assertTrue(Reservation.objects.get(pk=reservation.pk).is_precessed)
+
+        response = self.client.post(url, data)
+        self.assertContains(response, 'changed by someone else')
+
+    def test_edit_conflict(self) -> None:
+        reservation = self.reservations[0]
+        url = reverse('manager:edit_reservations', args=[reservation.pk])
+        version = self.client.get(url).context['form']['version'].value()
+        Reservation.objects.get(pk=reservation.pk).save()
+
+        response = self.client.post(url, {'is_precessed': 'on', 'name': 'Guest 0', 'last_name': 'Doe',
+                                          'date': self.date.isoformat(), 'phone': '+380123456789',
+                                          'version': version})
+        self.assertContains(response, 'changed by someone else')
+        self.assertContains(response, 'type="hidden" name="version"')
+
+
+class OrderQueueTestCase(TestCase):
+    """
+    Test case for the kitchen order queue.
+
+    Methods:
+        setUp(): Create a manager and a dish for testing.
+        create_order(status): Create an order with its customer data and a line.
+        test_queue(): Test that open orders are listed oldest first with a constant number of queries.
+        test_status_filter(): Test that the queue can be filtered by status.
+        test_transition(): Test that orders only move along the status state machine.
+    """
+    def setUp(self) -> None:
+        cache.clear()
+        manager = User.objects.create_user(username='manager', password='testpassword')
+        manager.groups.add(Group.objects.create(name='manager'))
+        self.client.login(username='manager', password='testpassword')
+        category = DishCategory.objects.create(name='Coffee', order=1)
+        self.dish = Dish.objects.create(name='Latte', slug='latte', price=3, category=category,
+                                        description='Milk coffee', order=1)
+
+    def create_order(self, status: str = Order.STATUS_PENDING) -> Order:
+        order = Order.objects.create(order_status=status)
+        user_data = UserData.objects.create(order=order, first_name='John', last_name='Doe',
+                                            street_name='Main St', house_number='1', phone='+380123456789',
+                                            email_address='john@example.com')
+        OrderDishesList.objects.create(order=order, user_data=user_data, dish=self.dish, price=3, quantity=2)
+        return order
+
+    def get_queue(self, **params):
+        return self.client.get(reverse('manager:order_queue'), params)
+
+    def test_queue(self) -> None:
+        orders = [self.create_order(status) for status in Order.OPEN_STATUSES]
+        self.create_order(Order.STATUS_COMPLETED)
+        self.get_queue()
+
+        with CaptureQueriesContext(connection) as few:
+            response = self.get_queue()
+        self.assertEqual(list(response.context['orders']), orders)
+        self.assertContains(response, 'Latte x 2', count=3)
+
+        for _ in range(5):
+            self.create_order()
+        with CaptureQueriesContext(connection) as many:
+            self.get_queue()
+        self.assertEqual(len(many), len(few))
+
+    def test_status_filter(self) -> None:
+        self.create_order()
+        ready = self.create_order(Order.STATUS_READY)
+        completed = self.create_order(Order.STATUS_COMPLETED)
+        self.assertEqual(list(self.get_queue(status=['ready', 'completed']).context['orders']), [ready, completed])
+        self.assertEqual(len(self.get_queue(status='unknown').context['orders']), 2)
+
+    def test_transition(self) -> None:
+        order = self.create_order()
+        url = reverse('manager:order_status', args=[order.pk])
+        headers = {'Accept': 'application/json'}
+
+        response = self.client.post(url, {'status': Order.STATUS_READY}, headers=headers)
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post(url, {'status': 'burnt'}, headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(url, {'status': Order.STATUS_PREPARING}, headers=headers)
+        self.assertEqual(response.json(), {'id': order.pk, 'status': Order.STATUS_PREPARING})
+        response = self.client.post(url, {'status': Order.STATUS_PREPARING})
+        self.assertRedirects(response, reverse('manager:order_queue'), fetch_redirect_response=False)
+        self.assertContains(self.client.get(response.url), 'cannot be moved')
+
+        order.refresh_from_db()
+        self.assertEqual(order.order_status, Order.STATUS_PREPARING)
+        self.assertEqual([value for value, label in self.get_queue().context['orders'][0].next_statuses],
+                         [Order.STATUS_READY, Order.STATUS_CANCELLED])
+
+
+@override_settings(MIDDLEWARE=[middleware for middleware in settings.MIDDLEWARE if 'whitenoise' not in middleware])
+class EventStreamTestCase(TestCase):
+    """
+    Test case for the live event stream of the manager screens.
+
+    Methods:
+        setUp(): Create a manager for testing.
+        test_requires_manager(): Test that only managers can open the stream.
+        test_stream(): Test that published events are streamed until the client goes away.
+        test_unread_stream(): Test that a stream only subscribes once it is read.
+        test_broadcaster(): Test that events published from other threads reach every subscriber.
+        test_broadcaster_backend(): Test that the broadcaster follows the setting or the database.
+        test_signals(): Test that new reservations and orders are published after commit only.
+    """
+    def setUp(self) -> None:
+        cache.clear()
+        self.manager = User.objects.create_user(username='manager', password='testpassword')
+        self.manager.groups.add(Group.objects.create(name='manager'))
+
+    async def test_requires_manager(self) -> None:
+        response = await self.async_client.get(reverse('manager:events'))
+        self.assertEqual(response.status_code, 302)
+
+        user = await User.objects.acreate(username='guest')
+        await self.async_client.aforce_login(user)
+        response = await self.async_client.get(reverse('manager:events'))
+        self.assertEqual(response.status_code, 403)
+
+    async def test_stream(self) -> None:
+        await self.async_client.aforce_login(self.manager)
+        response = await self.async_client.get(reverse('manager:events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry: '))
+
+        publish(RESERVATION_CREATED, id=1, name='John Doe')
+        chunk = (await anext(stream)).decode()
+        self.assertTrue(chunk.startswith('event: reservation.created\ndata: '))
+        self.assertEqual(json.loads(chunk.split('data: ')[1]),
+                         {'type': RESERVATION_CREATED, 'id': 1, 'name': 'John Doe'})
+
+        reading = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        reading.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await reading
+        self.assertEqual(get_broadcaster().subscriptions, set())
+
+    async def test_unread_stream(self) -> None:
+        await self.async_client.aforce_login(self.manager)
+        response = await self.async_client.get(reverse('manager:events'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_broadcaster().subscriptions, set())
+
+    async def test_broadcaster(self) -> None:
+        broadcaster = LocalBroadcaster()
+        subscriptions = [broadcaster.subscribe(), broadcaster.subscribe()]
+        thread = threading.Thread(target=broadcaster.publish, args=[{'type': ORDER_CREATED}])
+        thread.start()
+        thread.join()
+        for subscription in subscriptions:
+            self.assertEqual(await subscription.get(1), {'type': ORDER_CREATED})
+            self.assertIsNone(await subscription.get(0.01))
+
+        subscriptions[0].close()
+        with override_settings(MANAGER_EVENTS_QUEUE_SIZE=1):
+            slow = broadcaster.subscribe()
+        broadcaster.publish({'type': ORDER_CREATED, 'id': 1})
+        broadcaster.publish({'type': ORDER_CREATED, 'id': 2})
+        self.assertEqual((await slow.get(1))['id'], 1)
+        self.assertIsNone(await slow.get(0.01))
+        self.assertEqual(broadcaster.subscriptions, {subscriptions[1], slow})
+
+    def test_broadcaster_backend(self) -> None:
+        with mock.patch('manager.events._broadcaster', None):
+            self.assertIs(type(get_broadcaster()), LocalBroadcaster)
+        with mock.patch('manager.events._broadcaster', None), \
+                mock.patch('manager.events.connection.vendor', 'postgresql'):
+            self.assertIs(type(get_broadcaster()), PostgresBroadcaster)
+        with mock.patch('manager.events._broadcaster', None), \
+                override_settings(MANAGER_EVENTS_BACKEND='manager.events.LocalBroadcaster'), \
+                mock.patch('manager.events.connection.vendor', 'postgresql'):
+            self.assertIs(type(get_broadcaster()), LocalBroadcaster)
+
+    def test_signals(self) -> None:
+        with mock.patch('manager.signals.publish') as published:
+            with self.captureOnCommitCallbacks(execute=True):
+                reservation = Reservation.objects.create(name='John', last_name='Doe', date=date(2030, 1, 1),
+                                                         time=time(12, 0), phone='+380123456789')
+                order = Order.objects.create()
+                self.assertFalse(published.called)
+            reservation.save()
+
+        self.assertEqual(published.call_args_list, [
+            mock.call(RESERVATION_CREATED, id=reservation.pk, name='John Doe', date='2030-01-01', time='12:00'),
+            mock.call(ORDER_CREATED, id=order.pk, order_id=str(order.order_id), status=Order.STATUS_PENDING),
+        ])
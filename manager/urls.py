@@ -1,9 +1,14 @@
 from django.urls import path
-from .views import ManagerIndex, EditReservation
+from .views import ManagerIndex, EditReservation, BulkReservationView, OrderQueue, OrderStatusView, \
+    EventStreamView
 
 app_name = 'manager'
 
 urlpatterns = [
     path('', ManagerIndex.as_view(), name='home'),
-    path('reservations/<int:pk>/', EditReservation.as_view(), name='edit_reservations')
+    path('reservations/<int:pk>/', EditReservation.as_view(), name='edit_reservations'),
+    path('reservations/bulk/', BulkReservationView.as_view(), name='bulk_reservations'),
+    path('orders/', OrderQueue.as_view(), name='order_queue'),
+    path('orders/<int:pk>/status/', OrderStatusView.as_view(), name='order_status'),
+    path('events/', EventStreamView.as_view(), name='events'),
 ]
\ No newline at end of file
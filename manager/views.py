@@ -1,8 +1,23 @@
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.http import Http404
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.views import View
 from django.views.generic import ListView, UpdateView
-from coffee.models import Reservation, Post
-from .forms import ReservationEditForm
+
+from coffee.budgets import query_budget
+from coffee.models import Order, Reservation
+from .backends import is_manager
+from .bulk import encode_selection
+from .events import format_event, get_broadcaster
+from .forms import ReservationEditForm, ReservationFilterForm, BulkReservationForm, OrderStatusForm
+from .pagination import paginate_keyset, decode_cursor
 from django.urls import reverse_lazy, reverse
 
 
@@ -16,14 +31,15 @@ class ManagerAccessMixin(UserPassesTestMixin):
 
     def test_func(self) -> bool:
         """
-        Checks if the current user belongs to the 'manager' group.
+        Checks if the current user belongs to the 'manager' group, using the flag set by ManagerBackend when possible.
 
         Returns:
             bool: True if the user is a manager, False otherwise.
         """
-        return self.request.user.groups.filter(name='manager').exists()
+        return is_manager(self.request.user)
 
 
+@query_budget(queries=11)
 class ManagerIndex(LoginRequiredMixin, ManagerAccessMixin, ListView):
     """
     View for displaying the manager index page.
@@ -38,32 +54,63 @@ class ManagerIndex(LoginRequiredMixin, ManagerAccessMixin, ListView):
     login_url = '/login/'
     model = Reservation
     context_object_name = 'reservations'
+    paginate_by = 25
+
+    def get_filter_form(self) -> ReservationFilterForm:
+        """
+        Returns the filter form bound to the query string.
+
+        Returns:
+            ReservationFilterForm: The filter form.
+        """
+        if not hasattr(self, '_filter_form'):
+            self._filter_form = ReservationFilterForm(self.request.GET)
+        return self._filter_form
 
     def get_queryset(self):
         """
-        Retrieves the queryset of reservations.
+        Retrieves the queryset of reservations matching the filters, pending ones by default.
 
         Returns:
             QuerySet: The queryset of reservations.
         """
-        return Reservation.objects.filter(is_precessed=False).order_by('date', 'time')
+        return self.get_filter_form().filter(Reservation.objects.all()).order_by('date', 'time', 'id')
+
+    def paginate_queryset(self, queryset, page_size: int) -> tuple:
+        """
+        Paginates the reservations with keyset pagination on (date, time, id).
+
+        Args:
+            queryset (QuerySet): The reservations.
+            page_size (int): The number of reservations per page.
+
+        Returns:
+            tuple: The paginator (None), the page, its reservations and whether there are other pages.
+        """
+        page = paginate_keyset(queryset, page_size,
+                               after=decode_cursor(self.request.GET.get('after')),
+                               before=decode_cursor(self.request.GET.get('before')))
+        return None, page, page.object_list, page.has_other_pages()
 
     def get_context_data(self, **kwargs) -> dict:
         """
-        Retrieves context data for rendering the template.
+        Adds the filter form and its query string to the context.
 
         Returns:
             dict: The context data.
         """
         context = super().get_context_data(**kwargs)
-        try:
-            recent_posts = Post.objects.order_by('-date_posted')[:2]
-            context['recent_posts'] = recent_posts
-        except Exception:
-            raise Http404("Error processing requests")
+        filter_form = self.get_filter_form()
+        context['filter_form'] = filter_form
+        context['bulk_form'] = BulkReservationForm()
+        for reservation in context['reservations']:
+            reservation.selection = encode_selection(reservation)
+        context['filter_query'] = urlencode({name: value for name, value in filter_form.data.items()
+                                             if name in filter_form.fields and value})
         return context
 
 
+@query_budget(queries=19)
 class EditReservation(LoginRequiredMixin, ManagerAccessMixin, UpdateView):
     """
     View for editing a reservation.
@@ -81,17 +128,215 @@ class EditReservation(LoginRequiredMixin, ManagerAccessMixin, UpdateView):
     form_class = ReservationEditForm
     success_url = reverse_lazy('manager:home')
 
+    def form_valid(self, form):
+        """
+        Saves the reservation, showing an error if its new time slot filled up in the meantime.
+
+        Args:
+            form (ReservationEditForm): The valid form.
+
+        Returns:
+            HttpResponse: The redirect to the success URL, or the form with the error.
+        """
+        try:
+            return super().form_valid(form)
+        except ValidationError as error:
+            form.add_error(None, error)
+            return self.form_invalid(form)
+
+
+class BulkReservationView(LoginRequiredMixin, ManagerAccessMixin, View):
+    """
+    View for processing or rescheduling many reservations with one UPDATE.
+
+    Answers with JSON when the client asks for it, and otherwise redirects back to the dashboard with a message.
+
+    Attributes:
+        login_url (str): The URL where users will be redirected if not logged in.
+    """
+    login_url = '/login/'
+
+    def post(self, request, *args, **kwargs) -> HttpResponse:
+        """
+        Handles POST requests with the bulk action, the selection or the filters.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+
+        Returns:
+            HttpResponse: The number of updated reservations and the conflicting ids, or the errors.
+        """
+        form = BulkReservationForm(request.POST)
+        status = 200
+        if form.is_valid():
+            try:
+                result = form.save()
+            except ValidationError as error:
+                result, status = {'errors': error.messages}, 409
+        else:
+            result, status = {'errors': [error for errors in form.errors.values() for error in errors]}, 400
+
+        if 'application/json' in request.headers.get('Accept', ''):
+            return JsonResponse(result, status=status)
+
+        if status != 200:
+            messages.error(request, ' '.join(result['errors']))
+        else:
+            messages.success(request, f"Updated {result['updated']} reservations.")
+            if result['conflicts']:
+                messages.warning(request, f"{len(result['conflicts'])} reservations were changed by someone else "
+                                          f"and were left alone.")
+        return redirect(reverse('manager:home') + '?' + urlencode(
+            {name: request.POST[name] for name in ReservationFilterForm.base_fields if request.POST.get(name)}))
+
+
+@query_budget(queries=13)
+class OrderQueue(LoginRequiredMixin, ManagerAccessMixin, ListView):
+    """
+    View for displaying the kitchen queue of open orders, oldest first.
+
+    The orders, their customer data and their lines are read with three queries however long the queue is.
+
+    Attributes:
+        template_name (str): The name of the template used for rendering the page.
+        login_url (str): The URL where users will be redirected if not logged in.
+        context_object_name (str): The name of the variable to use in the template for the object list.
+        queue_size (int): The maximum number of orders shown at once.
+    """
+    template_name = 'order_queue.html'
+    login_url = '/login/'
+    context_object_name = 'orders'
+    queue_size = 100
+
+    def get_statuses(self) -> list:
+        """
+        Returns the statuses requested in the query string, if they are valid.
+
+        Returns:
+            list: The statuses to show, or an empty list for all open orders.
+        """
+        return [status for status in self.request.GET.getlist('status') if status in dict(Order.STATUS_CHOICES)]
+
+    def get_queryset(self):
+        """
+        Retrieves the oldest orders with the requested statuses.
+
+        Returns:
+            QuerySet: The queue of orders.
+        """
+        return Order.objects.queue(self.get_statuses())[:self.queue_size]
+
     def get_context_data(self, **kwargs) -> dict:
         """
-        Retrieves context data for rendering the template.
+        Adds the next statuses of each order, the status choices and the selected statuses to the context.
 
         Returns:
             dict: The context data.
         """
         context = super().get_context_data(**kwargs)
-        try:
-            recent_posts = Post.objects.order_by('-date_posted')[:2]
-            context['recent_posts'] = recent_posts
-        except Exception:
-            raise Http404("Error processing requests")
+        labels = dict(Order.STATUS_CHOICES)
+        for order in context['orders']:
+            order.next_statuses = [(status, labels[status]) for status in order.get_next_statuses()]
+        context['status_choices'] = Order.STATUS_CHOICES
+        context['statuses'] = self.get_statuses() or list(Order.OPEN_STATUSES)
         return context
+
+
+class OrderStatusView(LoginRequiredMixin, ManagerAccessMixin, View):
+    """
+    View for moving an order to its next status.
+
+    Answers with JSON when the client asks for it, and otherwise redirects back to the queue with a message.
+
+    Attributes:
+        login_url (str): The URL where users will be redirected if not logged in.
+    """
+    login_url = '/login/'
+
+    def post(self, request, pk: int, *args, **kwargs) -> HttpResponse:
+        """
+        Handles POST requests with the new status of the order.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            pk (int): The primary key of the order.
+
+        Returns:
+            HttpResponse: The new status, or the errors.
+        """
+        form = OrderStatusForm(request.POST)
+        status = 200
+        if form.is_valid():
+            try:
+                Order.objects.transition(pk, form.cleaned_data['status'])
+                result = {'id': pk, 'status': form.cleaned_data['status']}
+            except ValidationError as error:
+                result, status = {'errors': error.messages}, 409
+        else:
+            result, status = {'errors': [error for errors in form.errors.values() for error in errors]}, 400
+
+        if 'application/json' in request.headers.get('Accept', ''):
+            return JsonResponse(result, status=status)
+
+        if status != 200:
+            messages.error(request, ' '.join(result['errors']))
+        return redirect('manager:order_queue')
+
+
+class EventStreamView(View):
+    """
+    View streaming new reservations and orders to the manager screens as server-sent events.
+
+    The view is async, so under ASGI an open stream only costs a coroutine and a queue instead of a thread.
+    A comment line is sent when nothing happened for a while, to keep proxies from closing the connection.
+
+    Attributes:
+        login_url (str): The URL where users will be redirected if not logged in.
+    """
+    login_url = '/login/'
+
+    async def get(self, request, *args, **kwargs) -> HttpResponse:
+        """
+        Handles GET requests by opening the event stream.
+
+        The access checks of the other manager views are sync, so they are repeated here with the async API.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+
+        Returns:
+            HttpResponse: The event stream.
+
+        Raises:
+            PermissionDenied: If the user is not a manager.
+        """
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path(), self.login_url)
+        if not await sync_to_async(is_manager)(user):
+            raise PermissionDenied
+
+        response = StreamingHttpResponse(self.stream(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @staticmethod
+    async def stream():
+        """
+        Subscribes to the events and yields them, closing the subscription when the client goes away.
+
+        The subscription is opened when the response starts streaming, so a response that is never iterated
+        does not leave one behind.
+
+        Yields:
+            str: The server-sent events.
+        """
+        subscription = get_broadcaster().subscribe()
+        try:
+            yield f'retry: {settings.MANAGER_EVENTS_HEARTBEAT * 1000}\n\n'
+            while True:
+                event = await subscription.get(settings.MANAGER_EVENTS_HEARTBEAT)
+                yield format_event(event) if event is not None else ': keep-alive\n\n'
+        finally:
+            subscription.close()
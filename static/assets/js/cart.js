@@ -0,0 +1,69 @@
+document.addEventListener("DOMContentLoaded", function () {
+
+    const cartItemsCount = document.getElementById("cart-items-count");
+
+    function updateCart(data) {
+        if (cartItemsCount) {
+            cartItemsCount.textContent = data.cart.items_count;
+        }
+
+        document.querySelectorAll("[data-cart-total]").forEach(function (total) {
+            total.textContent = "$" + data.cart.total_amount;
+        });
+    }
+
+    function updateLine(form, data) {
+        const row = form.closest("[data-cart-line]");
+        if (!row) {
+            return;
+        }
+
+        if (data.line === null) {
+            row.remove();
+            return;
+        }
+
+        const lineTotal = row.querySelector("[data-cart-line-total]");
+        if (lineTotal) {
+            lineTotal.textContent = "$" + data.line.total_for_product;
+        }
+    }
+
+    document.querySelectorAll("form[data-json-action]").forEach(function (form) {
+        form.addEventListener("submit", function (event) {
+            event.preventDefault();
+
+            const formData = new FormData(form);
+            if (event.submitter && event.submitter.name) {
+                formData.set(event.submitter.name, event.submitter.value);
+            }
+
+            fetch(form.dataset.jsonAction, {
+                method: "POST",
+                body: formData,
+                credentials: "same-origin",
+                headers: {"X-Requested-With": "XMLHttpRequest"}
+            })
+                .then(function (response) {
+                    if (!response.ok) {
+                        throw new Error(response.statusText);
+                    }
+                    return response.json();
+                })
+                .then(function (data) {
+                    updateCart(data);
+                    updateLine(form, data);
+                })
+                .catch(function () {
+                    if (event.submitter && event.submitter.name) {
+                        const input = document.createElement("input");
+                        input.type = "hidden";
+                        input.name = event.submitter.name;
+                        input.value = event.submitter.value;
+                        form.appendChild(input);
+                    }
+                    form.submit();
+                });
+        });
+    });
+});
@@ -0,0 +1,36 @@
+document.addEventListener("DOMContentLoaded", function () {
+
+    const container = document.getElementById("live-events");
+    if (!container || !window.EventSource) {
+        return;
+    }
+
+    const messages = {
+        "reservation.created": function (data) {
+            return "New reservation: " + data.name + ", " + data.date + (data.time ? " " + data.time : "");
+        },
+        "order.created": function (data) {
+            return "New order " + data.order_id;
+        }
+    };
+
+    function showEvent(text) {
+        const alert = document.createElement("div");
+        alert.className = "alert alert-info";
+        alert.textContent = text + " ";
+
+        const reload = document.createElement("a");
+        reload.href = window.location.href;
+        reload.textContent = "Reload";
+        alert.appendChild(reload);
+
+        container.prepend(alert);
+    }
+
+    const source = new EventSource(container.dataset.url);
+    container.dataset.events.split(" ").forEach(function (type) {
+        source.addEventListener(type, function (event) {
+            showEvent(messages[type](JSON.parse(event.data)));
+        });
+    });
+});